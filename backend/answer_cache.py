@@ -0,0 +1,119 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from scoring import normalize_rows
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_question(text: str) -> str:
+    text = re.sub(r"\s+", " ", text.strip().lower())
+    return text.rstrip("?!. ")
+
+
+class AnswerCache:
+    """
+    Two-tier cache of /query answers per language.
+
+    The exact tier matches the normalized question text. On a miss, the
+    semantic tier embeds the question and reuses the answer of the most
+    similar cached question if its cosine similarity is at least
+    ``similarity_threshold``. Each language holds at most ``max_entries``
+    answers (LRU) for ``ttl`` seconds.
+    """
+
+    def __init__(self, embed=None, max_entries: int = 1000, ttl: float = 3600,
+                 similarity_threshold: float = 0.95):
+        self.embed = embed
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _language(self, lang: str) -> OrderedDict:
+        return self._entries.setdefault(lang, OrderedDict())
+
+    async def _embedding(self, question: str):
+        if self.embed is None:
+            return None
+        try:
+            (embedding,) = await self.embed([question])
+            return np.asarray(embedding, dtype=np.float32)
+        except Exception as e:
+            logger.warning("Semantic answer cache unavailable: %s", e)
+            return None
+
+    def _purge_expired(self, entries: OrderedDict, now: float):
+        for key in [k for k, (expires_at, _, _) in entries.items() if expires_at <= now]:
+            del entries[key]
+
+    async def get(self, lang: str, question: str):
+        key = normalize_question(question)
+        now = time.monotonic()
+        with self._lock:
+            entries = self._language(lang)
+            item = entries.get(key)
+            if item is not None and item[0] > now:
+                entries.move_to_end(key)
+                self.exact_hits += 1
+                return item[1]
+            self._purge_expired(entries, now)
+            has_candidates = any(embedding is not None for _, _, embedding in entries.values())
+
+        if has_candidates:
+            query = await self._embedding(key)
+            if query is not None:
+                with self._lock:
+                    candidates = [(k, v) for k, v in self._language(lang).items() if v[2] is not None]
+                    if candidates:
+                        matrix = normalize_rows(np.stack([v[2] for _, v in candidates]))
+                        scores = matrix @ normalize_rows(query[None, :])[0]
+                        best = int(np.argmax(scores))
+                        if scores[best] >= self.similarity_threshold:
+                            self.semantic_hits += 1
+                            return candidates[best][1][1]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    async def put(self, lang: str, question: str, answer: str):
+        key = normalize_question(question)
+        embedding = await self._embedding(key)
+        with self._lock:
+            entries = self._language(lang)
+            entries[key] = (time.monotonic() + self.ttl, answer, embedding)
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def invalidate(self, lang: str = None):
+        with self._lock:
+            if lang is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(lang, None)
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            lookups = hits + self.misses
+            return {
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "entries": {lang: len(entries) for lang, entries in self._entries.items()},
+            }
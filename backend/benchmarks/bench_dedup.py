@@ -0,0 +1,91 @@
+"""
+Near-duplicate elimination vs. retrieval quality on the fixture query set in
+fixtures/dedup_queries.json. Every passage is stored the way the scraper
+leaves it: once as scraped, once more from a repeated URL, once wrapped in
+site boilerplate and once lightly edited. Reports how far dedup.py shrinks
+the corpus and hit@k / MRR / distinct passages in the top k before and
+after, using the local hashed TF-IDF embeddings (no network needed).
+
+    cd backend && python -m benchmarks.bench_dedup --k 3
+"""
+import argparse
+import json
+import os
+
+from llama_index import Document
+
+from dedup import DEDUP_THRESHOLD, dedupe_documents
+from embedding_providers import HashingTfidfProvider
+from retrieval import ExactSearch, normalize
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "dedup_queries.json")
+HEADER = "Skip to main content Sign in Subscribe Tutorials Docs Community"
+FOOTER = "Was this page helpful? Cookie settings Privacy policy Terms of use"
+
+
+def load_fixture(path=FIXTURE):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def light_edit(text):
+    words = text.split()
+    for i in (len(words) // 3, 2 * len(words) // 3):
+        words.insert(i, "really")
+    return " ".join(words)
+
+
+def make_corpus(passages):
+    documents = []
+    for passage_id, text in passages.items():
+        variants = [text, text, f"{HEADER} {text} {FOOTER}", light_edit(text)]
+        for n, variant in enumerate(variants):
+            documents.append(Document(text=variant, metadata={"file_name": f"{passage_id}_{n}.txt",
+                                                               "passage": passage_id}))
+    return documents
+
+
+def evaluate(documents, queries, provider, k):
+    search = ExactSearch(normalize(provider.embed([doc.text for doc in documents])))
+    hits = reciprocal_ranks = distinct = 0.0
+    for item in queries:
+        rows, _ = search.search(provider.embed([item["query"]])[0], k)
+        ranked = [documents[row].metadata["passage"] for row in rows]
+        if item["passage"] in ranked:
+            hits += 1
+            reciprocal_ranks += 1 / (ranked.index(item["passage"]) + 1)
+        distinct += len(set(ranked))
+    n = len(queries)
+    return {"chunks": len(documents), f"hit@{k}": round(hits / n, 4), "mrr": round(reciprocal_ranks / n, 4),
+            f"distinct@{k}": round(distinct / n, 2)}
+
+
+def run(k=3, threshold=DEDUP_THRESHOLD, fixture=FIXTURE):
+    data = load_fixture(fixture)
+    documents = make_corpus(data["passages"])
+    provider = HashingTfidfProvider().fit(doc.text for doc in documents)
+    kept, report = dedupe_documents(documents, threshold)
+    return {
+        "dedup": report,
+        "passages_kept": len({doc.metadata["passage"] for doc in kept}),
+        "passages": len(data["passages"]),
+        "before": evaluate(documents, data["queries"], provider, k),
+        "after": evaluate(kept, data["queries"], provider, k),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=DEDUP_THRESHOLD)
+    args = parser.parse_args()
+
+    result = run(args.k, args.threshold)
+    print(f"dedup: {result['dedup']}")
+    print(f"passages kept: {result['passages_kept']}/{result['passages']}")
+    for name in ("before", "after"):
+        print(f"{name:>6}: {result[name]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Descriptive-answer scoring with the local hashed TF-IDF provider vs. OpenAI
+embeddings on a fixture set of (reference, answer) pairs: embedding latency
+and, when OPENAI_API_KEY is set, agreement of the per-answer points.
+
+    cd backend && python -m benchmarks.bench_embeddings --repeat 200
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from embedding_providers import HashingTfidfProvider, OpenAIEmbeddingProvider
+from scoring import descriptive_points
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "answer_pairs.json")
+
+
+def load_pairs(path=FIXTURES):
+    with open(path) as f:
+        return [(item["reference"], item["answer"]) for item in json.load(f)]
+
+
+def points(provider, pairs):
+    vectors = provider.embed([text for pair in pairs for text in pair])
+    return descriptive_points(vectors[0::2], vectors[1::2])
+
+
+def ranks(values):
+    return np.argsort(np.argsort(values)).astype(np.float64)
+
+
+def agreement(a, b):
+    pearson = float(np.corrcoef(a, b)[0, 1])
+    spearman = float(np.corrcoef(ranks(a), ranks(b))[0, 1])
+    # Pairs come as (good, bad) answers to the same reference: does each provider rank them alike?
+    order = float(np.mean(np.sign(a[0::2] - a[1::2]) == np.sign(b[0::2] - b[1::2])))
+    return pearson, spearman, order
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fixtures", default=FIXTURES)
+    parser.add_argument("--repeat", type=int, default=100, help="times the fixture set is embedded for timing")
+    parser.add_argument("--dim", type=int, default=4096)
+    args = parser.parse_args()
+
+    pairs = load_pairs(args.fixtures)
+    texts = [text for pair in pairs for text in pair]
+    local = HashingTfidfProvider(dim=args.dim).fit([reference for reference, _ in pairs])
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        local.embed(texts)
+    local_ms = (time.perf_counter() - start) / args.repeat * 1000
+    local_points = points(local, pairs)
+    print(f"local   {len(texts)} texts: {local_ms:8.2f} ms/batch ({local_ms / len(texts):.3f} ms/text)")
+
+    if not os.getenv("OPENAI_API_KEY"):
+        print("OPENAI_API_KEY not set; skipping OpenAI latency and agreement")
+        return
+
+    remote = OpenAIEmbeddingProvider()
+    start = time.perf_counter()
+    remote_points = points(remote, pairs)
+    remote_ms = (time.perf_counter() - start) * 1000
+    print(f"openai  {len(texts)} texts: {remote_ms:8.2f} ms/batch ({remote_ms / len(texts):.3f} ms/text)")
+
+    pearson, spearman, order = agreement(local_points, remote_points)
+    print(f"agreement: pearson {pearson:.3f}  spearman {spearman:.3f}  good>bad order {order:.0%}")
+    print(f"mean points: local {local_points.mean():.2f}  openai {remote_points.mean():.2f}")
+
+
+if __name__ == "__main__":
+    main()
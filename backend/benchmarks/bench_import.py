@@ -0,0 +1,96 @@
+"""
+Cold import time of the API module, to catch start-up regressions.
+
+Imports ``--module`` (default: main) in fresh interpreters with
+``python -X importtime`` and reports the median import time, the slowest
+direct imports and which of the heavy dependencies that should load
+lazily (llama_index, openai, nltk) were pulled in anyway. ``--max-seconds``
+makes it exit non-zero over budget, for CI.
+
+    cd backend && python -m benchmarks.bench_import --runs 5 --max-seconds 1.5
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_MODULES = ("llama_index", "openai", "nltk")
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def import_once(module: str) -> dict:
+    """Import ``module`` in a new interpreter; cumulative microseconds per module, by nesting depth."""
+    probe = f"import sys, json, {module}; print(json.dumps(sorted(sys.modules)))"
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "sk-bench"),
+                   QUESTION_BANK_PATH=os.path.join(tmp, "question_bank.db"))
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], cwd=BACKEND, env=env,
+                                capture_output=True, text=True, check=True)
+    timings = []
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            timings.append((match.group(4), int(match.group(2)), len(match.group(3)) // 2))
+    modules = json.loads(result.stdout.splitlines()[-1])
+    return {"timings": timings, "modules": modules}
+
+
+def direct_imports(timings, module: str):
+    """(microseconds, name) of the modules that ``module`` itself imported first."""
+    children = []
+    for name, us, depth in timings:
+        # -X importtime prints children (one level deeper) before their parent
+        if depth == 0:
+            if name == module:
+                return children
+            children = []
+        elif depth == 1:
+            children.append((us, name))
+    return []
+
+
+def measure(module: str = "main", runs: int = 3, top: int = 10) -> dict:
+    samples = [import_once(module) for _ in range(runs)]
+    totals = [next(us for name, us, _ in s["timings"] if name == module) / 1e6 for s in samples]
+    last = samples[-1]
+    direct = sorted(direct_imports(last["timings"], module), reverse=True)[:top]
+    return {
+        "module": module,
+        "runs": runs,
+        "median_seconds": round(statistics.median(totals), 4),
+        "max_seconds": round(max(totals), 4),
+        "slowest_imports": [{"module": name, "ms": round(us / 1000, 1)} for us, name in direct],
+        "lazy_modules_loaded": [name for name in LAZY_MODULES if name in last["modules"]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--max-seconds", type=float, help="exit with status 1 if the median is above this")
+    parser.add_argument("--json", help="also write the report to this file, for comparing runs")
+    args = parser.parse_args()
+
+    report = measure(args.module, args.runs, args.top)
+    print(f"import {report['module']}: median {report['median_seconds']:.3f}s, "
+          f"max {report['max_seconds']:.3f}s over {report['runs']} runs")
+    for item in report["slowest_imports"]:
+        print(f"  {item['ms']:>8.1f} ms  {item['module']}")
+    if report["lazy_modules_loaded"]:
+        print(f"loaded at import time but should be lazy: {', '.join(report['lazy_modules_loaded'])}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    over_budget = args.max_seconds is not None and report["median_seconds"] > args.max_seconds
+    sys.exit(1 if over_budget or report["lazy_modules_loaded"] else 0)
+
+
+if __name__ == "__main__":
+    main()
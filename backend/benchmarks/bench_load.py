@@ -0,0 +1,151 @@
+"""
+Offline load test of full interview flows against a local fake OpenAI server.
+
+Each flow runs /start -> /evaluate for every level, then /final_result, with
+``--concurrency`` flows in flight. The app runs in-process (ASGI) and talks
+to benchmarks/fake_openai.py over real HTTP through its pooled OpenAI
+clients. Reports p50/p95/p99 latency and throughput per endpoint.
+
+    cd backend && python -m benchmarks.bench_load --flows 200 --concurrency 20 --latency 0.3
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from collections import defaultdict
+
+import httpx
+import numpy as np
+
+from benchmarks.fake_openai import FakeOpenAIServer
+
+LEVELS = ("easy", "medium", "hard")
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, name, request):
+        start = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - start)
+        if response.status_code != 200:
+            self.errors[name] += 1
+            return None
+        return response.json()
+
+    def report(self, elapsed: float, flows: int) -> dict:
+        endpoints = {}
+        for name in sorted(set(self.latencies) | set(self.errors)):
+            values = np.array(self.latencies[name]) * 1000
+            endpoints[name] = {
+                "requests": len(values),
+                "errors": self.errors[name],
+                "p50_ms": round(float(np.percentile(values, 50)), 2) if len(values) else None,
+                "p95_ms": round(float(np.percentile(values, 95)), 2) if len(values) else None,
+                "p99_ms": round(float(np.percentile(values, 99)), 2) if len(values) else None,
+                "rps": round(len(values) / elapsed, 2),
+            }
+        return {"flows": flows, "seconds": round(elapsed, 3), "flows_per_second": round(flows / elapsed, 2),
+                "endpoints": endpoints}
+
+
+def make_answers(questions, flow_id: int, level: str, rng: random.Random) -> list:
+    answers = []
+    for q in questions:
+        if q["type"] == "mcq":
+            options = list(q["options"].values()) if isinstance(q["options"], dict) else q["options"]
+            choice = q["correct_answer"] if rng.random() < 0.7 else rng.choice(options)
+        else:
+            # Distinct per flow, so embedding caches don't hide the embedding calls
+            choice = f"Flow {flow_id} {level} answer to {q['id']}: closures keep their enclosing scope."
+        answers.append({"id": q["id"], "type": q["type"], "user_answer": choice})
+    return answers
+
+
+async def run_flow(client, stats: LoadStats, flow_id: int, domain: str, levels, rng: random.Random):
+    session_ids = {}
+    for level in levels:
+        started = await stats.call("/start", client.post("/start", json={"domain": domain, "level": level}))
+        if started is None:
+            return
+        session_ids[level] = started["session_id"]
+        answers = make_answers(started["questions"], flow_id, level, rng)
+        payload = {"session_id": started["session_id"], "answers": answers}
+        if await stats.call("/evaluate", client.post("/evaluate", json=payload)) is None:
+            return
+    params = {f"{level}_id": session_id for level, session_id in session_ids.items()}
+    await stats.call("/final_result", client.get("/final_result", params=params))
+
+
+async def run_load(client, flows: int, concurrency: int, domain: str = "python", levels=LEVELS,
+                   seed: int = 0) -> dict:
+    stats = LoadStats()
+    rng = random.Random(seed)
+    pending = iter(range(flows))
+
+    async def worker():
+        for flow_id in pending:
+            await run_flow(client, stats, flow_id, domain, levels, rng)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return stats.report(time.perf_counter() - start, flows)
+
+
+def format_report(report: dict) -> str:
+    lines = [f"{report['flows']} flows in {report['seconds']}s ({report['flows_per_second']} flows/s)",
+             f"{'endpoint':<14} {'requests':>8} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8}"]
+    for name, s in report["endpoints"].items():
+        lines.append(f"{name:<14} {s['requests']:>8} {s['errors']:>6} {s['p50_ms'] or 0:>9.1f} "
+                     f"{s['p95_ms'] or 0:>9.1f} {s['p99_ms'] or 0:>9.1f} {s['rps']:>8.1f}")
+    return "\n".join(lines)
+
+
+async def run_against_app(app, flows, concurrency, **kwargs) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        return await run_load(client, flows, concurrency, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--flows", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.3, help="fake chat completion latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    parser.add_argument("--domain", default="python")
+    parser.add_argument("--levels", default=",".join(LEVELS))
+    parser.add_argument("--json", help="also write the report to this file, for comparing runs")
+    args = parser.parse_args()
+
+    with FakeOpenAIServer(latency=args.latency, jitter=args.jitter,
+                          embedding_latency=args.embedding_latency) as fake:
+        os.environ["OPENAI_BASE_URL"] = fake.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+        from main import app  # after OPENAI_BASE_URL is set; the OpenAI clients are created lazily
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+
+        report = asyncio.run(run_against_app(app, args.flows, args.concurrency, domain=args.domain,
+                                             levels=args.levels.split(",")))
+        report["fake_openai_requests"] = dict(fake.app.state.requests)
+
+    print(format_report(report))
+    print(f"fake OpenAI requests: {report['fake_openai_requests']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Report rendering: the previous f-string + ``+=`` implementation vs. the
+compiled templates in report_templates.py, uncached and through the
+per-session render cache, for reports with growing numbers of answers.
+
+    cd backend && python -m benchmarks.bench_report --answers 10 100 500 1000
+"""
+import argparse
+import time
+
+from report_templates import REPORT_CSS, ReportRenderer, render_report
+
+
+def legacy_questions_html(user_answers):
+    questions_html = ""
+    for index, answer in enumerate(user_answers):
+        status_icon = "✅" if answer.get('answered_within_time', False) else "⏰"
+        time_taken = answer.get('time_taken', 0)
+        questions_html += f"""
+        <div class="question-block">
+            <div class="question-header">
+                {status_icon} Question {index + 1} ({answer.get('type', 'Unknown').upper()})
+            </div>
+            <div class="answer">
+                <strong>Answer:</strong> {answer.get('user_answer', 'No answer provided')}
+            </div>
+            <div class="metrics">
+                <span>⏱️ Time Taken: {time_taken:.1f}s</span>
+                <span>{'🕐 Within Time Limit' if answer.get('answered_within_time', False) else '⚠️ Time Exceeded'}</span>
+            </div>
+        </div>
+        """
+    return questions_html
+
+
+def legacy_report(evaluation_result, user_answers, domain, timestamp):
+    # Same shape as before: the whole page (CSS included) rebuilt as one f-string per call
+    return f"""
+    <html><head><style>{REPORT_CSS}</style></head><body>
+    <p>{domain}</p><p>{timestamp}</p><p>{evaluation_result.get('score', 0):.1f}/100</p>
+    <span class="status-badge {'status-passed' if evaluation_result.get('result') == 'Passed' else 'status-failed'}">
+    {evaluation_result.get('result', 'Failed')}</span>
+    {legacy_questions_html(user_answers)}
+    </body></html>
+    """
+
+
+def make_answers(n):
+    return [
+        {
+            "type": "descriptive" if i % 2 else "mcq",
+            "user_answer": f"Answer {i} with <code>generics</code> & some longer explanation text " * 3,
+            "time_taken": 12.5 + i % 30,
+            "answered_within_time": i % 5 != 0,
+        }
+        for i in range(n)
+    ]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--answers", type=int, nargs="+", default=[10, 100, 500, 1000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    evaluation = {"score": 72.5, "result": "Passed"}
+    print(f"{'answers':>8} {'legacy ms':>10} {'compiled ms':>12} {'cached ms':>10}")
+    for n in args.answers:
+        answers = make_answers(n)
+        renderer = ReportRenderer()
+        legacy = timed(lambda: legacy_report(evaluation, answers, "java", "2024-01-01 10:00"), args.repeat)
+        compiled = timed(lambda: render_report(evaluation, answers, "java", "2024-01-01 10:00"), args.repeat)
+        cached = timed(lambda: renderer.render(evaluation, answers, "java", "2024-01-01 10:00", session_id="s"),
+                       args.repeat)
+        print(f"{n:>8} {legacy:>10.3f} {compiled:>12.3f} {cached:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Retrieval latency and recall@k: llama_index's SimpleVectorStore scan (the
+previous /query path) vs. the built-in ExactSearch and IVFSearch engines, on
+synthetic clustered embeddings of growing size.
+
+    cd backend && python -m benchmarks.bench_retrieval --sizes 1000 10000 50000
+"""
+import argparse
+import time
+
+import numpy as np
+from llama_index.indices.query.embedding_utils import get_top_k_embeddings
+
+from retrieval import ExactSearch, IVFSearch, normalize
+
+
+def synthetic_corpus(n, dim, clusters, rng):
+    centers = rng.normal(size=(clusters, dim))
+    rows = centers[rng.integers(clusters, size=n)] + 0.5 * rng.normal(size=(n, dim))
+    return normalize(rows)
+
+
+def timed(fn, queries):
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append(fn(query))
+    return (time.perf_counter() - start) / len(queries) * 1000, results
+
+
+def recall(truth, results, k):
+    return np.mean([len(set(t) & set(r)) / k for t, r in zip(truth, results)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000, 50000])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--n-probe", type=int, default=8)
+    parser.add_argument("--llama-max-size", type=int, default=20000,
+                        help="skip the (slow) llama_index scan above this corpus size")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'rows':>8} {'engine':>8} {'ms/query':>10} {'recall@k':>9} {'build s':>8}")
+    for n in args.sizes:
+        corpus = synthetic_corpus(n, args.dim, max(8, n // 200), rng)
+        queries = corpus[rng.choice(n, size=args.queries)] + 0.05 * rng.normal(size=(args.queries, args.dim))
+        queries = normalize(queries)
+
+        exact = ExactSearch(corpus)
+        exact_ms, truth = timed(lambda q: exact.search(q, args.k)[0], queries)
+        print(f"{n:>8} {'exact':>8} {exact_ms:>10.3f} {1.0:>9.3f} {0.0:>8.2f}")
+
+        start = time.perf_counter()
+        ivf = IVFSearch(corpus, n_probe=args.n_probe)
+        build = time.perf_counter() - start
+        ivf_ms, ivf_results = timed(lambda q: ivf.search(q, args.k)[0], queries)
+        print(f"{n:>8} {'ivf':>8} {ivf_ms:>10.3f} {recall(truth, ivf_results, args.k):>9.3f} {build:>8.2f}")
+
+        if n <= args.llama_max_size:
+            embeddings = corpus.tolist()
+            ids = list(range(n))
+            sample = queries[:max(1, args.queries // 10)]
+            llama_ms, llama_results = timed(
+                lambda q: get_top_k_embeddings(q.tolist(), embeddings, similarity_top_k=args.k,
+                                               embedding_ids=ids)[1],
+                sample,
+            )
+            llama_recall = recall(truth[:len(sample)], llama_results, args.k)
+            print(f"{n:>8} {'llama':>8} {llama_ms:>10.3f} {llama_recall:>9.3f} {0.0:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Scraper clean-stage throughput on the saved HTML pages in fixtures/html:
+the previous single-threaded clean_text vs. the current one with each
+installed parser backend, and process_page fanned out over a process pool.
+
+    cd backend && python -m benchmarks.bench_scrape --copies 20 --workers 1 2 4
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bs4 import BeautifulSoup
+
+from scrape_docs import clean_text, process_page
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+
+
+def legacy_clean_text(html_text):
+    # The clean_text the scraper used before: html.parser and three full-text passes
+    soup = BeautifulSoup(html_text, "html.parser")
+    for script_or_style in soup(["script", "style", "header", "footer", "nav", "aside", "form"]):
+        script_or_style.decompose()
+    text = soup.get_text(separator="\n")
+    lines = [line.strip() for line in text.splitlines()]
+    text = "\n".join(line for line in lines if line)
+    text = re.sub(r"\n{2,}", "\n\n", text)
+    text = re.sub(r"[ \t]{2,}", " ", text)
+    return text
+
+
+def load_corpus(copies):
+    pages = []
+    for name in sorted(os.listdir(FIXTURES)):
+        with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+            pages.append(f.read())
+    return pages * copies
+
+
+def available_parsers():
+    parsers = ["html.parser"]
+    for name, module in (("lxml", "lxml"), ("html5lib", "html5lib")):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        parsers.append(name)
+    return parsers
+
+
+def throughput(label, seconds, pages):
+    mb = sum(len(page.encode("utf-8")) for page in pages) / 1e6
+    print(f"{label:<28} {seconds:>8.2f}s {len(pages) / seconds:>10.1f} {mb / seconds:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--copies", type=int, default=10, help="times to repeat the fixture pages")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    pages = load_corpus(args.copies)
+    parsers = available_parsers()
+    print(f"{len(pages)} pages, {sum(map(len, pages)) / 1e6:.1f} MB, parsers: {', '.join(parsers)}")
+    print(f"{'stage':<28} {'time':>9} {'pages/s':>10} {'MB/s':>8}")
+
+    start = time.perf_counter()
+    legacy = [legacy_clean_text(page) for page in pages]
+    throughput("legacy clean_text", time.perf_counter() - start, pages)
+
+    for name in parsers:
+        start = time.perf_counter()
+        cleaned = [clean_text(page, name) for page in pages]
+        throughput(f"clean_text ({name})", time.perf_counter() - start, pages)
+        if name == "html.parser":
+            assert cleaned == legacy, "clean_text output differs from the previous implementation"
+
+    for workers in args.workers:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            # Start the workers before timing, as a long scrape would
+            list(pool.map(process_page, pages[:workers]))
+            start = time.perf_counter()
+            list(pool.map(process_page, pages, chunksize=1))
+            throughput(f"process_page x{workers} procs", time.perf_counter() - start, pages)
+
+
+if __name__ == "__main__":
+    main()
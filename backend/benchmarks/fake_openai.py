@@ -0,0 +1,120 @@
+"""
+Local stand-in for the OpenAI API used by the load benchmarks.
+
+Serves /v1/chat/completions (plain and streamed) with a canned set of
+interview questions and /v1/embeddings with deterministic vectors (identical
+texts get identical vectors), after a configurable latency. Point the app at
+it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import socket
+import threading
+import time
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+CANNED_QUESTIONS = [
+    {"id": i + 1, "question": f"Canned MCQ {i + 1}?", "type": "mcq", "correct_answer": "a",
+     "options": ["a", "b", "c", "d"]}
+    for i in range(5)
+] + [
+    {"id": i + 6, "question": f"Canned descriptive question {i + 1}?", "type": "descriptive",
+     "correct_answer": f"Reference answer number {i + 1} about closures and scope.", "options": []}
+    for i in range(5)
+]
+
+
+def fake_embedding(text: str, dim: int) -> list:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).normal(size=dim)
+    return (vector / np.linalg.norm(vector)).astype(np.float32).tolist()
+
+
+def create_app(latency: float = 0.2, jitter: float = 0.05, embedding_latency: float = 0.05,
+               embedding_dim: int = 256, stream_chunk: int = 40, questions=CANNED_QUESTIONS) -> FastAPI:
+    app = FastAPI()
+    app.state.requests = {"chat": 0, "embeddings": 0}
+    content = "```json\n" + json.dumps(questions) + "\n```"
+    usage = {"prompt_tokens": 60, "completion_tokens": len(content) // 4, "total_tokens": 60 + len(content) // 4}
+
+    async def wait(base):
+        await asyncio.sleep(max(0.0, base + random.uniform(-jitter, jitter)))
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests["chat"] += 1
+        created = int(time.time())
+        if not body.get("stream"):
+            await wait(latency)
+            return {
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": created, "model": body["model"],
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": usage,
+            }
+
+        async def events():
+            pieces = [content[i:i + stream_chunk] for i in range(0, len(content), stream_chunk)]
+            for piece in pieces:
+                await asyncio.sleep(latency / len(pieces))
+                chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created,
+                         "model": body["model"],
+                         "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+            if body.get("stream_options", {}).get("include_usage"):
+                chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created,
+                         "model": body["model"], "choices": [], "usage": usage}
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        app.state.requests["embeddings"] += 1
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        await wait(embedding_latency)
+        tokens = sum(len(text) // 4 + 1 for text in texts)
+        return {
+            "object": "list", "model": body["model"],
+            "data": [{"object": "embedding", "index": i, "embedding": fake_embedding(text, embedding_dim)}
+                     for i, text in enumerate(texts)],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    return app
+
+
+class FakeOpenAIServer:
+    """Runs ``create_app(**options)`` with uvicorn on a free local port in a background thread."""
+
+    def __init__(self, **options):
+        self.app = create_app(**options)
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        config = uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
@@ -0,0 +1,148 @@
+"""
+Compact on-disk index format, loadable in milliseconds:
+
+    embeddings.npy  float32 (n, d) matrix of L2-normalized node embeddings, mmap-loaded
+    texts.bin       UTF-8 node texts, concatenated
+    offsets.npy     int64 (n + 1,) byte offsets of each text in texts.bin
+    nodes.json      node ids and metadata, in matrix row order
+
+Both large files are memory-mapped read-only, so every uvicorn worker on a
+host shares the same page-cache pages instead of holding its own copy.
+"""
+import argparse
+import json
+import mmap
+import os
+
+import numpy as np
+
+from retrieval import MatrixIndex
+
+FORMAT_VERSION = 1
+VECTOR_STORE_FILES = ("default__vector_store.json", "vector_store.json")
+
+
+class BinaryVectorStore:
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "nodes.json"), encoding="utf-8") as f:
+            nodes = json.load(f)
+        if nodes.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported binary index format in {path}: {nodes.get('format')}")
+        self.node_ids = nodes["node_ids"]
+        self.metadata = nodes["metadata"]
+        self.embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self._texts_file = open(os.path.join(path, "texts.bin"), "rb")
+        size = os.fstat(self._texts_file.fileno()).st_size
+        self._texts = mmap.mmap(self._texts_file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    @property
+    def dim(self) -> int:
+        return self.embeddings.shape[1]
+
+    def text(self, i: int) -> str:
+        return self._texts[int(self.offsets[i]):int(self.offsets[i + 1])].decode("utf-8")
+
+    def close(self):
+        if isinstance(self._texts, mmap.mmap):
+            self._texts.close()
+        self._texts_file.close()
+
+
+def write_binary_store(path: str, node_ids, texts, embeddings, metadata=None):
+    """Write nodes in the binary format. Embeddings are normalized so dot product == cosine."""
+    os.makedirs(path, exist_ok=True)
+    embeddings = np.asarray(embeddings, dtype=np.float32).reshape(len(node_ids), -1)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    np.save(os.path.join(path, "embeddings.npy"), embeddings / norms)
+
+    offsets = np.zeros(len(node_ids) + 1, dtype=np.int64)
+    with open(os.path.join(path, "texts.bin"), "wb") as f:
+        for i, text in enumerate(texts):
+            data = text.encode("utf-8")
+            f.write(data)
+            offsets[i + 1] = offsets[i] + len(data)
+    np.save(os.path.join(path, "offsets.npy"), offsets)
+
+    with open(os.path.join(path, "nodes.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "format": FORMAT_VERSION,
+            "node_ids": list(node_ids),
+            "metadata": list(metadata) if metadata is not None else [{} for _ in node_ids],
+        }, f)
+
+
+def _node_data(entry):
+    data = entry.get("__data__", entry)
+    # Older llama_index versions store the node as a JSON string
+    return json.loads(data) if isinstance(data, str) else data
+
+
+def convert_persist_dir(persist_dir: str, out_dir: str) -> int:
+    """
+    Convert a llama_index persist dir (docstore.json + vector store JSON) to
+    the binary format. Returns the number of nodes written.
+    """
+    for name in VECTOR_STORE_FILES:
+        vector_path = os.path.join(persist_dir, name)
+        if os.path.exists(vector_path):
+            break
+    else:
+        raise ValueError(f"No vector store with embeddings found in {persist_dir}")
+
+    with open(vector_path, encoding="utf-8") as f:
+        embedding_dict = json.load(f).get("embedding_dict", {})
+    with open(os.path.join(persist_dir, "docstore.json"), encoding="utf-8") as f:
+        docstore = json.load(f).get("docstore/data", {})
+
+    node_ids, texts, metadata, embeddings = [], [], [], []
+    for node_id, embedding in embedding_dict.items():
+        if node_id not in docstore:
+            continue
+        node = _node_data(docstore[node_id])
+        node_ids.append(node_id)
+        texts.append(node.get("text", ""))
+        metadata.append(node.get("metadata", {}))
+        embeddings.append(embedding)
+
+    if not node_ids:
+        raise ValueError(f"No embedded nodes found in {persist_dir}")
+    write_binary_store(out_dir, node_ids, texts, embeddings, metadata)
+    return len(node_ids)
+
+
+class BinaryIndex(MatrixIndex):
+    """MatrixIndex whose embeddings and texts are memory-mapped from a BinaryVectorStore."""
+
+    def __init__(self, path: str, service_context=None, similarity_top_k: int = 2, mode: str = None):
+        self.store = BinaryVectorStore(path)
+        super().__init__(
+            self.store.node_ids,
+            self.store.embeddings,
+            texts=None,
+            metadata=self.store.metadata,
+            service_context=service_context,
+            similarity_top_k=similarity_top_k,
+            mode=mode,
+        )
+
+    def text(self, i: int) -> str:
+        return self.store.text(i)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert llama_index persist dirs to the binary index format.")
+    parser.add_argument("langs", nargs="*", default=["java", "python", "javascript"])
+    parser.add_argument("--index-root", default="indexes")
+    args = parser.parse_args()
+
+    for lang in args.langs:
+        source = os.path.join(args.index_root, f"{lang}_index")
+        target = os.path.join(args.index_root, f"{lang}_bin")
+        count = convert_persist_dir(source, target)
+        print(f"Converted {count} nodes for {lang} into {target}")
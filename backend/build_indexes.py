@@ -1,22 +1,157 @@
 import os
+import argparse
 from dotenv import load_dotenv
-from llama_index import SimpleDirectoryReader, VectorStoreIndex
+from llama_index import Document, SimpleDirectoryReader, StorageContext, VectorStoreIndex, load_index_from_storage
+from binary_store import convert_persist_dir
+from dedup import DEDUP_THRESHOLD, dedupe_documents
+from shards import ShardStore, has_shards
 load_dotenv()
 
+DOCS_ROOT = "./docs"
+INDEX_ROOT = "indexes"
 
 
-def build_index_for_language(lang):
-    docs_path = f"./docs/{lang}"
+def _file_metadata(path):
+    # Only stable metadata: file dates would change every document hash on each run
+    return {"file_name": os.path.basename(path)}
+
+
+def iter_shard_documents(docs_path):
+    """Stream the chunks of a shard store as documents, reading the shards sequentially."""
+    store = ShardStore(docs_path)
+    try:
+        for record in store.iter_records():
+            # Same metadata as a <key>.txt file of the old layout, so document hashes (and with
+            # them incremental builds) carry over after `python shards.py pack`
+            yield Document(text=record["text"], metadata={"file_name": record["key"] + ".txt"})
+    finally:
+        store.close()
+
+
+def load_documents(lang, docs_root=DOCS_ROOT):
+    """
+    All chunks of ``lang`` as a list. Shards are read sequentially, but dedup, the docstore diff
+    and VectorStoreIndex.from_documents need every document, so they are held in memory.
+    """
+    docs_path = os.path.join(docs_root, lang)
+    if has_shards(docs_path):
+        return list(iter_shard_documents(docs_path))
+    # Chunks scraped before the shard format: one .txt file each
+    return SimpleDirectoryReader(docs_path, file_metadata=_file_metadata).load_data()
+
+
+def diff_documents(index, documents):
+    """
+    Match documents against the persisted docstore by content hash.
+    Returns (added documents, ref_doc_ids to remove, nodes kept).
+    """
+    docstore = index.docstore
+    existing = {}
+    for ref_doc_id in docstore.get_all_ref_doc_info() or {}:
+        existing[docstore.get_document_hash(ref_doc_id)] = ref_doc_id
+
+    incoming = {}
+    for doc in documents:
+        incoming.setdefault(doc.hash, doc)
+
+    added = [doc for doc_hash, doc in incoming.items() if doc_hash not in existing]
+    removed = [ref_doc_id for doc_hash, ref_doc_id in existing.items() if doc_hash not in incoming]
+    kept_nodes = sum(
+        len(docstore.get_ref_doc_info(ref_doc_id).node_ids)
+        for doc_hash, ref_doc_id in existing.items()
+        if doc_hash in incoming
+    )
+    return added, removed, kept_nodes
+
+
+def update_index(index, documents, dry_run=False):
+    """Embed and insert only new or changed documents and drop removed ones."""
+    added, removed, kept_nodes = diff_documents(index, documents)
+    node_parser = index.service_context.node_parser
+    added_nodes = len(node_parser.get_nodes_from_documents(added)) if added else 0
+
+    report = {
+        "documents": len(documents),
+        "added_documents": len(added),
+        "removed_documents": len(removed),
+        "embeddings_needed": added_nodes,
+        "embeddings_saved": kept_nodes,
+        "dry_run": dry_run,
+    }
+    if dry_run:
+        return report
+
+    for ref_doc_id in removed:
+        index.delete_ref_doc(ref_doc_id, delete_from_docstore=True)
+    for doc in added:
+        index.insert(doc)
+    return report
+
+
+def build_index_for_language(lang, incremental=False, dry_run=False, binary=False, service_context=None,
+                             docs_root=DOCS_ROOT, index_root=INDEX_ROOT, dedup_threshold=DEDUP_THRESHOLD):
+    docs_path = os.path.join(docs_root, lang)
+    persist_dir = os.path.join(index_root, f"{lang}_index")
     print(f"Building index for {lang} from {docs_path}")
 
-    documents = SimpleDirectoryReader(docs_path).load_data()
-    index = VectorStoreIndex.from_documents(documents)
+    documents = load_documents(lang, docs_root)
+    dedup_report = None
+    if dedup_threshold:
+        node_parser = service_context.node_parser if service_context is not None else None
+        documents, dedup_report = dedupe_documents(documents, dedup_threshold, node_parser)
+        print(f"{lang} dedup: {dedup_report}")
 
-    os.makedirs("indexes", exist_ok=True)
-    index.storage_context.persist(persist_dir=f"indexes/{lang}_index")
+    index = None
+    if incremental:
+        try:
+            storage_context = StorageContext.from_defaults(persist_dir=persist_dir)
+            index = load_index_from_storage(storage_context, service_context=service_context)
+        except Exception as e:
+            print(f"No usable index at {persist_dir} ({e}); doing a full build")
+
+    if index is not None:
+        report = update_index(index, documents, dry_run=dry_run)
+    else:
+        report = {
+            "documents": len(documents),
+            "added_documents": len(documents),
+            "removed_documents": 0,
+            "embeddings_needed": None,
+            "embeddings_saved": 0,
+            "dry_run": dry_run,
+        }
+        if not dry_run:
+            index = VectorStoreIndex.from_documents(documents, service_context=service_context)
+            report["embeddings_needed"] = len(index.index_struct.nodes_dict)
+
+    report["dedup"] = dedup_report
+    print(f"{lang}: {report}")
+    if dry_run:
+        return report
+
+    os.makedirs(index_root, exist_ok=True)
+    index.storage_context.persist(persist_dir=persist_dir)
+    binary_dir = os.path.join(index_root, f"{lang}_bin")
+    # Refresh an existing binary copy too, otherwise /query would keep serving the stale one
+    if binary or os.path.isdir(binary_dir):
+        convert_persist_dir(persist_dir, binary_dir)
 
     print(f"Saved index for {lang}")
+    return report
 
 if __name__ == "__main__":
-    for lang in ["java", "python", "javascript"]:
-        build_index_for_language(lang)
+    parser = argparse.ArgumentParser(description="Build the per-language vector indexes.")
+    parser.add_argument("langs", nargs="*", default=["java", "python", "javascript"])
+    parser.add_argument("--incremental", action="store_true",
+                        help="only embed documents that are new or changed since the persisted index")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="report what an incremental build would do without embedding or saving")
+    parser.add_argument("--binary", action="store_true",
+                        help="also write the mmap-loadable binary format used by /query")
+    parser.add_argument("--dedup-threshold", type=float, default=DEDUP_THRESHOLD,
+                        help="drop chunks at least this similar to an earlier chunk (0 keeps every chunk)")
+    args = parser.parse_args()
+
+    for lang in args.langs:
+        build_index_for_language(lang, incremental=args.incremental or args.dry_run, dry_run=args.dry_run,
+                                 binary=args.binary, dedup_threshold=args.dedup_threshold)
@@ -0,0 +1,182 @@
+"""
+Duplicate elimination for scraped documentation.
+
+``canonical_url`` collapses spelling variants of the same page so the
+scraper fetches it once. ``dedupe_documents`` drops chunks that are exact or
+near duplicates of an earlier chunk of the same language, using MinHash
+signatures over word shingles and LSH banding to find candidates, before
+build_indexes embeds them.
+
+    python dedup.py java python    # report what deduplication would drop from docs/<lang>
+"""
+import argparse
+import hashlib
+import os
+import re
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.75))
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+LSH_BANDS = 32
+_PRIME = (1 << 31) - 1
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_TRACKING_PARAMS = re.compile(r"^(utm_\w+|gclid|fbclid|ref)$")
+_WORD_RE = re.compile(r"\w+")
+
+
+def canonical_url(url: str) -> str:
+    """
+    Lowercased scheme and host without ``www.`` or a default port, no
+    fragment, tracking parameters or trailing slash, and sorted query.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower().removeprefix("www.")
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip("/") or "/"
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if not _TRACKING_PARAMS.match(k)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def unique_urls(urls):
+    """Yield (position, url) for the first occurrence of each canonical URL."""
+    seen = set()
+    for i, url in enumerate(urls):
+        key = canonical_url(url)
+        if key not in seen:
+            seen.add(key)
+            yield i, url
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE):
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures from ``num_perm`` universal hash functions over crc32 shingle hashes."""
+
+    def __init__(self, num_perm: int = NUM_PERM, shingle_size: int = SHINGLE_SIZE, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        grams = shingles(text, self.shingle_size)
+        if not grams:
+            return np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+        # a < 2**31 and hashes < 2**31, so a * h + b stays within uint64
+        return ((np.outer(self.a, hashes % _PRIME) + self.b[:, None]) % _PRIME).min(axis=1)
+
+
+class NearDuplicateIndex:
+    """
+    LSH index of the chunks kept so far. ``check`` returns (key, similarity,
+    exact) for an earlier chunk that is identical up to whitespace or whose
+    estimated Jaccard similarity is at least ``threshold``, or indexes the
+    chunk and returns None.
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, num_perm: int = NUM_PERM, bands: int = LSH_BANDS,
+                 shingle_size: int = SHINGLE_SIZE):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self._buckets = [{} for _ in range(bands)]
+        self._signatures = {}
+        self._exact = {}
+
+    def check(self, key, text: str):
+        digest = hashlib.sha256(" ".join(text.split()).encode("utf-8")).digest()
+        if digest in self._exact:
+            return self._exact[digest], 1.0, True
+
+        signature = self.hasher.signature(text)
+        band_keys = [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+        candidates = set()
+        for buckets, band_key in zip(self._buckets, band_keys):
+            candidates.update(buckets.get(band_key, ()))
+        best, best_similarity = None, 0.0
+        for candidate in candidates:
+            similarity = float(np.mean(self._signatures[candidate] == signature))
+            if similarity > best_similarity:
+                best, best_similarity = candidate, similarity
+        if best is not None and best_similarity >= self.threshold:
+            return best, best_similarity, False
+
+        self._exact[digest] = key
+        self._signatures[key] = signature
+        for buckets, band_key in zip(self._buckets, band_keys):
+            buckets.setdefault(band_key, []).append(key)
+        return None
+
+
+def _document_key(doc):
+    return doc.metadata.get("file_name") or doc.doc_id
+
+
+def dedupe_documents(documents, threshold: float = DEDUP_THRESHOLD, node_parser=None):
+    """
+    Drop documents that duplicate an earlier one (in file name order, so the
+    same copy is kept on every run). Returns (kept documents, report).
+    ``embeddings_saved`` counts the nodes ``node_parser`` would have made of
+    the dropped documents, or one per document without a parser.
+    """
+    index = NearDuplicateIndex(threshold)
+    dropped = set()
+    exact = 0
+    for i in sorted(range(len(documents)), key=lambda i: _document_key(documents[i])):
+        match = index.check(i, documents[i].text)
+        if match is not None:
+            dropped.add(i)
+            exact += match[2]
+
+    kept = [doc for i, doc in enumerate(documents) if i not in dropped]
+    removed = [documents[i] for i in sorted(dropped)]
+    if node_parser is not None and removed:
+        embeddings_saved = len(node_parser.get_nodes_from_documents(removed))
+    else:
+        embeddings_saved = len(removed)
+    report = {
+        "chunks": len(documents),
+        "kept": len(kept),
+        "exact_duplicates": exact,
+        "near_duplicates": len(removed) - exact,
+        "bytes_saved": sum(len(doc.text.encode("utf-8")) for doc in removed),
+        "embeddings_saved": embeddings_saved,
+    }
+    return kept, report
+
+
+def main():
+    from build_indexes import DOCS_ROOT, load_documents
+    from scrape_docs import URLS
+
+    parser = argparse.ArgumentParser(description="Report duplicate URLs and chunks in the scraped docs.")
+    parser.add_argument("langs", nargs="*", default=["java", "python", "javascript"])
+    parser.add_argument("--threshold", type=float, default=DEDUP_THRESHOLD)
+    args = parser.parse_args()
+
+    for lang in args.langs:
+        urls = URLS.get(lang, [])
+        print(f"{lang}: {len(urls) - len(list(unique_urls(urls)))} duplicate URLs of {len(urls)}")
+        if os.path.isdir(os.path.join(DOCS_ROOT, lang)):
+            _, report = dedupe_documents(load_documents(lang), args.threshold)
+            print(f"{lang}: {report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+Background delivery for /send-email.
+
+Messages are queued and sent by a few worker tasks over a small pool of
+persistent, authenticated SMTP connections, so a burst of reports reuses the
+TLS handshake and login instead of repeating them per message. Each worker
+takes up to ``batch_size`` queued messages and sends them over one
+connection. Transient failures are retried with exponential backoff; the
+outcome of every message can be looked up by its id. On shutdown the queue
+is drained for up to ``drain_timeout`` seconds, and whatever is left is
+marked failed and logged rather than dropped silently.
+"""
+import asyncio
+import logging
+import queue
+import random
+import smtplib
+import time
+import uuid
+from collections import OrderedDict
+
+from starlette.concurrency import run_in_threadpool
+
+from metrics import span
+
+logger = logging.getLogger(__name__)
+
+
+def build_message(sender: str, to_email: str, subject: str, html_content: str, cc: list = None, bcc: list = None):
+    """Return (MIME message, envelope recipients). Bcc addresses are only in the envelope."""
+    # The MIME classes are only needed once a message is actually sent
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    msg = MIMEMultipart('alternative')
+    msg['From'] = sender
+    msg['To'] = to_email
+    msg['Subject'] = subject
+    if cc:
+        msg['Cc'] = ', '.join(cc)
+    msg.attach(MIMEText(html_content, 'html', 'utf-8'))
+    return msg, [to_email] + list(cc or []) + list(bcc or [])
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether a send is worth retrying: dropped connections and 4xx replies."""
+    if isinstance(error, (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)):
+        return True
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    code = getattr(error, "smtp_code", None)
+    if code is not None:
+        return 400 <= code < 500
+    return isinstance(error, OSError)
+
+
+class SMTPConnectionPool:
+    """
+    Up to ``size`` connected, logged-in smtplib.SMTP clients. A connection is
+    probed with NOOP when it has been idle for ``idle_check`` seconds, and
+    replaced if the server dropped it.
+    """
+
+    def __init__(self, host: str, port: int, username: str = None, password: str = None, size: int = 2,
+                 starttls: bool = True, timeout: float = 30.0, idle_check: float = 30.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.starttls = starttls
+        self.timeout = timeout
+        self.idle_check = idle_check
+        self._idle = queue.LifoQueue()
+        self._slots = queue.Queue()
+        for _ in range(size):
+            self._slots.put(None)
+        self.connections_opened = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            conn.starttls()
+        if self.username:
+            conn.login(self.username, self.password)
+        self.connections_opened += 1
+        return conn
+
+    def acquire(self) -> smtplib.SMTP:
+        self._slots.get()
+        try:
+            while True:
+                try:
+                    conn, released_at = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                if time.monotonic() - released_at < self.idle_check:
+                    return conn
+                try:
+                    if conn.noop()[0] == 250:
+                        return conn
+                except smtplib.SMTPException:
+                    pass
+                self._close(conn)
+        except BaseException:
+            self._slots.put(None)
+            raise
+
+    def release(self, conn: smtplib.SMTP, broken: bool = False):
+        if broken:
+            self._close(conn)
+        else:
+            self._idle.put((conn, time.monotonic()))
+        self._slots.put(None)
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.quit()
+        except Exception:
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(conn)
+
+    def send(self, sender: str, recipients: list, text: str):
+        """Send one message on a pooled connection (blocking)."""
+        conn = self.acquire()
+        try:
+            with span("smtp_send"):
+                result = conn.sendmail(sender, recipients, text)
+        except Exception as e:
+            self.release(conn, broken=isinstance(e, (smtplib.SMTPServerDisconnected, OSError)))
+            raise
+        self.release(conn)
+        return result
+
+
+class _Message:
+    __slots__ = ("id", "sender", "recipients", "text", "to", "status", "attempts", "error",
+                 "queued_at", "sent_at")
+
+    def __init__(self, sender, recipients, text, to):
+        self.id = uuid.uuid4().hex
+        self.sender = sender
+        self.recipients = recipients
+        self.text = text
+        self.to = to
+        self.status = "queued"
+        self.attempts = 0
+        self.error = None
+        self.queued_at = time.time()
+        self.sent_at = None
+
+    def info(self) -> dict:
+        return {
+            "message_id": self.id,
+            "to": self.to,
+            "status": self.status,
+            "attempts": self.attempts,
+            "error": self.error,
+            "queued_at": self.queued_at,
+            "sent_at": self.sent_at,
+        }
+
+
+class EmailQueue:
+    """
+    asyncio queue of outgoing messages drained by ``workers`` tasks. Failed
+    transient sends are re-queued after ``backoff * 2**(attempt - 1)`` seconds
+    (with jitter) until ``max_attempts``. The last ``max_tracked`` message
+    statuses are kept for ``status``. ``stop`` sends what is still pending
+    (retries right away) for up to ``drain_timeout`` seconds.
+    """
+
+    def __init__(self, pool: SMTPConnectionPool, sender: str = None, workers: int = 2, batch_size: int = 20,
+                 max_attempts: int = 4, backoff: float = 2.0, max_tracked: int = 10000,
+                 drain_timeout: float = 20.0):
+        self.pool = pool
+        self.sender = sender
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_tracked = max_tracked
+        self.drain_timeout = drain_timeout
+        self._queue = None
+        self._tasks = []
+        self._retries = {}
+        self._messages = OrderedDict()
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.batches = 0
+
+    def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def _pending(self):
+        return [m for m in self._messages.values() if m.status in ("queued", "sending", "retrying")]
+
+    async def stop(self):
+        if self._tasks:
+            # /send-email already reported these as accepted: send them before exiting
+            for handle, message in list(self._retries.values()):
+                handle.cancel()
+                self._requeue(message)
+            try:
+                await asyncio.wait_for(self.join(), self.drain_timeout)
+            except asyncio.TimeoutError:
+                pass
+        for handle, _ in self._retries.values():
+            handle.cancel()
+        self._retries.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for message in self._pending():
+            message.status = "failed"
+            message.error = f"not sent before shutdown ({message.error or 'still queued'})"
+            self.failed += 1
+            logger.error("Email %s to %s dropped at shutdown: %s", message.id, message.to, message.error)
+        await run_in_threadpool(self.pool.close)
+
+    async def join(self):
+        """Wait until every queued message (including pending retries) is sent or failed."""
+        while self._pending():
+            await asyncio.sleep(0.01)
+
+    def submit(self, to_email: str, subject: str, html_content: str, cc: list = None, bcc: list = None) -> str:
+        if not self.sender:
+            raise ValueError("Email credentials not found in environment variables")
+        if not self._tasks:
+            self.start()
+        msg, recipients = build_message(self.sender, to_email, subject, html_content, cc, bcc)
+        message = _Message(self.sender, recipients, msg.as_string(), to_email)
+        self._messages[message.id] = message
+        while len(self._messages) > self.max_tracked:
+            self._messages.popitem(last=False)
+        self._queue.put_nowait(message)
+        return message.id
+
+    def status(self, message_id: str):
+        message = self._messages.get(message_id)
+        return message.info() if message is not None else None
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "batches": self.batches,
+            "connections_opened": self.pool.connections_opened,
+        }
+
+    def _send_batch(self, batch):
+        """Send a batch over one pooled connection; returns an error (or None) per message."""
+        errors = []
+        conn = self.pool.acquire()
+        broken = False
+        try:
+            for message in batch:
+                if broken:
+                    errors.append(smtplib.SMTPServerDisconnected("connection lost earlier in batch"))
+                    continue
+                try:
+                    with span("smtp_send"):
+                        conn.sendmail(message.sender, message.recipients, message.text)
+                    errors.append(None)
+                except Exception as e:
+                    broken = isinstance(e, (smtplib.SMTPServerDisconnected, OSError))
+                    errors.append(e)
+        finally:
+            self.pool.release(conn, broken=broken)
+        return errors
+
+    def _requeue(self, message):
+        self._retries.pop(message.id, None)
+        self._queue.put_nowait(message)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            for message in batch:
+                message.status = "sending"
+                message.attempts += 1
+
+            try:
+                errors = await run_in_threadpool(self._send_batch, batch)
+            except Exception as e:
+                # Could not connect or log in: the whole batch failed
+                errors = [e] * len(batch)
+            self.batches += 1
+
+            for message, error in zip(batch, errors):
+                if error is None:
+                    message.status = "sent"
+                    message.error = None
+                    message.sent_at = time.time()
+                    self.sent += 1
+                elif is_transient(error) and message.attempts < self.max_attempts:
+                    message.status = "retrying"
+                    message.error = str(error)
+                    self.retried += 1
+                    delay = self.backoff * 2 ** (message.attempts - 1) * random.uniform(0.8, 1.2)
+                    self._retries[message.id] = (loop.call_later(delay, self._requeue, message), message)
+                else:
+                    message.status = "failed"
+                    message.error = str(error)
+                    self.failed += 1
+                    logger.error("Email %s to %s failed: %s", message.id, message.to, error)
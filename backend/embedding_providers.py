@@ -0,0 +1,158 @@
+"""
+Embedding backends used for scoring descriptive answers.
+
+``openai`` calls the embeddings API; ``local`` is a CPU-only hashed TF-IDF
+model that needs no network, so /evaluate keeps working offline and without a
+round trip per submission. Pick one per deployment with EMBEDDING_PROVIDER.
+Vectors from different providers are not comparable, so each provider has a
+``name`` that the embedding cache keys on.
+"""
+import asyncio
+import hashlib
+import math
+import os
+import re
+import zlib
+
+import numpy as np
+
+from metrics import record_usage, span
+from openai_clients import get_async_client, get_client
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 256))
+LOCAL_EMBEDDING_DIM = int(os.getenv("LOCAL_EMBEDDING_DIM", 4096))
+
+
+class EmbeddingProvider:
+    name = None
+
+    def embed(self, texts):
+        """Embed ``texts`` and return one float32 vector per text, in order."""
+        raise NotImplementedError
+
+    async def aembed(self, texts):
+        raise NotImplementedError
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    def __init__(self, model: str = EMBEDDING_MODEL, batch_size: int = EMBEDDING_BATCH_SIZE):
+        self.name = model
+        self.model = model
+        self.batch_size = batch_size
+
+    @staticmethod
+    def _vectors(data):
+        return [np.asarray(item.embedding, dtype=np.float32) for item in sorted(data, key=lambda d: d.index)]
+
+    def embed(self, texts):
+        # All texts in a single request
+        with span("embedding"):
+            response = get_client().embeddings.create(input=list(texts), model=self.model)
+        record_usage(self.model, getattr(response, "usage", None))
+        return self._vectors(response.data)
+
+    async def aembed(self, texts):
+        # Batches of batch_size requested concurrently
+        texts = list(texts)
+        client = get_async_client()
+        with span("embedding"):
+            responses = await asyncio.gather(*(
+                client.embeddings.create(input=texts[i:i + self.batch_size], model=self.model)
+                for i in range(0, len(texts), self.batch_size)
+            ))
+        for response in responses:
+            record_usage(self.model, getattr(response, "usage", None))
+        return [vector for response in responses for vector in self._vectors(response.data)]
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+
+
+class HashingTfidfProvider(EmbeddingProvider):
+    """
+    Hashed TF-IDF vectors: word unigrams, word bigrams and character trigrams
+    hashed (signed) into ``dim`` buckets, with sublinear term frequency and
+    optional IDF weights learned with ``fit``. Rows are L2-normalized.
+    """
+
+    def __init__(self, dim: int = LOCAL_EMBEDDING_DIM, batch_size: int = EMBEDDING_BATCH_SIZE, idf=None):
+        self.dim = dim
+        self.batch_size = batch_size
+        self.idf = None
+        self.name = f"hashing-tfidf-v1-{dim}"
+        if idf is not None:
+            self._set_idf(np.asarray(idf, dtype=np.float32))
+
+    def _set_idf(self, idf):
+        self.idf = idf
+        # Different IDF weights give different vectors, so they must not share cache entries
+        digest = hashlib.sha256(idf.tobytes()).hexdigest()[:12]
+        self.name = f"hashing-tfidf-v1-{self.dim}-{digest}"
+
+    @staticmethod
+    def features(text: str):
+        words = _TOKEN_RE.findall(text.lower())
+        grams = list(words)
+        grams += [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f"#{word}#"
+            grams += [padded[i:i + 3] for i in range(len(padded) - 2)]
+        return grams
+
+    def _buckets(self, text: str):
+        counts = {}
+        for gram in self.features(text):
+            h = zlib.crc32(gram.encode("utf-8"))
+            bucket = (h >> 1) % self.dim
+            sign = 1.0 if h & 1 else -1.0
+            counts[bucket] = counts.get(bucket, 0.0) + sign
+        return counts
+
+    def fit(self, corpus):
+        """Learn smoothed IDF weights from ``corpus`` (e.g. reference answers)."""
+        df = np.zeros(self.dim, dtype=np.float32)
+        n = 0
+        for text in corpus:
+            df[list(self._buckets(text))] += 1
+            n += 1
+        self._set_idf((np.log((1 + n) / (1 + df)) + 1).astype(np.float32))
+        return self
+
+    def embed(self, texts):
+        with span("embedding_local"):
+            return self._embed(texts)
+
+    def _embed(self, texts):
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for bucket, count in self._buckets(text).items():
+                if count:
+                    matrix[row, bucket] = math.copysign(1.0 + math.log(abs(count)), count)
+        if self.idf is not None:
+            matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return list(matrix / norms)
+
+    async def aembed(self, texts):
+        # CPU-bound: run batches in the default thread pool so the event loop stays free
+        texts = list(texts)
+        loop = asyncio.get_running_loop()
+        with span("embedding_local"):
+            batches = await asyncio.gather(*(
+                loop.run_in_executor(None, self._embed, texts[i:i + self.batch_size])
+                for i in range(0, len(texts), self.batch_size)
+            ))
+        return [vector for batch in batches for vector in batch]
+
+
+def create_embedding_provider() -> EmbeddingProvider:
+    """Provider selected by EMBEDDING_PROVIDER (openai | local)."""
+    kind = os.getenv("EMBEDDING_PROVIDER", "openai").lower()
+    if kind == "openai":
+        return OpenAIEmbeddingProvider()
+    if kind == "local":
+        idf_path = os.getenv("LOCAL_EMBEDDING_IDF_PATH")
+        return HashingTfidfProvider(idf=np.load(idf_path) if idf_path else None)
+    raise ValueError(f"Unknown EMBEDDING_PROVIDER: {kind}")
@@ -1,11 +1,240 @@
-from llama_index import StorageContext, load_index_from_storage
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
 from fastapi import HTTPException
 
-def load_index(lang: str):
-    folder_path = f"indexes/{lang}_index"
+from metrics import span
+
+logger = logging.getLogger(__name__)
+
+INDEX_ROOT = "indexes"
+DEFAULT_LANGS = ("java", "python", "javascript")
+# "builtin" retrieves with retrieval.py; "llama" keeps llama_index's SimpleVectorStore scan
+RETRIEVAL_ENGINE = os.getenv("RETRIEVAL_ENGINE", "builtin")
+
+
+def index_dir(lang: str) -> str:
+    return os.path.join(INDEX_ROOT, f"{lang}_index")
+
+
+def binary_index_dir(lang: str) -> str:
+    return os.path.join(INDEX_ROOT, f"{lang}_bin")
+
+
+def load_index(lang: str, engine: str = None):
+    # llama_index (and retrieval/binary_store, which build on it) take seconds to
+    # import; defer them to the first index load so the API process starts quickly
+    from llama_index import StorageContext, load_index_from_storage
+
+    from binary_store import BinaryIndex
+    from retrieval import MatrixIndex
+
+    engine = engine or RETRIEVAL_ENGINE
+    # Prefer the mmap-loaded binary format (see binary_store.py) when it has been built
+    binary_path = binary_index_dir(lang)
+    if engine == "builtin" and os.path.isdir(binary_path):
+        try:
+            return BinaryIndex(binary_path)
+        except Exception as e:
+            logger.warning("Could not open binary index %s, falling back to JSON: %s", binary_path, e)
+
+    folder_path = index_dir(lang)
     try:
         storage_context = StorageContext.from_defaults(persist_dir=folder_path)
         index = load_index_from_storage(storage_context)
-        return index
     except Exception:
         raise HTTPException(status_code=404, detail=f"Index for '{lang}' not found.")
+    if engine == "builtin":
+        return MatrixIndex.from_vector_store_index(index)
+    return index
+
+
+def dir_signature(path: str):
+    """Cheap fingerprint of a persist dir: (name, mtime, size) of every file."""
+    try:
+        names = sorted(os.listdir(path))
+    except FileNotFoundError:
+        return None
+    signature = []
+    for name in names:
+        try:
+            st = os.stat(os.path.join(path, name))
+        except FileNotFoundError:
+            continue
+        signature.append((name, st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+
+def index_signature(lang: str):
+    return dir_signature(binary_index_dir(lang)), dir_signature(index_dir(lang))
+
+
+class _Entry:
+    __slots__ = ("index", "query_engine", "streaming_engine", "signature", "checked_at", "loaded_at",
+                 "load_seconds")
+
+    def __init__(self, index, query_engine, signature, load_seconds):
+        now = time.monotonic()
+        self.index = index
+        self.query_engine = query_engine
+        # Built on first /query/stream request for this index
+        self.streaming_engine = None
+        self.signature = signature
+        self.checked_at = now
+        self.loaded_at = time.time()
+        self.load_seconds = load_seconds
+
+
+class IndexCache:
+    """
+    Process-wide registry of loaded indexes and their query engines.
+
+    The default languages are pinned once loaded; any other language lives in a
+    small LRU of ``max_extra`` entries. Every ``check_interval`` seconds a hit
+    re-stats the persist dir and reloads the index if the files changed.
+    Callbacks in ``reload_listeners`` are called with the language whenever an
+    index is reloaded or invalidated, so derived caches can be dropped.
+    """
+
+    def __init__(self, pinned=DEFAULT_LANGS, max_extra: int = 2, check_interval: float = 5.0,
+                 loader=load_index, signature=None):
+        self.pinned = set(pinned)
+        self.max_extra = max_extra
+        self.check_interval = check_interval
+        self._loader = loader
+        self._signature = signature or index_signature
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self.reload_listeners = []
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.evictions = 0
+        self.load_seconds_total = 0.0
+
+    def _load_lock(self, lang: str) -> threading.Lock:
+        with self._lock:
+            return self._load_locks.setdefault(lang, threading.Lock())
+
+    def _fresh_entry(self, lang: str):
+        with self._lock:
+            entry = self._entries.get(lang)
+            if entry is None:
+                return None
+            now = time.monotonic()
+            if now - entry.checked_at < self.check_interval:
+                self._entries.move_to_end(lang)
+                return entry
+        signature = self._signature(lang)
+        with self._lock:
+            if signature != entry.signature:
+                return None
+            entry.checked_at = now
+            self._entries.move_to_end(lang)
+            return entry
+
+    def _load(self, lang: str) -> _Entry:
+        signature = self._signature(lang)
+        start = time.perf_counter()
+        with span("index_load"):
+            index = self._loader(lang)
+            query_engine = index.as_query_engine()
+        elapsed = time.perf_counter() - start
+        logger.info("Loaded index for %s in %.2fs", lang, elapsed)
+        return _Entry(index, query_engine, signature, elapsed)
+
+    def _notify(self, lang):
+        for listener in self.reload_listeners:
+            listener(lang)
+
+    def _store(self, lang: str, entry: _Entry):
+        with self._lock:
+            reloaded = lang in self._entries
+            if reloaded:
+                self.reloads += 1
+            self._entries[lang] = entry
+            self._entries.move_to_end(lang)
+            self.load_seconds_total += entry.load_seconds
+            extra = [k for k in self._entries if k not in self.pinned]
+            while len(extra) > self.max_extra:
+                evicted = extra.pop(0)
+                del self._entries[evicted]
+                self.evictions += 1
+                logger.info("Evicted index for %s", evicted)
+        if reloaded:
+            self._notify(lang)
+
+    def get_entry(self, lang: str) -> _Entry:
+        entry = self._fresh_entry(lang)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        with self._load_lock(lang):
+            # Another request may have finished loading while we waited.
+            entry = self._fresh_entry(lang)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            entry = self._load(lang)
+            self._store(lang, entry)
+            return entry
+
+    def get_index(self, lang: str):
+        return self.get_entry(lang).index
+
+    def get_query_engine(self, lang: str, streaming: bool = False):
+        entry = self.get_entry(lang)
+        if not streaming:
+            return entry.query_engine
+        if entry.streaming_engine is None:
+            entry.streaming_engine = entry.index.as_query_engine(streaming=True)
+        return entry.streaming_engine
+
+    def warm(self, langs=None):
+        """
+        Load the given (default: pinned) languages. Every language is tried;
+        raises RuntimeError naming the ones that failed, so the warm-up step
+        (and /readyz) does not report indexes that never loaded.
+        """
+        failed = {}
+        for lang in langs or sorted(self.pinned):
+            try:
+                self.get_entry(lang)
+            except Exception as e:
+                failed[lang] = getattr(e, "detail", e)
+                logger.warning("Could not warm index for %s: %s", lang, failed[lang])
+        if failed:
+            raise RuntimeError("Could not load indexes: " + ", ".join(f"{lang} ({e})" for lang, e in failed.items()))
+
+    def invalidate(self, lang: str = None):
+        with self._lock:
+            if lang is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(lang, None)
+        self._notify(lang)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "reloads": self.reloads,
+                "evictions": self.evictions,
+                "load_seconds_total": round(self.load_seconds_total, 4),
+                "indexes": {
+                    lang: {
+                        "pinned": lang in self.pinned,
+                        "loaded_at": entry.loaded_at,
+                        "load_seconds": round(entry.load_seconds, 4),
+                    }
+                    for lang, entry in self._entries.items()
+                },
+            }
@@ -1,25 +1,56 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from models import QueryRequest, DomainRequest, AnswerSubmission
-from qa_engine import QAGenerator
-from llama_index_helper import load_index
-import openai
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from models import (QueryRequest, DomainRequest, AnswerSubmission, BatchAnswerSubmission, InterviewRequest,
+                    InterviewAnswers)
+from qa_engine import QAGenerator, interview_passed
+from llama_index_helper import IndexCache
+from answer_cache import AnswerCache
+from query_stream import stream_answer
+from utils import aget_embeddings
+from openai_clients import get_async_client, get_client
+from warmup import Warmup
+from question_bank import QuestionBank
+from session_store import create_session_store
 import os
+import json
 from dotenv import load_dotenv
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
+from email_queue import EmailQueue, SMTPConnectionPool, build_message
+from report_templates import ReportRenderer, render_questions
+from metrics import MetricsMiddleware, registry, span
 from pydantic import BaseModel, EmailStr
+from typing import List, Optional
 import logging
 
-SESSIONS = {}
 load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
+
+# Configure logging; LOG_LEVEL=DEBUG also logs raw LLM responses
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
-qa = QAGenerator()
+# Opens QUESTION_BANK_PATH on first use, not at import
+question_bank = QuestionBank(
+    target_size=int(os.getenv("QUESTION_BANK_TARGET", 40)),
+    low_watermark=int(os.getenv("QUESTION_BANK_LOW_WATERMARK", 20)),
+    refill_after=int(os.getenv("QUESTION_BANK_REFILL_AFTER", 3)),
+)
+qa = QAGenerator(bank=question_bank, sessions=create_session_store())
+index_cache = IndexCache()
+answer_cache = AnswerCache(
+    embed=aget_embeddings,
+    max_entries=int(os.getenv("QUERY_CACHE_SIZE", 1000)),
+    ttl=float(os.getenv("QUERY_CACHE_TTL", 3600)),
+    similarity_threshold=float(os.getenv("QUERY_CACHE_SIMILARITY", 0.95)),
+)
+# A rebuilt index makes its cached answers stale
+index_cache.reload_listeners.append(answer_cache.invalidate)
+# Run in the background after startup; /readyz reports when they are done
+warmup = Warmup()
+warmup.add("openai_clients", lambda: (get_client(), get_async_client()))
+warmup.add("indexes", index_cache.warm)
 
 app.add_middleware(
     CORSMiddleware,
@@ -28,49 +59,176 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.on_event("startup")
+def start_warmup():
+    # Not awaited: the server accepts connections (and answers /healthz) while indexes load
+    warmup.start()
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    report = warmup.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+@app.on_event("startup")
+async def start_question_bank():
+    # e.g. QUESTION_BANK_WARM="java:easy,python:medium" pre-fills those pools
+    warm_keys = [
+        tuple(item.split(":", 1))
+        for item in os.getenv("QUESTION_BANK_WARM", "").split(",")
+        if ":" in item
+    ]
+    question_bank.start(qa.request_questions, warm_keys=warm_keys)
+
+@app.on_event("shutdown")
+async def stop_question_bank():
+    warmup.stop()
+    await question_bank.stop()
+    question_bank.close()
 
 @app.post("/query")
 async def query_index(data: QueryRequest):
-    index = load_index(data.lang)
-    query_engine = index.as_query_engine()
+    # Index loads and llama_index queries are blocking; keep them off the event loop
+    # Resolve the engine first: it notices rebuilt indexes and invalidates their answers
+    query_engine = await run_in_threadpool(index_cache.get_query_engine, data.lang)
+    cached = await answer_cache.get(data.lang, data.question)
+    if cached is not None:
+        return {"answer": cached}
     try:
-        result = query_engine.query(data.question)
-        return {"answer": result.response}
+        with span("index_query"):
+            result = await run_in_threadpool(query_engine.query, data.question)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Query failed: {e}")
+    await answer_cache.put(data.lang, data.question, result.response)
+    return {"answer": result.response}
+
+@app.post("/query/stream")
+async def query_index_stream(data: QueryRequest, request: Request):
+    """
+    NDJSON stream of {"type": "sources"} with the retrieved node ids, then one
+    {"type": "token"} line per chunk as the LLM produces it, then {"type": "done"}.
+    Generation is stopped if the client disconnects.
+    """
+    query_engine = await run_in_threadpool(index_cache.get_query_engine, data.lang, True)
+    cached = await answer_cache.get(data.lang, data.question)
+    if cached is not None:
+        async def cached_events():
+            yield json.dumps({"type": "sources", "node_ids": [], "scores": [], "cached": True}) + "\n"
+            yield json.dumps({"type": "token", "text": cached}) + "\n"
+            yield json.dumps({"type": "done"}) + "\n"
+
+        return StreamingResponse(cached_events(), media_type="application/x-ndjson")
+
+    try:
+        # Retrieval runs here; the answer tokens are produced lazily while streaming
+        response = await run_in_threadpool(query_engine.query, data.question)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Query failed: {e}")
+
+    async def remember(answer):
+        await answer_cache.put(data.lang, data.question, answer)
+
+    async def events():
+        async for event in stream_answer(response, request.is_disconnected, on_complete=remember):
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.get("/index_cache/stats")
+async def index_cache_stats():
+    return index_cache.stats()
+
+@app.get("/query_cache/stats")
+async def query_cache_stats():
+    return answer_cache.stats()
+
+@app.get("/question_bank/stats")
+async def question_bank_stats():
+    return question_bank.stats()
 
 @app.post("/start")
 async def start_interview(request: DomainRequest):
-    output = qa.generate_questions(request.domain, request.level)
+    output = await qa.generate_questions(request.domain, request.level)
     return {"questions": output["questions"], "session_id": output["session_id"]}
 
+@app.post("/start/stream")
+async def start_interview_stream(request: DomainRequest):
+    """
+    NDJSON stream of {"type": "session"}, then one {"type": "question"} line per
+    question as the LLM produces it, then {"type": "done"}.
+    """
+    async def events():
+        async for event in qa.stream_questions(request.domain, request.level):
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
 
 @app.post("/evaluate")
 async def evaluate_answers(request: AnswerSubmission):
-    print("Received session_id:", request.session_id)
-    print("Received answers:", request.answers)
+    logger.debug("Evaluating session %s with %d answers", request.session_id, len(request.answers))
 
     try:
-        result = qa.evaluate_answers(request.session_id, request.answers)
+        result = await qa.evaluate_answers(request.session_id, request.answers)
         return result
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Evaluation of session %s failed", request.session_id)
         raise HTTPException(status_code=400, detail=f"Evaluation failed: {e}")
     
 
+@app.post("/evaluate/batch")
+async def evaluate_batch(request: BatchAnswerSubmission):
+    try:
+        results = await qa.evaluate_many(request.submissions)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Evaluation failed: {e}")
+    return {"results": results}
+
+@app.post("/interview/start")
+async def start_adaptive_interview(request: InterviewRequest):
+    """
+    Adaptive interview: starts at easy and returns its questions. The next
+    level is generated in the background while they are answered.
+    """
+    return await qa.start_interview(request.domain)
+
+@app.post("/interview/answer")
+async def answer_adaptive_interview(request: InterviewAnswers):
+    """
+    Score the current level. Returns the next level's questions, or, once the
+    verdict is decided, the final report with the LLM calls and tokens saved.
+    """
+    return await qa.submit_interview_level(request.interview_id, request.answers)
+
+@app.get("/interview/{interview_id}")
+async def adaptive_interview_report(interview_id: str):
+    return qa.interview_report(interview_id)
+
 @app.get("/final_result")
 async def final_result(easy_id: str, medium_id: str = None, hard_id: str = None):
+    def session_score(session_id):
+        if not session_id:
+            return 0
+        session = qa.sessions.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        return session["score"] or 0
+
     try:
-        easy_score = SESSIONS[easy_id]["score"]
-        medium_score = SESSIONS[medium_id]["score"] if medium_id else 0
-        hard_score = SESSIONS[hard_id]["score"] if hard_id else 0
-
-        passed = (
-            (easy_score >= 80) or 
-            (medium_score >= 60) or 
-            (hard_score >= 40)
-        )
+        easy_score = session_score(easy_id)
+        medium_score = session_score(medium_id)
+        hard_score = session_score(hard_id)
+
+        passed = interview_passed({"easy": easy_score, "medium": medium_score, "hard": hard_score})
 
         return {
             "passed": passed,
@@ -91,12 +249,38 @@ SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
 SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
 EMAIL_ADDRESS = os.getenv("EMAIL_ADDRESS")
 EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() != "false"
+
+smtp_pool = SMTPConnectionPool(
+    SMTP_SERVER, SMTP_PORT, EMAIL_ADDRESS, EMAIL_PASSWORD,
+    size=int(os.getenv("SMTP_POOL_SIZE", 2)), starttls=SMTP_STARTTLS,
+)
+report_renderer = ReportRenderer(max_entries=int(os.getenv("REPORT_CACHE_SIZE", 256)))
+email_queue = EmailQueue(
+    smtp_pool, sender=EMAIL_ADDRESS if EMAIL_PASSWORD else None,
+    batch_size=int(os.getenv("EMAIL_BATCH_SIZE", 20)),
+    max_attempts=int(os.getenv("EMAIL_MAX_ATTEMPTS", 4)),
+    drain_timeout=float(os.getenv("EMAIL_DRAIN_TIMEOUT", 20)),
+)
+
+@app.on_event("shutdown")
+async def stop_email_queue():
+    await email_queue.stop()
 
 # Pydantic models for email
+class ReportRequest(BaseModel):
+    evaluation_result: dict
+    user_answers: List[dict] = []
+    domain: str
+    timestamp: str
+    session_id: Optional[str] = None
+
 class EmailRequest(BaseModel):
     to: EmailStr
     subject: str
-    html: str
+    html: str = ""
+    # Rendered server-side (and cached per session) when html is empty
+    report: Optional[ReportRequest] = None
     cc: list[EmailStr] = []
     bcc: list[EmailStr] = []
 
@@ -105,9 +289,6 @@ class EmailResponse(BaseModel):
     message: str
     message_id: str = None
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
 
 # Email sending function
 def send_email_smtp(to_email: str, subject: str, html_content: str, cc: list = None, bcc: list = None):
@@ -119,37 +300,9 @@ def send_email_smtp(to_email: str, subject: str, html_content: str, cc: list = N
         if not EMAIL_ADDRESS or not EMAIL_PASSWORD:
             raise ValueError("Email credentials not found in environment variables")
         
-        # Create message
-        msg = MIMEMultipart('alternative')
-        msg['From'] = EMAIL_ADDRESS
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        
-        # Add CC and BCC if provided
-        if cc:
-            msg['Cc'] = ', '.join(cc)
-        if bcc:
-            msg['Bcc'] = ', '.join(bcc)
-        
-        # Create HTML part
-        html_part = MIMEText(html_content, 'html', 'utf-8')
-        msg.attach(html_part)
-        
-        # Create SMTP session
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()  # Enable TLS encryption
-        server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-        
-        # Send email
-        recipients = [to_email]
-        if cc:
-            recipients.extend(cc)
-        if bcc:
-            recipients.extend(bcc)
-            
-        text = msg.as_string()
-        result = server.sendmail(EMAIL_ADDRESS, recipients, text)
-        server.quit()
+        msg, recipients = build_message(EMAIL_ADDRESS, to_email, subject, html_content, cc, bcc)
+        # Reuses a pooled, already authenticated connection
+        result = smtp_pool.send(EMAIL_ADDRESS, recipients, msg.as_string())
         
         logger.info(f"Email sent successfully to {to_email}")
         return {"success": True, "message": "Email sent successfully", "result": result}
@@ -182,22 +335,32 @@ async def send_email_endpoint(email_request: EmailRequest):
     """
     try:
         # Validate input
-        if not email_request.to or not email_request.subject or not email_request.html:
+        html_content = email_request.html
+        if not html_content and email_request.report:
+            report = email_request.report
+            html_content = create_interview_report_template(
+                report.evaluation_result, report.user_answers, report.domain, report.timestamp,
+                session_id=report.session_id,
+            )
+        if not email_request.to or not email_request.subject or not html_content:
             raise HTTPException(status_code=400, detail="Missing required email fields")
         
-        # Send email
-        result = send_email_smtp(
-            to_email=email_request.to,
-            subject=email_request.subject,
-            html_content=email_request.html,
-            cc=email_request.cc if email_request.cc else None,
-            bcc=email_request.bcc if email_request.bcc else None
-        )
+        # Queued for background delivery; poll /send-email/{message_id} for the outcome
+        try:
+            message_id = email_queue.submit(
+                to_email=email_request.to,
+                subject=email_request.subject,
+                html_content=html_content,
+                cc=email_request.cc if email_request.cc else None,
+                bcc=email_request.bcc if email_request.bcc else None
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
         
         return EmailResponse(
             success=True,
-            message="Email sent successfully",
-            message_id=str(result.get("result", ""))
+            message="Email queued for delivery",
+            message_id=message_id
         )
         
     except HTTPException:
@@ -208,6 +371,17 @@ async def send_email_endpoint(email_request: EmailRequest):
         logger.error(f"Error in send_email_endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error while sending email")
 
+@app.get("/send-email/{message_id}")
+async def email_status(message_id: str):
+    status = email_queue.status(message_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown message id")
+    return status
+
+@app.get("/email_queue/stats")
+async def email_queue_stats():
+    return email_queue.stats()
+
 # Optional: Test email endpoint for debugging
 @app.post("/test-email")
 async def test_email():
@@ -227,7 +401,8 @@ async def test_email():
         </div>
         """
         
-        result = send_email_smtp(
+        result = await run_in_threadpool(
+            send_email_smtp,
             to_email=EMAIL_ADDRESS,  # Send test email to yourself
             subject="AI Interviewer - SMTP Test",
             html_content=test_html
@@ -239,187 +414,24 @@ async def test_email():
         logger.error(f"Test email failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Test email failed: {str(e)}")
 
-# Optional: Email template for better formatting
-def create_interview_report_template(evaluation_result, user_answers, domain, timestamp):
+# Report HTML is rendered by report_templates.py (compiled once, escaped, cached per session)
+def create_interview_report_template(evaluation_result, user_answers, domain, timestamp, session_id=None):
     """
     Create a professional HTML email template for interview reports
     """
-    template = f"""
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Interview Evaluation Report</title>
-        <style>
-            body {{
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                line-height: 1.6;
-                color: #333;
-                max-width: 800px;
-                margin: 0 auto;
-                padding: 20px;
-                background-color: #f5f5f5;
-            }}
-            .container {{
-                background: white;
-                border-radius: 10px;
-                box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-                overflow: hidden;
-            }}
-            .header {{
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                padding: 30px;
-                text-align: center;
-            }}
-            .header h1 {{
-                margin: 0;
-                font-size: 28px;
-                font-weight: 300;
-            }}
-            .content {{
-                padding: 30px;
-            }}
-            .info-grid {{
-                display: grid;
-                grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-                gap: 20px;
-                margin: 20px 0;
-            }}
-            .info-card {{
-                background: #f8f9fa;
-                padding: 20px;
-                border-radius: 8px;
-                border-left: 4px solid #667eea;
-            }}
-            .info-card h3 {{
-                margin: 0 0 10px 0;
-                color: #667eea;
-                font-size: 16px;
-            }}
-            .info-card p {{
-                margin: 0;
-                font-size: 18px;
-                font-weight: 600;
-            }}
-            .question-block {{
-                background: #f8f9fa;
-                margin: 15px 0;
-                padding: 20px;
-                border-radius: 8px;
-                border: 1px solid #e9ecef;
-            }}
-            .question-header {{
-                font-weight: 600;
-                color: #495057;
-                margin-bottom: 10px;
-            }}
-            .answer {{
-                background: white;
-                padding: 15px;
-                border-radius: 6px;
-                margin: 10px 0;
-                border-left: 3px solid #28a745;
-            }}
-            .metrics {{
-                display: flex;
-                justify-content: space-between;
-                font-size: 12px;
-                color: #6c757d;
-                margin-top: 10px;
-            }}
-            .footer {{
-                background: #f8f9fa;
-                padding: 20px 30px;
-                text-align: center;
-                color: #6c757d;
-                font-size: 14px;
-            }}
-            .status-badge {{
-                display: inline-block;
-                padding: 6px 12px;
-                border-radius: 20px;
-                font-size: 14px;
-                font-weight: 600;
-                text-transform: uppercase;
-            }}
-            .status-passed {{
-                background: #d4edda;
-                color: #155724;
-            }}
-            .status-failed {{
-                background: #f8d7da;
-                color: #721c24;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>🎯 Interview Evaluation Report</h1>
-                <p>AI-Powered Technical Assessment</p>
-            </div>
-            
-            <div class="content">
-                <div class="info-grid">
-                    <div class="info-card">
-                        <h3>📚 Domain</h3>
-                        <p>{domain}</p>
-                    </div>
-                    <div class="info-card">
-                        <h3>📅 Date & Time</h3>
-                        <p>{timestamp}</p>
-                    </div>
-                    <div class="info-card">
-                        <h3>🎯 Final Score</h3>
-                        <p>{evaluation_result.get('score', 0):.1f}/100</p>
-                    </div>
-                    <div class="info-card">
-                        <h3>✅ Result</h3>
-                        <p>
-                            <span class="status-badge {'status-passed' if evaluation_result.get('result') == 'Passed' else 'status-failed'}">
-                                {evaluation_result.get('result', 'Failed')}
-                            </span>
-                        </p>
-                    </div>
-                </div>
-                
-                <h2>📝 Detailed Responses</h2>
-                <div class="questions-section">
-                    {generate_questions_html(user_answers)}
-                </div>
-            </div>
-            
-            <div class="footer">
-                <p>🤖 This report was generated automatically by the AI Interviewer System</p>
-                <p>For questions or concerns, please contact the HR department.</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    return template
+    return report_renderer.render(evaluation_result, user_answers, domain, timestamp, session_id=session_id)
 
 def generate_questions_html(user_answers):
     """Generate HTML for user answers section"""
-    questions_html = ""
-    for index, answer in enumerate(user_answers):
-        status_icon = "✅" if answer.get('answered_within_time', False) else "⏰"
-        time_taken = answer.get('time_taken', 0)
-        
-        questions_html += f"""
-        <div class="question-block">
-            <div class="question-header">
-                {status_icon} Question {index + 1} ({answer.get('type', 'Unknown').upper()})
-            </div>
-            <div class="answer">
-                <strong>Answer:</strong> {answer.get('user_answer', 'No answer provided')}
-            </div>
-            <div class="metrics">
-                <span>⏱️ Time Taken: {time_taken:.1f}s</span>
-                <span>{'🕐 Within Time Limit' if answer.get('answered_within_time', False) else '⚠️ Time Exceeded'}</span>
-            </div>
-        </div>
-        """
-    return questions_html
\ No newline at end of file
+    return render_questions(user_answers)
+
+@app.post("/report/preview", response_class=HTMLResponse)
+async def preview_report(report: ReportRequest):
+    return create_interview_report_template(
+        report.evaluation_result, report.user_answers, report.domain, report.timestamp,
+        session_id=report.session_id,
+    )
+
+@app.get("/report/stats")
+async def report_stats():
+    return report_renderer.stats()
@@ -0,0 +1,205 @@
+"""
+In-process metrics in the Prometheus text format, served on /metrics.
+
+Hot paths are wrapped in ``span("name")`` blocks, which record their duration
+in the ``interviewer_span_seconds`` histogram. ``record_usage`` counts LLM and
+embedding tokens and their estimated cost per endpoint. MetricsMiddleware
+sets the current endpoint for each request and records request latency. An
+observation is one ``perf_counter`` call, a bisect and a few additions under
+a lock, so this stays on in production.
+"""
+import bisect
+import contextvars
+import os
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# USD per 1K tokens: (prompt, completion)
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "text-embedding-ada-002": (0.0001, 0.0),
+}
+
+# Scope of the request that LLM/embedding usage is attributed to; None outside requests
+current_request = contextvars.ContextVar("current_request", default=None)
+
+
+def current_endpoint() -> str:
+    """
+    Route template of the current request ("/send-email/{message_id}", not the
+    raw path, so ids do not create a series each), "unmatched" before or
+    without routing, and "background" outside requests.
+    """
+    scope = current_request.get()
+    if scope is None:
+        return "background"
+    return getattr(scope.get("route"), "path_format", None) or "unmatched"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels.get(n, "") for n in self.labelnames), 0.0)
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(labels.get(n, "") for n in self.labelnames))
+        return series[2] if series else 0
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                labels = _labels(self.labelnames, key, ['le="%s"' % le])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {count}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.metrics for line in metric.collect()) + "\n"
+
+
+registry = Registry()
+
+SPAN_SECONDS = registry.register(Histogram(
+    "interviewer_span_seconds", "Duration of instrumented hot-path operations.", ("span", "endpoint")))
+REQUEST_SECONDS = registry.register(Histogram(
+    "interviewer_request_seconds", "HTTP request latency by route.", ("method", "route", "status")))
+TOKENS = registry.register(Counter(
+    "interviewer_tokens_total", "LLM and embedding tokens used.", ("endpoint", "model", "kind")))
+COST = registry.register(Counter(
+    "interviewer_cost_usd_total", "Estimated OpenAI cost in USD.", ("endpoint", "model")))
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() != "false"
+
+
+class span:
+    """Time a block into interviewer_span_seconds: ``with span("llm_completion"): ...``"""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if METRICS_ENABLED:
+            SPAN_SECONDS.observe(time.perf_counter() - self.start, span=self.name, endpoint=current_endpoint())
+        return False
+
+
+def record_usage(model: str, usage):
+    """Count the tokens of an OpenAI ``usage`` object (or dict) and their estimated cost."""
+    if usage is None or not METRICS_ENABLED:
+        return
+    get = usage.get if isinstance(usage, dict) else lambda k, d=None: getattr(usage, k, d)
+    prompt = get("prompt_tokens", 0) or 0
+    completion = get("completion_tokens", 0) or 0
+    endpoint = current_endpoint()
+    TOKENS.inc(prompt, endpoint=endpoint, model=model, kind="prompt")
+    if completion:
+        TOKENS.inc(completion, endpoint=endpoint, model=model, kind="completion")
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    COST.inc((prompt * prompt_price + completion * completion_price) / 1000, endpoint=endpoint, model=model)
+
+
+class MetricsMiddleware:
+    """ASGI middleware: sets current_request and records request latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            return await self.app(scope, receive, send)
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        # The router adds the matched route to this same scope before the endpoint runs
+        token = current_request.set(scope)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            route = getattr(scope.get("route"), "path_format", None) or "unmatched"
+            REQUEST_SECONDS.observe(time.perf_counter() - start, method=scope["method"], route=route,
+                                    status=status["code"])
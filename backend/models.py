@@ -25,4 +25,14 @@ class AnswerItem(BaseModel):
 
 class AnswerSubmission(BaseModel):
     session_id: str
-    answers: List[AnswerItem]
\ No newline at end of file
+    answers: List[AnswerItem]
+
+class BatchAnswerSubmission(BaseModel):
+    submissions: List[AnswerSubmission]
+
+class InterviewRequest(BaseModel):
+    domain: str
+
+class InterviewAnswers(BaseModel):
+    interview_id: str
+    answers: List[AnswerItem]
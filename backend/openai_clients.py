@@ -0,0 +1,53 @@
+import os
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# One pooled HTTP client per process keeps TLS connections to the API warm
+# across requests instead of reconnecting for every completion/embedding.
+# The openai package takes about a second to import, so it is only imported
+# when the first client is built (at the latest by the startup warm-up).
+MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", 100))
+MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", 20))
+
+_client = None
+_async_client = None
+_lock = threading.Lock()
+
+
+def _pool_limits():
+    import httpx
+
+    return httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE)
+
+
+def get_client():
+    """The process-wide openai.OpenAI client."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                from openai import DefaultHttpxClient, OpenAI
+
+                _client = OpenAI(
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    http_client=DefaultHttpxClient(limits=_pool_limits()),
+                )
+    return _client
+
+
+def get_async_client():
+    """The process-wide openai.AsyncOpenAI client."""
+    global _async_client
+    if _async_client is None:
+        with _lock:
+            if _async_client is None:
+                from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+                _async_client = AsyncOpenAI(
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    http_client=DefaultAsyncHttpxClient(limits=_pool_limits()),
+                )
+    return _async_client
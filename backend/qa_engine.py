@@ -1,90 +1,230 @@
-import re
-import json
-import uuid
+import asyncio
+import logging
 import os
-from dotenv import load_dotenv
-from openai import OpenAI
+import uuid
+from collections import OrderedDict
+import numpy as np
 from fastapi import HTTPException
-from utils import get_embedding
-from sklearn.metrics.pairwise import cosine_similarity
-from models import AnswerItem
+from openai_clients import get_async_client
+from question_parser import OPTION_KEYS, IncrementalArrayParser, parse_questions, validate_question
+from utils import aget_embeddings
+from scoring import descriptive_points, score_sessions
+from models import AnswerItem, AnswerSubmission
+from session_store import InMemorySessionStore, compact_questions
+from metrics import record_usage, span
 from typing import List
 
-load_dotenv()
+logger = logging.getLogger(__name__)
+
+QUESTIONS_PER_SESSION = 10
+# Extra completions asking only for the questions a defective response was missing
+QUESTION_TOPUP_ROUNDS = int(os.getenv("QUESTION_TOPUP_ROUNDS", 2))
+
+LEVELS = ("easy", "medium", "hard")
+# A candidate passes the interview by reaching any one of these level scores
+PASS_THRESHOLDS = {"easy": 80, "medium": 60, "hard": 40}
+# Generate the next level of an adaptive interview while the current one is answered
+ADAPTIVE_PREFETCH = os.getenv("ADAPTIVE_PREFETCH", "true").lower() != "false"
+# Speculative sets kept for interviews that were abandoned mid-way
+ADAPTIVE_MAX_PENDING = int(os.getenv("ADAPTIVE_MAX_PENDING", 1000))
+
+
+def interview_passed(scores: dict) -> bool:
+    return any((scores.get(level) or 0) >= threshold for level, threshold in PASS_THRESHOLDS.items())
+
+
+def _usage():
+    return {"llm_calls": 0, "tokens": 0}
+
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-SESSIONS = {}
+def _question_key(q: dict) -> str:
+    return q["question"].strip().lower()
 
 class QAGenerator:
-    def __init__(self):
-        pass
+    def __init__(self, bank=None, sessions=None):
+        self.bank = bank
+        self.sessions = sessions if sessions is not None else InMemorySessionStore()
+        # interview id -> (level, task) of the speculatively generated next level
+        self._prefetch = OrderedDict()
+        # Running tokens per LLM-generated set, to estimate what a skipped level would have cost
+        self._set_tokens = [0, 0]
 
     def convert_options_to_dict(self,options):
         if isinstance(options, list):
-            keys = ["a", "b", "c", "d"]
-            return {k: v for k, v in zip(keys, options)}
+            return {k: v for k, v in zip(OPTION_KEYS, options)}
         return options  # Already a dict or not applicable
 
 
-    def generate_questions(self, domain: str, level: str) -> dict:
+    def _question_messages(self, domain: str, level: str, count: int = QUESTIONS_PER_SESSION) -> list:
         prompt = f"""
-            Generate 10 {level} level interview questions (mix of MCQs + Descriptive) on {domain}.
+            Generate {count} {level} level interview questions (mix of MCQs + Descriptive) on {domain}.
             Format: JSON list of objects with keys: id, question, type, correct_answer, options.
             For MCQs, 'options' must be a list of 4 values.
         """
+        return [
+            {"role": "system", "content": "You are a helpful interviewer assistant."},
+            {"role": "user", "content": prompt}
+        ]
 
-        try:
-            response = client.chat.completions.create(
+    def _normalize_question(self, q: dict) -> dict:
+        q['type'] = q.get('type', '').lower()
+        q['id'] = q.get('id', str(uuid.uuid4()))
+
+        if q['type'] == 'mcq':
+            q['options'] = self.convert_options_to_dict(q.get('options', []))
+        return q
+
+    async def _complete_questions(self, domain: str, level: str, count: int, usage: dict = None) -> list:
+        """
+        One completion asking for ``count`` questions; returns the valid ones it
+        contains. Adds the call and its tokens to ``usage`` when given.
+        """
+        with span("llm_completion"):
+            response = await get_async_client().chat.completions.create(
                 model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a helpful interviewer assistant."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=self._question_messages(domain, level, count),
                 temperature=0.7,
                 max_tokens=1500,
             )
+        record_usage("gpt-3.5-turbo", getattr(response, "usage", None))
+        if usage is not None:
+            usage["llm_calls"] += 1
+            usage["tokens"] += getattr(getattr(response, "usage", None), "total_tokens", 0) or 0
 
-            content = response.choices[0].message.content
-            print("OpenAI raw response:", content)
-
-            # Try to extract JSON block
-            json_pattern = r"```json\s*(\[[\s\S]*?\])\s*```"
-            match = re.search(json_pattern, content)
-            if match:
-                json_str = match.group(1)
-            else:
-                # Fallback if no triple backticks
-                start = content.find('[')
-                end = content.rfind(']') + 1
-                json_str = content[start:end]
-
-            questions = json.loads(json_str)
+        content = response.choices[0].message.content
+        logger.debug("OpenAI raw response: %s", content)
 
-            if not isinstance(questions, list) or len(questions) == 0:
-                raise ValueError("No questions generated")
+        with span("json_extraction"):
+            return parse_questions(content)
 
-            for q in questions:
-                q['type'] = q.get('type', '').lower()
-                q['id'] = q.get('id', str(uuid.uuid4()))
+    async def request_questions(self, domain: str, level: str, count: int = QUESTIONS_PER_SESSION,
+                                usage: dict = None, exclude=()) -> list:
+        """
+        Ask the LLM for ``count`` fresh questions. Every valid question of a
+        defective completion is kept, and only the missing ones are requested
+        again (up to QUESTION_TOPUP_ROUNDS times). Duplicates, of each other or
+        of the ``exclude`` questions, are dropped. Raises if nothing usable
+        comes back.
+        """
+        questions = []
+        seen = {_question_key(q) for q in exclude}
+        for attempt in range(1 + QUESTION_TOPUP_ROUNDS):
+            missing = count - len(questions)
+            if missing <= 0:
+                break
+            try:
+                batch = await self._complete_questions(domain, level, missing, usage)
+            except Exception as e:
+                if not questions:
+                    raise
+                logger.warning("Question top-up failed, keeping %d questions: %s", len(questions), e)
+                break
+            if attempt and batch:
+                logger.info("Topped up %d missing %s/%s questions", min(len(batch), missing), domain, level)
+            for q in batch:
+                key = _question_key(q)
+                if key not in seen and len(questions) < count:
+                    seen.add(key)
+                    questions.append(q)
 
-                if q['type'] == 'mcq':
-                    q['options'] = self.convert_options_to_dict(q.get('options', []))
+        if not questions:
+            raise ValueError("No questions generated")
 
+        for number, q in enumerate(questions, start=1):
+            q["id"] = number
+        return [self._normalize_question(q) for q in questions]
 
+    async def _level_questions(self, domain: str, level: str, usage: dict = None):
+        """(questions, source) for one level: the bank, else the LLM, else the fallback set."""
+        # Serve from the pre-generated bank when it can fill a whole set
+        questions = self.bank.take(domain, level, QUESTIONS_PER_SESSION) if self.bank else None
+        if questions:
+            return questions, "bank"
+        try:
+            return await self.request_questions(domain, level, usage=usage), "llm"
         except Exception as e:
-            print("OpenAI error or parsing failed:", e)
-            questions = self._generate_fallback_questions(domain)
+            logger.warning("OpenAI error or parsing failed: %s", e)
+            return self._generate_fallback_questions(domain), "fallback"
+
+    async def generate_questions(self, domain: str, level: str) -> dict:
+        questions, _ = await self._level_questions(domain, level)
+        session_id = self._create_session(domain, level, questions)
+        return {"session_id": session_id, "questions": questions}
 
+    def _create_session(self, domain: str, level: str, questions: list) -> str:
         session_id = str(uuid.uuid4())
-        SESSIONS[session_id] = {
-            "questions": questions,
+        self.sessions.put(session_id, {
+            "questions": compact_questions(questions),
             "domain": domain,
             "level": level,
             "score": None,
             "result": None
-        }
+        })
+        return session_id
 
-        return {"session_id": session_id, "questions": questions}
+    async def stream_questions(self, domain: str, level: str):
+        """
+        Async generator of interview events for streaming clients: a "session"
+        event, then one "question" event per question as soon as the streamed
+        completion contains it, then "done".
+        """
+        questions = []
+        session_id = self._create_session(domain, level, questions)
+        yield {"type": "session", "session_id": session_id}
+
+        try:
+            banked = self.bank.take(domain, level, QUESTIONS_PER_SESSION) if self.bank else None
+            if banked:
+                source = banked
+            else:
+                source = []
+                try:
+                    # Spans the whole stream, including the time spent yielding to the client
+                    with span("llm_completion_stream"):
+                        stream = await get_async_client().chat.completions.create(
+                            model="gpt-3.5-turbo",
+                            messages=self._question_messages(domain, level),
+                            temperature=0.7,
+                            max_tokens=1500,
+                            stream=True,
+                            stream_options={"include_usage": True},
+                        )
+                        parser = IncrementalArrayParser()
+                        async for chunk in stream:
+                            # Only the final chunk carries usage (include_usage)
+                            record_usage("gpt-3.5-turbo", getattr(chunk, "usage", None))
+                            delta = chunk.choices[0].delta.content if chunk.choices else None
+                            for q in parser.feed(delta or ""):
+                                q = validate_question(q)
+                                if q is None or any(_question_key(q) == _question_key(p) for p in questions):
+                                    continue
+                                q["id"] = len(questions) + 1
+                                q = self._normalize_question(q)
+                                questions.append(q)
+                                yield {"type": "question", "question": q}
+                except Exception as e:
+                    logger.warning("OpenAI streaming error: %s", e)
+
+                missing = QUESTIONS_PER_SESSION - len(questions)
+                if not questions:
+                    source = self._generate_fallback_questions(domain)
+                elif missing > 0:
+                    # Salvaged part of the stream: ask only for the rest
+                    try:
+                        source = await self.request_questions(domain, level, missing, exclude=questions)
+                    except Exception as e:
+                        logger.warning("Question top-up failed: %s", e)
+                    for number, q in enumerate(source, start=len(questions) + 1):
+                        q["id"] = number
+
+            for q in source:
+                questions.append(q)
+                yield {"type": "question", "question": q}
+        finally:
+            # Store whatever was sent, even if the client went away mid-stream
+            self.sessions.update(session_id, questions=compact_questions(questions))
+
+        yield {"type": "done", "count": len(questions)}
 
     def _generate_fallback_questions(self, domain):
         # Provide dummy fallback questions to avoid empty UI
@@ -92,18 +232,14 @@ class QAGenerator:
             "id": i,
             "question": f"Dummy question {i+1} about {domain}",
             "type": "mcq",
-            "correct_answer": "Option A",
+            "correct_answer": "a",  # the key of "Option A", as the UI submits it
             "options": ["Option A", "Option B", "Option C", "Option D"]
-        } for i in range(10)]
-
-    def evaluate_answers(self, session_id: str, answers: List[AnswerItem]) -> dict:
-        print("Current sessions:", SESSIONS.keys())
+        } for i in range(QUESTIONS_PER_SESSION)]
 
-        if session_id not in SESSIONS:
-            raise HTTPException(status_code=400, detail="Invalid session ID")
-
-        questions = SESSIONS[session_id]["questions"]
+    def _grade(self, questions, answers: List[AnswerItem]):
+        """MCQ points and the (expected, answer) text pairs still to be scored by similarity."""
         total = 0
+        descriptive = []
 
         for ans in answers:
             question = next((q for q in questions if str(q['id']) == str(ans.id)), None)
@@ -114,19 +250,215 @@ class QAGenerator:
                 if ans.user_answer.strip().lower() == question['correct_answer'].strip().lower():
                     total += 10
             elif question['type'].lower() == 'descriptive':
-                emb_correct = get_embedding(question['correct_answer'])
-                emb_user = get_embedding(ans.user_answer)
-                sim = cosine_similarity([emb_correct], [emb_user])[0][0]
-                score = sim * 10
-                total += min(score, 10)
+                descriptive.append((question['correct_answer'], ans.user_answer))
             else:
                 continue
+        return total, descriptive
 
+    def _finish(self, session_id: str, total: float) -> dict:
         score = round(total, 2)
         result = "Passed" if score >= 50 else "Failed"
 
-        SESSIONS[session_id]["score"] = score
-        SESSIONS[session_id]["result"] = result
+        self.sessions.update(session_id, score=score, result=result)
 
         return {"score": score, "result": result}
 
+    async def evaluate_answers(self, session_id: str, answers: List[AnswerItem]) -> dict:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HTTPException(status_code=400, detail="Invalid session ID")
+
+        total, descriptive = self._grade(session["questions"], answers)
+
+        if descriptive:
+            # One batched (and cached) embedding lookup for the whole submission
+            embeddings = await aget_embeddings([text for pair in descriptive for text in pair])
+            with span("similarity_scoring"):
+                total += float(descriptive_points(embeddings[0::2], embeddings[1::2]).sum())
+
+        return self._finish(session_id, total)
+
+    async def evaluate_many(self, submissions: List[AnswerSubmission]) -> List[dict]:
+        """
+        Score many submissions at once. Identical texts across all sessions are
+        embedded once, in one batched lookup, and every descriptive answer is
+        scored in a single score_sessions call. Returns one result per
+        submission, in order; unknown sessions get an "error" instead of failing
+        the whole batch.
+        """
+        graded = []
+        texts = {}
+        for submission in submissions:
+            session = self.sessions.get(submission.session_id)
+            if session is None:
+                graded.append(None)
+                continue
+            total, descriptive = self._grade(session["questions"], submission.answers)
+            rows = [(texts.setdefault(expected, len(texts)), texts.setdefault(actual, len(texts)))
+                    for expected, actual in descriptive]
+            graded.append((total, rows))
+
+        points = []
+        if texts:
+            embeddings = np.asarray(await aget_embeddings(list(texts)), dtype=np.float32)
+            blocks = [rows for _, rows in filter(None, graded)]
+            with span("similarity_scoring"):
+                points = iter(score_sessions(
+                    [embeddings[[e for e, _ in rows]] for rows in blocks],
+                    [embeddings[[a for _, a in rows]] for rows in blocks],
+                ))
+
+        results = []
+        for submission, item in zip(submissions, graded):
+            if item is None:
+                results.append({"session_id": submission.session_id, "error": "Invalid session ID"})
+                continue
+            total = item[0] + (float(next(points).sum()) if texts else 0.0)
+            results.append({"session_id": submission.session_id, **self._finish(submission.session_id, total)})
+        return results
+
+    # Adaptive interview: one interview id walks easy -> medium -> hard, but only as far as
+    # a level can still change the verdict. The next level is generated in the background
+    # while the current one is answered.
+
+    async def _generate_level(self, domain: str, level: str) -> dict:
+        usage = _usage()
+        questions, source = await self._level_questions(domain, level, usage)
+        if usage["llm_calls"]:
+            self._set_tokens[0] += usage["tokens"]
+            self._set_tokens[1] += 1
+        return {"questions": questions, "source": source, **usage}
+
+    def _start_prefetch(self, interview_id: str, domain: str, level: str):
+        if not ADAPTIVE_PREFETCH:
+            return
+        task = asyncio.create_task(self._generate_level(domain, level))
+        self._prefetch[interview_id] = (level, domain, task)
+        while len(self._prefetch) > ADAPTIVE_MAX_PENDING:
+            _, (old_level, old_domain, old_task) = self._prefetch.popitem(last=False)
+            self._discard(old_level, old_domain, old_task)
+
+    def _discard(self, level: str, domain: str, task) -> dict:
+        """Drop an unused speculative set; finished bank or LLM sets go back to the bank."""
+        if not task.done():
+            # A completion already in flight may still be billed, but its tokens are unknown
+            task.cancel()
+            return {"level": level, "status": "cancelled", "source": None, "llm_calls": 0, "tokens": 0}
+        generated = task.result()
+        banked = self.bank is not None and generated["source"] in ("bank", "llm")
+        if banked:
+            self.bank.add(domain, level, generated["questions"])
+        return {"level": level, "status": "banked" if banked else "wasted", "source": generated["source"],
+                "llm_calls": generated["llm_calls"], "tokens": generated["tokens"]}
+
+    @staticmethod
+    def _set_summary(generated: dict, speculative: bool) -> dict:
+        return {"source": generated["source"], "llm_calls": generated["llm_calls"],
+                "tokens": generated["tokens"], "speculative": speculative}
+
+    async def start_interview(self, domain: str) -> dict:
+        level = LEVELS[0]
+        generated = await self._generate_level(domain, level)
+        session_id = self._create_session(domain, level, generated["questions"])
+        interview_id = str(uuid.uuid4())
+        self.sessions.put(interview_id, {
+            "domain": domain,
+            "level": level,
+            "sessions": {level: session_id},
+            "scores": {},
+            "verdict": None,
+            "generated": {level: self._set_summary(generated, speculative=False)},
+            "discarded": [],
+        })
+        self._start_prefetch(interview_id, domain, LEVELS[1])
+        return {"interview_id": interview_id, "done": False, "level": level, "session_id": session_id,
+                "questions": generated["questions"]}
+
+    def _get_interview(self, interview_id: str) -> dict:
+        interview = self.sessions.get(interview_id)
+        if interview is None or "sessions" not in interview:
+            raise HTTPException(status_code=400, detail="Invalid interview ID")
+        return interview
+
+    async def submit_interview_level(self, interview_id: str, answers: List[AnswerItem]) -> dict:
+        """
+        Score the answers to the current level. Once the verdict is decided
+        (a pass, or the last level taken) the interview ends and the report is
+        returned; otherwise the next level's questions are.
+        """
+        interview = self._get_interview(interview_id)
+        if interview["verdict"] is not None:
+            raise HTTPException(status_code=400, detail="Interview already finished")
+        domain, level = interview["domain"], interview["level"]
+        result = await self.evaluate_answers(interview["sessions"][level], answers)
+        scores = {**interview["scores"], level: result["score"]}
+        position = LEVELS.index(level)
+        pending = self._prefetch.pop(interview_id, None)
+
+        # Failing a level never decides the verdict while a later level can still pass it
+        if interview_passed(scores) or position == len(LEVELS) - 1:
+            discarded = interview["discarded"]
+            if pending is not None:
+                discarded = discarded + [self._discard(*pending)]
+            verdict = "Passed" if interview_passed(scores) else "Failed"
+            self.sessions.update(interview_id, scores=scores, verdict=verdict, discarded=discarded)
+            report = self.interview_report(interview_id)
+            logger.info("Interview %s %s after %s; saved %d LLM calls", interview_id, verdict.lower(), level,
+                        report["savings"]["llm_calls_saved"])
+            return report
+
+        next_level = LEVELS[position + 1]
+        if pending is not None and pending[0] == next_level:
+            generated, speculative = await pending[2], True
+        else:
+            generated, speculative = await self._generate_level(domain, next_level), False
+        session_id = self._create_session(domain, next_level, generated["questions"])
+        self.sessions.update(
+            interview_id, level=next_level, scores=scores,
+            sessions={**interview["sessions"], next_level: session_id},
+            generated={**interview["generated"], next_level: self._set_summary(generated, speculative)},
+        )
+        if position + 2 < len(LEVELS):
+            self._start_prefetch(interview_id, domain, LEVELS[position + 2])
+        return {"interview_id": interview_id, "done": False, "level": next_level, "session_id": session_id,
+                "questions": generated["questions"], "scores": scores, "last_result": result}
+
+    def _savings(self, interview: dict) -> dict:
+        """
+        LLM use of this interview against generating all three levels up
+        front, as separate /start calls did, at one completion per set.
+        """
+        sets = list(interview["generated"].values()) + interview["discarded"]
+        llm_sets = [s for s in sets if s["llm_calls"]]
+        if llm_sets:
+            tokens_per_set = sum(s["tokens"] for s in llm_sets) / len(llm_sets)
+        else:
+            tokens_per_set = self._set_tokens[0] / self._set_tokens[1] if self._set_tokens[1] else 0
+        skipped = [lvl for lvl in LEVELS if lvl not in interview["sessions"]] if interview["verdict"] else []
+        wasted = [s for s in interview["discarded"] if s["status"] == "wasted"]
+        return {
+            "levels_taken": list(interview["sessions"]),
+            "levels_skipped": skipped,
+            "llm_calls": sum(s["llm_calls"] for s in sets),
+            "tokens": sum(s["tokens"] for s in sets),
+            "speculative_sets": sum(1 for s in interview["generated"].values() if s["speculative"])
+                                + len(interview["discarded"]),
+            "speculative_banked": sum(1 for s in interview["discarded"] if s["status"] == "banked"),
+            "llm_calls_saved": len(skipped) - sum(s["llm_calls"] for s in wasted),
+            "tokens_saved": round(len(skipped) * tokens_per_set) - sum(s["tokens"] for s in wasted),
+        }
+
+    def interview_report(self, interview_id: str) -> dict:
+        interview = self._get_interview(interview_id)
+        scores = interview["scores"]
+        return {
+            "interview_id": interview_id,
+            "domain": interview["domain"],
+            "done": interview["verdict"] is not None,
+            "level": interview["level"],
+            "final_result": interview["verdict"],
+            "passed": interview["verdict"] == "Passed",
+            **{f"{level}_score": scores.get(level) for level in LEVELS},
+            "sessions": interview["sessions"],
+            "savings": self._savings(interview),
+        }
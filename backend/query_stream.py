@@ -0,0 +1,75 @@
+import asyncio
+import threading
+
+from starlette.concurrency import run_in_threadpool
+
+
+class TokenStream:
+    """
+    Async iterator over the blocking token generator of a llama_index
+    StreamingResponse. Tokens are pulled in the thread pool; ``close`` stops
+    the upstream generator, which closes the LLM stream and ends generation.
+    """
+
+    def __init__(self, response_gen):
+        self._gen = response_gen
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def _next(self):
+        with self._lock:
+            if self.closed:
+                return None
+            return next(self._gen, None)
+
+    def _close(self):
+        # Waits for an in-flight _next() to finish; a running generator can't be closed
+        with self._lock:
+            if not self.closed:
+                self.closed = True
+                self._gen.close()
+
+    def close(self):
+        try:
+            asyncio.get_running_loop().run_in_executor(None, self._close)
+        except RuntimeError:
+            self._close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        token = await run_in_threadpool(self._next)
+        if token is None:
+            raise StopAsyncIteration
+        return token
+
+
+async def stream_answer(response, is_disconnected, on_complete=None):
+    """
+    Async generator of /query/stream events for a llama_index StreamingResponse:
+    "sources" with the retrieved node ids, one "token" event per generated
+    chunk, then "done". Stops the upstream generation if the client
+    disconnects. ``on_complete`` is awaited with the full answer once sent.
+    """
+    yield {
+        "type": "sources",
+        "node_ids": [n.node.node_id for n in response.source_nodes],
+        "scores": [n.score for n in response.source_nodes],
+    }
+
+    tokens = TokenStream(response.response_gen)
+    parts = []
+    try:
+        async for token in tokens:
+            if await is_disconnected():
+                return
+            parts.append(token)
+            yield {"type": "token", "text": token}
+    finally:
+        tokens.close()
+
+    answer = "".join(parts)
+    if on_complete is not None:
+        await on_complete(answer)
+    yield {"type": "done"}
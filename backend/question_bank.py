@@ -0,0 +1,187 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Demand counters kept for keys that are not warm yet (domains are free text)
+_MAX_TRACKED_KEYS = 4096
+
+
+class QuestionBank:
+    """
+    Persistent pool of pre-generated questions keyed by (domain, level).
+
+    ``take`` hands out questions in a few milliseconds and removes them from
+    the pool. Whenever a key drops below ``low_watermark`` it is queued for the
+    background workers, which call the LLM until the key is back at
+    ``target_size``. Domains are free text, so only the warm keys and keys
+    requested at least ``refill_after`` times are refilled; a one-off key
+    costs its own completion and nothing more.
+
+    The SQLite file is opened on first use, at ``path`` or else
+    QUESTION_BANK_PATH (default question_bank.db), so importing the app
+    creates no file.
+    """
+
+    def __init__(self, path: str = None, target_size: int = 40,
+                 low_watermark: int = 20, workers: int = 2, refill_after: int = 3):
+        self.path = path
+        self.target_size = target_size
+        self.low_watermark = low_watermark
+        self.workers = workers
+        self.refill_after = refill_after
+        self._warm = set()
+        self._demand = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._queue = None
+        self._tasks = []
+        self._pending = set()
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        # Callers hold self._lock
+        if self._conn is None:
+            conn = sqlite3.connect(self.path or os.getenv("QUESTION_BANK_PATH", "question_bank.db"),
+                                   check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS questions ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, domain TEXT NOT NULL, "
+                "level TEXT NOT NULL, payload TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS questions_key ON questions (domain, level)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        """Close the SQLite file; the next use opens it again (at the then current path)."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @staticmethod
+    def key(domain: str, level: str):
+        return domain.strip().lower(), level.strip().lower()
+
+    def size(self, domain: str, level: str) -> int:
+        with self._lock:
+            (count,) = self._db.execute(
+                "SELECT COUNT(*) FROM questions WHERE domain = ? AND level = ?",
+                self.key(domain, level),
+            ).fetchone()
+        return count
+
+    def add(self, domain: str, level: str, questions: list):
+        domain, level = self.key(domain, level)
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO questions (domain, level, payload) VALUES (?, ?, ?)",
+                [(domain, level, json.dumps(q)) for q in questions],
+            )
+            self._db.commit()
+
+    def take(self, domain: str, level: str, count: int):
+        """
+        Remove and return ``count`` random questions, renumbered 1..count, or
+        None if the pool cannot fill a whole set. Either way a refill is
+        requested when the pool is running low and the key is in demand.
+        """
+        key = self.key(domain, level)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, payload FROM questions WHERE domain = ? AND level = ? "
+                "ORDER BY RANDOM() LIMIT ?",
+                (*key, count),
+            ).fetchall()
+            if len(rows) == count:
+                self._db.executemany("DELETE FROM questions WHERE id = ?", [(row[0],) for row in rows])
+                self._db.commit()
+            (remaining,) = self._db.execute(
+                "SELECT COUNT(*) FROM questions WHERE domain = ? AND level = ?", key
+            ).fetchone()
+            in_demand = self._note_demand(key)
+
+        if remaining < self.low_watermark and in_demand:
+            self.request_refill(*key)
+        if len(rows) < count:
+            return None
+
+        questions = []
+        for i, (_, payload) in enumerate(rows, start=1):
+            question = json.loads(payload)
+            question["id"] = i
+            questions.append(question)
+        return questions
+
+    def _note_demand(self, key) -> bool:
+        """Count a request for ``key``; True once it is worth refilling in the background."""
+        if key in self._warm:
+            return True
+        count = self._demand.pop(key, 0) + 1
+        self._demand[key] = count
+        while len(self._demand) > _MAX_TRACKED_KEYS:
+            self._demand.popitem(last=False)
+        return count >= self.refill_after
+
+    def request_refill(self, domain: str, level: str):
+        key = self.key(domain, level)
+        if self._queue is None or key in self._pending:
+            return
+        self._pending.add(key)
+        self._queue.put_nowait(key)
+
+    async def _worker(self, generate):
+        while True:
+            domain, level = await self._queue.get()
+            try:
+                while self.size(domain, level) < self.target_size:
+                    questions = await generate(domain, level)
+                    self.add(domain, level, questions)
+                logger.info("Question bank for %s/%s refilled", domain, level)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Question bank refill for %s/%s failed: %s", domain, level, e)
+            finally:
+                self._pending.discard((domain, level))
+                self._queue.task_done()
+
+    def start(self, generate, warm_keys=()):
+        """
+        Start the refill workers on the running event loop. ``generate`` is an
+        async callable (domain, level) -> list of questions.
+        """
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker(generate)) for _ in range(self.workers)]
+        for domain, level in warm_keys:
+            self._warm.add(self.key(domain, level))
+            if self.size(domain, level) < self.low_watermark:
+                self.request_refill(domain, level)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._pending.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT domain, level, COUNT(*) FROM questions GROUP BY domain, level"
+            ).fetchall()
+        return {
+            "target_size": self.target_size,
+            "pending_refills": sorted("/".join(key) for key in self._pending),
+            "pools": {f"{domain}/{level}": count for domain, level, count in rows},
+        }
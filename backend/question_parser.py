@@ -0,0 +1,241 @@
+import json
+import re
+import string
+
+from pydantic import ValidationError
+
+from models import GeneratedQuestion
+
+# Keys the options are shown and answered under (QuestionCard sends the key as user_answer)
+OPTION_KEYS = string.ascii_lowercase
+_LETTER_ANSWER = re.compile(r"^\(?(?:option\s+)?([a-z])\s*[).:]?$")
+
+
+class IncrementalArrayParser:
+    """
+    Incremental parser for a JSON array of objects arriving in chunks, e.g.
+    from a streamed chat completion. ``feed`` returns every top-level object
+    that became complete with that chunk, so callers can act on the first
+    object long before the closing bracket arrives. Any text before the
+    opening ``[`` (prose, a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._object_start = None
+        self.started = False
+        self.done = False
+
+    def feed(self, chunk: str) -> list:
+        if self.done or not chunk:
+            return []
+        self._buffer += chunk
+        objects = []
+        buffer = self._buffer
+        i = self._pos
+
+        while i < len(buffer):
+            ch = buffer[i]
+            if not self.started:
+                if ch == "[":
+                    self.started = True
+                    self._depth = 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 1 and ch == "{":
+                    self._object_start = i
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 1 and ch == "}" and self._object_start is not None:
+                    try:
+                        obj = json.loads(buffer[self._object_start:i + 1])
+                    except ValueError:
+                        obj = None
+                    if isinstance(obj, dict):
+                        objects.append(obj)
+                    self._object_start = None
+                elif self._depth == 0:
+                    self.done = True
+                    break
+            i += 1
+
+        # Drop consumed text, keeping only an object that is still open
+        keep_from = self._object_start if self._object_start is not None else i
+        self._buffer = buffer[keep_from:]
+        if self._object_start is not None:
+            self._object_start = 0
+        self._pos = i - keep_from
+        return objects
+
+
+def _closes_single_quote(text: str, i: int) -> bool:
+    # In 'it's', the apostrophe is followed by a letter; a closing quote by , : } ] or the end
+    while i < len(text) and text[i].isspace():
+        i += 1
+    return i == len(text) or text[i] in ",:}]"
+
+
+def repair_json(text: str) -> str:
+    """
+    Rewrite the first JSON array in ``text`` (an LLM completion) in a single
+    pass, fixing the defects models commonly produce: prose or ``` fences
+    around it, single-quoted strings, trailing commas, and truncation in the
+    middle of the last object (which is dropped). Returns "[]" if there is
+    no array at all.
+    """
+    fence = text.find("```json")
+    start = text.find("[", fence if fence >= 0 else 0)
+    if start < 0:
+        return "[]"
+
+    out = []
+    stack = []
+    # Output length after the last complete member of the array, for cutting off a truncated tail
+    safe = None
+    quote = None
+    escape = False
+    i = start
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if quote:
+            if escape:
+                escape = False
+                # \' is not a valid JSON escape
+                out.append("'" if ch == "'" else "\\" + ch)
+            elif ch == "\\":
+                escape = True
+            elif ch == quote and (quote == '"' or _closes_single_quote(text, i + 1)):
+                quote = None
+                out.append('"')
+            elif ch == '"':
+                out.append('\\"')
+            elif ch == "\n":
+                out.append("\\n")
+            else:
+                out.append(ch)
+        elif ch in "\"'":
+            quote = ch
+            out.append('"')
+        elif ch in "{[":
+            stack.append(ch)
+            out.append(ch)
+        elif ch in "}]":
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if not stack:
+                break
+            stack.pop()
+            out.append(ch)
+            if not stack:
+                return "".join(out)
+            if len(stack) == 1:
+                safe = len(out)
+        elif ch == ",":
+            if len(stack) == 1:
+                safe = len(out)
+            out.append(ch)
+        else:
+            out.append(ch)
+        i += 1
+
+    # Truncated: the last member is cut off somewhere, and closing it as is would keep clipped
+    # values (a half-written answer or option), so keep only the complete members of the array
+    if safe is None:
+        return "[]"
+    candidate = "".join(out[:safe]).rstrip().rstrip(",") + "]"
+    try:
+        json.loads(candidate)
+        return candidate
+    except ValueError:
+        return "[]"
+
+
+def answer_key(answer: str, options: list):
+    """
+    Key of the option ``answer`` names, by option text or by letter ("b",
+    "B)", "Option B"), or None if it names none of them.
+    """
+    text = answer.strip().lower()
+    for key, option in zip(OPTION_KEYS, options):
+        if option.strip().lower() == text:
+            return key
+    match = _LETTER_ANSWER.match(text)
+    if match and OPTION_KEYS.index(match.group(1)) < len(options):
+        return match.group(1)
+    return None
+
+
+def validate_question(obj):
+    """
+    Return ``obj`` as a GeneratedQuestion dict, or None if it is not usable.
+    Harmless variations (options as a dict, numeric answers, "MCQ") are
+    normalized first; an MCQ needs at least two options, one of which is the
+    correct answer, and its correct_answer becomes that option's key, which
+    is what the UI submits.
+    """
+    if not isinstance(obj, dict):
+        return None
+    obj = dict(obj)
+    if isinstance(obj.get("options"), dict):
+        obj["options"] = list(obj["options"].values())
+    if obj.get("options") is None:
+        obj["options"] = []
+    for field in ("question", "type", "correct_answer"):
+        if isinstance(obj.get(field), (int, float)) and not isinstance(obj.get(field), bool):
+            obj[field] = str(obj[field])
+    if isinstance(obj.get("options"), list):
+        obj["options"] = [str(o) if isinstance(o, (int, float)) else o for o in obj["options"]]
+    # Callers renumber the questions, so an id like "q1" must not cost a valid question
+    if not isinstance(obj.get("id"), int) or isinstance(obj["id"], bool):
+        obj["id"] = int(obj["id"]) if isinstance(obj.get("id"), str) and obj["id"].isdigit() else 0
+    try:
+        question = GeneratedQuestion.model_validate(obj).model_dump()
+    except ValidationError:
+        return None
+    question["type"] = question["type"].strip().lower()
+    if question["type"] not in ("mcq", "descriptive") or not question["question"].strip():
+        return None
+    if question["type"] == "mcq":
+        question["options"] = question["options"][:len(OPTION_KEYS)]
+        key = answer_key(question["correct_answer"], question["options"])
+        if len(question["options"]) < 2 or key is None:
+            return None
+        question["correct_answer"] = key
+    return question
+
+
+def parse_questions(text: str) -> list:
+    """
+    Every valid question in an LLM completion: the array is repaired with
+    repair_json, and if it still does not parse, each complete object in it
+    is salvaged on its own.
+    """
+    repaired = repair_json(text)
+    try:
+        items = json.loads(repaired)
+    except ValueError:
+        items = IncrementalArrayParser().feed(repaired)
+    if isinstance(items, dict):
+        items = [items]
+    questions = []
+    for item in items if isinstance(items, list) else []:
+        question = validate_question(item)
+        if question is not None:
+            questions.append(question)
+    return questions
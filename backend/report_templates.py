@@ -0,0 +1,285 @@
+"""
+Interview report HTML.
+
+The page template (with its ~100 lines of inline CSS) is compiled once at
+import into literal chunks and named slots, and question blocks are rendered
+into a list that is joined once. All user-supplied values are HTML-escaped.
+ReportRenderer adds an LRU render cache keyed by session id, used for
+repeated sends and previews of the same report.
+"""
+import html
+import re
+import threading
+from collections import OrderedDict
+
+_FIELD = re.compile(r"\{\{(\w+)\}\}")
+
+
+class CompiledTemplate:
+    """``{{name}}`` template split into alternating literal chunks and field names."""
+
+    def __init__(self, source: str):
+        parts = _FIELD.split(source)
+        self.literals = parts[0::2]
+        self.fields = parts[1::2]
+
+    def chunks(self, values: dict):
+        for literal, field in zip(self.literals, self.fields):
+            yield literal
+            yield values[field]
+        yield self.literals[-1]
+
+    def render(self, values: dict) -> str:
+        return "".join(self.chunks(values))
+
+
+REPORT_CSS = """            body {
+                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+                line-height: 1.6;
+                color: #333;
+                max-width: 800px;
+                margin: 0 auto;
+                padding: 20px;
+                background-color: #f5f5f5;
+            }
+            .container {
+                background: white;
+                border-radius: 10px;
+                box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+                overflow: hidden;
+            }
+            .header {
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                color: white;
+                padding: 30px;
+                text-align: center;
+            }
+            .header h1 {
+                margin: 0;
+                font-size: 28px;
+                font-weight: 300;
+            }
+            .content {
+                padding: 30px;
+            }
+            .info-grid {
+                display: grid;
+                grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+                gap: 20px;
+                margin: 20px 0;
+            }
+            .info-card {
+                background: #f8f9fa;
+                padding: 20px;
+                border-radius: 8px;
+                border-left: 4px solid #667eea;
+            }
+            .info-card h3 {
+                margin: 0 0 10px 0;
+                color: #667eea;
+                font-size: 16px;
+            }
+            .info-card p {
+                margin: 0;
+                font-size: 18px;
+                font-weight: 600;
+            }
+            .question-block {
+                background: #f8f9fa;
+                margin: 15px 0;
+                padding: 20px;
+                border-radius: 8px;
+                border: 1px solid #e9ecef;
+            }
+            .question-header {
+                font-weight: 600;
+                color: #495057;
+                margin-bottom: 10px;
+            }
+            .answer {
+                background: white;
+                padding: 15px;
+                border-radius: 6px;
+                margin: 10px 0;
+                border-left: 3px solid #28a745;
+            }
+            .metrics {
+                display: flex;
+                justify-content: space-between;
+                font-size: 12px;
+                color: #6c757d;
+                margin-top: 10px;
+            }
+            .footer {
+                background: #f8f9fa;
+                padding: 20px 30px;
+                text-align: center;
+                color: #6c757d;
+                font-size: 14px;
+            }
+            .status-badge {
+                display: inline-block;
+                padding: 6px 12px;
+                border-radius: 20px;
+                font-size: 14px;
+                font-weight: 600;
+                text-transform: uppercase;
+            }
+            .status-passed {
+                background: #d4edda;
+                color: #155724;
+            }
+            .status-failed {
+                background: #f8d7da;
+                color: #721c24;
+            }
+"""
+
+REPORT_TEMPLATE = CompiledTemplate("""
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>Interview Evaluation Report</title>
+        <style>
+""" + REPORT_CSS + """        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>🎯 Interview Evaluation Report</h1>
+                <p>AI-Powered Technical Assessment</p>
+            </div>
+            
+            <div class="content">
+                <div class="info-grid">
+                    <div class="info-card">
+                        <h3>📚 Domain</h3>
+                        <p>{{domain}}</p>
+                    </div>
+                    <div class="info-card">
+                        <h3>📅 Date & Time</h3>
+                        <p>{{timestamp}}</p>
+                    </div>
+                    <div class="info-card">
+                        <h3>🎯 Final Score</h3>
+                        <p>{{score}}/100</p>
+                    </div>
+                    <div class="info-card">
+                        <h3>✅ Result</h3>
+                        <p>
+                            <span class="status-badge {{status_class}}">
+                                {{result}}
+                            </span>
+                        </p>
+                    </div>
+                </div>
+                
+                <h2>📝 Detailed Responses</h2>
+                <div class="questions-section">
+                    {{questions}}
+                </div>
+            </div>
+            
+            <div class="footer">
+                <p>🤖 This report was generated automatically by the AI Interviewer System</p>
+                <p>For questions or concerns, please contact the HR department.</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """)
+
+def _number(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def question_block(number: int, answer: dict) -> str:
+    escape = html.escape
+    within_time = answer.get('answered_within_time', False)
+    return f"""
+        <div class="question-block">
+            <div class="question-header">
+                {"✅" if within_time else "⏰"} Question {number} ({escape(str(answer.get('type', 'Unknown')).upper())})
+            </div>
+            <div class="answer">
+                <strong>Answer:</strong> {escape(str(answer.get('user_answer', 'No answer provided')))}
+            </div>
+            <div class="metrics">
+                <span>⏱️ Time Taken: {_number(answer.get('time_taken', 0)):.1f}s</span>
+                <span>{'🕐 Within Time Limit' if within_time else '⚠️ Time Exceeded'}</span>
+            </div>
+        </div>
+        """
+
+
+def render_questions(user_answers) -> str:
+    return "".join([question_block(index + 1, answer) for index, answer in enumerate(user_answers)])
+
+
+def render_report(evaluation_result, user_answers, domain, timestamp) -> str:
+    result = evaluation_result.get('result', 'Failed')
+    return REPORT_TEMPLATE.render({
+        "domain": html.escape(str(domain)),
+        "timestamp": html.escape(str(timestamp)),
+        "score": f"{_number(evaluation_result.get('score', 0)):.1f}",
+        "status_class": 'status-passed' if result == 'Passed' else 'status-failed',
+        "result": html.escape(str(result)),
+        "questions": render_questions(user_answers),
+    })
+
+
+def report_version(evaluation_result, user_answers, domain, timestamp) -> tuple:
+    """
+    Constant-time version of a session's report. A session's answers are fixed
+    once it is evaluated, so only their count is compared; re-evaluating
+    changes the score or result and a new send changes the timestamp. Values
+    are compared, never hashed, so lists and dicts are fine.
+    """
+    return (evaluation_result.get('score'), evaluation_result.get('result'), str(domain), str(timestamp),
+            len(user_answers))
+
+
+class ReportRenderer:
+    """
+    render_report with an LRU cache of ``max_entries`` reports keyed by
+    session id. A cached report is reused only while its report_version is
+    unchanged, so a re-evaluated session is re-rendered and a hit costs the
+    same however many answers the report has.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, evaluation_result, user_answers, domain, timestamp, session_id: str = None) -> str:
+        if session_id is None:
+            return render_report(evaluation_result, user_answers, domain, timestamp)
+
+        version = report_version(evaluation_result, user_answers, domain, timestamp)
+        with self._lock:
+            cached = self._cache.get(session_id)
+            if cached is not None and cached[0] == version:
+                self._cache.move_to_end(session_id)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        report = render_report(evaluation_result, user_answers, domain, timestamp)
+        with self._lock:
+            self._cache[session_id] = (version, report)
+            self._cache.move_to_end(session_id)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return report
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._cache)}
@@ -0,0 +1,164 @@
+"""
+Built-in top-k retrieval for the documentation indexes.
+
+ExactSearch scores every row with one matrix-vector product and selects the
+top k with argpartition. IVFSearch is an approximate inverted-file index
+(spherical k-means lists, ``n_probe`` lists scanned per query) for corpora
+large enough that a full scan dominates latency. Rows are expected to be
+L2-normalized so the dot product is the cosine similarity.
+"""
+import os
+
+import numpy as np
+from llama_index import ServiceContext
+from llama_index.core.base_retriever import BaseRetriever
+from llama_index.query_engine import RetrieverQueryEngine
+from llama_index.schema import NodeWithScore, TextNode
+
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "exact")  # exact | ivf | auto
+IVF_MIN_ROWS = int(os.getenv("RETRIEVAL_IVF_MIN_ROWS", 20000))
+
+
+def _top_k(scores: np.ndarray, k: int):
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return top, scores[top]
+
+
+def normalize(matrix) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class ExactSearch:
+    def __init__(self, matrix):
+        self.matrix = matrix
+
+    def __len__(self):
+        return len(self.matrix)
+
+    def search(self, query, k: int):
+        """Return (row indices, scores) of the k best rows, best first."""
+        return _top_k(self.matrix @ np.asarray(query, dtype=np.float32), k)
+
+
+class IVFSearch:
+    def __init__(self, matrix, n_lists: int = None, n_probe: int = 8, iterations: int = 10, seed: int = 0):
+        self.matrix = matrix
+        self.n_probe = n_probe
+        n = len(matrix)
+        n_lists = max(1, min(n, n_lists or int(np.sqrt(n))))
+
+        rng = np.random.default_rng(seed)
+        sample = matrix[rng.choice(n, size=min(n, n_lists * 64), replace=False)]
+        centroids = np.array(sample[rng.choice(len(sample), size=n_lists, replace=False)])
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(n_lists):
+                members = sample[assign == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids = normalize(centroids)
+        self.centroids = centroids
+
+        # Inverted lists: row ids grouped by nearest centroid, with list offsets
+        assign = np.empty(n, dtype=np.int64)
+        for start in range(0, n, 8192):
+            assign[start:start + 8192] = np.argmax(matrix[start:start + 8192] @ centroids.T, axis=1)
+        self.order = np.argsort(assign, kind="stable")
+        self.offsets = np.searchsorted(assign[self.order], np.arange(n_lists + 1))
+
+    def __len__(self):
+        return len(self.matrix)
+
+    def search(self, query, k: int):
+        query = np.asarray(query, dtype=np.float32)
+        probe = _top_k(self.centroids @ query, self.n_probe)[0]
+        rows = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in probe])
+        if len(rows) < k:
+            return ExactSearch(self.matrix).search(query, k)
+        top, scores = _top_k(self.matrix[rows] @ query, k)
+        return rows[top], scores
+
+
+def build_search(matrix, mode: str = None):
+    mode = mode or RETRIEVAL_MODE
+    if mode == "ivf" or (mode == "auto" and len(matrix) >= IVF_MIN_ROWS):
+        return IVFSearch(matrix)
+    return ExactSearch(matrix)
+
+
+class MatrixRetriever(BaseRetriever):
+    """llama_index retriever that delegates scoring to ExactSearch/IVFSearch."""
+
+    def __init__(self, index, service_context=None, similarity_top_k: int = 2):
+        self.index = index
+        self.service_context = service_context or ServiceContext.from_defaults()
+        self.similarity_top_k = similarity_top_k
+        super().__init__(callback_manager=self.service_context.callback_manager)
+
+    def _retrieve(self, query_bundle):
+        embedding = query_bundle.embedding or self.service_context.embed_model.get_agg_embedding_from_queries(
+            query_bundle.embedding_strs
+        )
+        rows, scores = self.index.search.search(normalize(embedding), self.similarity_top_k)
+        return [NodeWithScore(node=self.index.node(i), score=float(s)) for i, s in zip(rows, scores)]
+
+
+class MatrixIndex:
+    """
+    Index over a normalized (n, d) embedding matrix, exposing the
+    as_retriever()/as_query_engine() interface /query relies on.
+    """
+
+    def __init__(self, node_ids, embeddings, texts, metadata=None, service_context=None,
+                 similarity_top_k: int = 2, mode: str = None):
+        self.node_ids = list(node_ids)
+        self.embeddings = embeddings
+        self._texts = texts
+        self._metadata = metadata
+        self.service_context = service_context
+        self.similarity_top_k = similarity_top_k
+        self.search = build_search(embeddings, mode)
+
+    @classmethod
+    def from_vector_store_index(cls, index, **kwargs):
+        """Build from a loaded llama_index VectorStoreIndex backed by a SimpleVectorStore."""
+        embedding_dict = index.vector_store.to_dict()["embedding_dict"]
+        node_ids = list(embedding_dict)
+        nodes = index.docstore.get_nodes(node_ids)
+        return cls(
+            node_ids,
+            normalize([embedding_dict[node_id] for node_id in node_ids]),
+            [node.get_content() for node in nodes],
+            [node.metadata for node in nodes],
+            service_context=kwargs.pop("service_context", index.service_context),
+            **kwargs,
+        )
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def text(self, i: int) -> str:
+        return self._texts[i]
+
+    def node(self, i: int) -> TextNode:
+        metadata = self._metadata[i] if self._metadata is not None else {}
+        return TextNode(id_=self.node_ids[i], text=self.text(i), metadata=metadata)
+
+    def as_retriever(self, similarity_top_k: int = None):
+        return MatrixRetriever(
+            self,
+            service_context=self.service_context,
+            similarity_top_k=similarity_top_k or self.similarity_top_k,
+        )
+
+    def as_query_engine(self, **kwargs):
+        service_context = self.service_context or ServiceContext.from_defaults()
+        retriever = self.as_retriever(kwargs.pop("similarity_top_k", None))
+        return RetrieverQueryEngine.from_args(retriever, service_context=service_context, **kwargs)
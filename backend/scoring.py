@@ -0,0 +1,55 @@
+import numpy as np
+
+DESCRIPTIVE_POINTS = 10.0
+
+
+def _as_matrix(vectors, dim: int = None) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.size == 0:
+        return np.empty((0, dim or 0), dtype=np.float32)
+    return matrix.reshape(len(matrix), -1)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def pairwise_similarities(expected, actual) -> np.ndarray:
+    """
+    Cosine similarity between row i of ``expected`` and row i of ``actual``
+    for two (n, d) matrices, computed in a single pass.
+    """
+    expected = _as_matrix(expected)
+    actual = _as_matrix(actual, expected.shape[1])
+    if expected.shape != actual.shape:
+        raise ValueError(f"Shape mismatch: {expected.shape} vs {actual.shape}")
+    if len(expected) == 0:
+        return np.empty(0, dtype=np.float32)
+    return np.einsum("ij,ij->i", normalize_rows(expected), normalize_rows(actual))
+
+
+def descriptive_points(expected, actual, max_points: float = DESCRIPTIVE_POINTS) -> np.ndarray:
+    """Points awarded per descriptive answer: similarity scaled to ``max_points`` and capped."""
+    return np.minimum(pairwise_similarities(expected, actual) * max_points, max_points)
+
+
+def score_sessions(expected_blocks, actual_blocks, max_points: float = DESCRIPTIVE_POINTS):
+    """
+    Bulk mode: score many submissions at once. Each block holds the reference
+    and candidate embeddings of one session; all blocks are stacked, scored in
+    one kernel call and split back into one points array per session.
+    """
+    expected_blocks = [_as_matrix(block) for block in expected_blocks]
+    dim = max((block.shape[1] for block in expected_blocks), default=0)
+    expected_blocks = [block if len(block) else np.empty((0, dim), np.float32) for block in expected_blocks]
+    actual_blocks = [_as_matrix(block, dim) for block in actual_blocks]
+    if len(expected_blocks) != len(actual_blocks):
+        raise ValueError("expected_blocks and actual_blocks must have the same length")
+    if not expected_blocks:
+        return []
+
+    points = descriptive_points(np.vstack(expected_blocks), np.vstack(actual_blocks), max_points)
+    offsets = np.cumsum([len(block) for block in expected_blocks])[:-1]
+    return np.split(points, offsets)
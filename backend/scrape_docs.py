@@ -1,6 +1,15 @@
 import os
 import time
+import json
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+
+from dedup import unique_urls
+from shards import ShardStore
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 import re
@@ -28,36 +37,59 @@ HEADERS = {
 
 CHUNK_SIZE = 800  # Approx words per chunk
 BASE_DIR = os.path.join(os.getcwd(), "docs")
+MANIFEST_NAME = "manifest.json"
+MAX_WORKERS = 8
+HOST_DELAY = 2.0  # polite delay between two requests to the same host, in seconds
+# Processes that clean fetched pages; 0 cleans on the fetching thread
+CLEAN_WORKERS = int(os.getenv("SCRAPE_CLEAN_WORKERS", min(MAX_WORKERS, os.cpu_count() or 1)))
+STRIPPED_TAGS = ["script", "style", "header", "footer", "nav", "aside", "form"]
+
+
+def default_parser():
+    # lxml's C parser is several times faster than html.parser; use it when installed
+    try:
+        import lxml  # noqa: F401
+    except ImportError:
+        return "html.parser"
+    return "lxml"
+
+
+HTML_PARSER = os.getenv("SCRAPE_HTML_PARSER") or default_parser()
+_SPACES_RE = re.compile(r"[ \t]{2,}")
 
 
-def clean_text(html_text):
+def clean_text(html_text, parser=None):
     # Use BeautifulSoup to clean html tags/scripts/styles
-    soup = BeautifulSoup(html_text, "html.parser")
+    soup = BeautifulSoup(html_text, parser or HTML_PARSER)
 
     # Remove script and style elements
-    for script_or_style in soup(["script", "style", "header", "footer", "nav", "aside", "form"]):
+    for script_or_style in soup(STRIPPED_TAGS):
         script_or_style.decompose()
 
     text = soup.get_text(separator="\n")
 
-    # Clean and normalize
-    lines = [line.strip() for line in text.splitlines()]
-    text = "\n".join(line for line in lines if line)
+    # Strip lines and drop empty ones in one pass; no blank lines are left to collapse afterwards
+    text = "\n".join(line for line in map(str.strip, text.splitlines()) if line)
+    return _SPACES_RE.sub(" ", text)
 
-    # Remove multiple newlines and excessive spaces
-    text = re.sub(r"\n{2,}", "\n\n", text)
-    text = re.sub(r"[ \t]{2,}", " ", text)
 
-    return text
+def iter_chunks(text, size=CHUNK_SIZE):
+    words = text.split()
+    for i in range(0, len(words), size):
+        yield " ".join(words[i:i + size])
 
 
 def chunk_text(text, size=CHUNK_SIZE):
-    words = text.split()
-    chunks = []
-    for i in range(0, len(words), size):
-        chunk = " ".join(words[i:i + size])
-        chunks.append(chunk)
-    return chunks
+    return list(iter_chunks(text, size))
+
+
+def process_page(html_text, parser=None, size=CHUNK_SIZE):
+    """
+    Clean stage, run in the process pool: parse and clean one page and return
+    (content hash, chunks), so only the chunks travel back to the scraper.
+    """
+    text = clean_text(html_text, parser)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest(), chunk_text(text, size)
 
 
 def safe_filename(name):
@@ -65,42 +97,192 @@ def safe_filename(name):
     return re.sub(r"[^\w\-_. ]", "_", name)[:50]
 
 
-def scrape_and_save(url, language, index):
+class HostRateLimiter:
+    """Spaces requests to the same host at least ``delay`` seconds apart."""
+
+    def __init__(self, delay=HOST_DELAY):
+        self.delay = delay
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.delay
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_local = threading.local()
+
+
+def get_session():
+    # One keep-alive session per worker thread; requests.Session isn't thread-safe
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=4)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _local.session = session
+    return session
+
+
+def manifest_key(url, language, index):
+    return f"{language}/{index}/{url}"
+
+
+def load_manifest(base_dir=BASE_DIR):
+    try:
+        with open(os.path.join(base_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_manifest(manifest, base_dir=BASE_DIR):
+    os.makedirs(base_dir, exist_ok=True)
+    path = os.path.join(base_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def fetch_page(url, entry, limiter=None):
+    """
+    Fetch stage: GET ``url``, conditional on the ETag/Last-Modified stored in
+    the manifest ``entry``. Returns the response, or None if the page is
+    unchanged (304) or could not be fetched.
+    """
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+
     try:
         print(f"Scraping: {url}")
-        resp = requests.get(url, headers=HEADERS, timeout=15)
+        if limiter is not None:
+            limiter.wait(urlparse(url).netloc)
+        resp = get_session().get(url, headers=headers, timeout=15)
+        if resp.status_code == 304:
+            print(f"Not modified: {url}")
+            return None
         resp.raise_for_status()
     except Exception as e:
         print(f"Failed to fetch {url}: {e}")
-        return 0
+        return None
+    return resp
 
-    text = clean_text(resp.text)
-    chunks = chunk_text(text)
-
-    save_dir = os.path.join(BASE_DIR, language)
-    os.makedirs(save_dir, exist_ok=True)
 
+def write_chunks(chunks, store, prefix, url, previous_count=0, size=CHUNK_SIZE):
+    """
+    Write stage: append each chunk to the language's shards as ``<prefix>_<i>``.
+    Chunks identical to the stored ones are not rewritten. Returns the number of chunks.
+    """
     count = 0
     for idx, chunk in enumerate(chunks):
-        fname = f"{safe_filename(urlparse(url).netloc)}_{index}_{idx}.txt"
-        path = os.path.join(save_dir, fname)
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(chunk)
+        store.put(f"{prefix}_{idx}", chunk, url=url, offset=idx * size)
         count += 1
 
+    # The page may have shrunk since the last run; drop chunks it no longer has
+    for idx in range(count, previous_count):
+        store.delete(f"{prefix}_{idx}")
+    return count
+
+
+def scrape_and_save(url, language, index, manifest=None, limiter=None, base_dir=BASE_DIR, clean_pool=None,
+                    store=None):
+    """
+    Fetch one page and write its chunks to ``store`` (by default the shards
+    in ``base_dir/language``). With a manifest, the request is conditional
+    on the stored ETag/Last-Modified and pages whose cleaned text hash is
+    unchanged are skipped. With ``clean_pool`` the page is cleaned and
+    chunked in that process pool while this thread waits, so other fetches
+    keep going. Returns the number of chunks written.
+    """
+    manifest = {} if manifest is None else manifest
+    key = manifest_key(url, language, index)
+    entry = manifest.get(key, {})
+
+    resp = fetch_page(url, entry, limiter)
+    if resp is None:
+        return 0
+
+    if clean_pool is not None:
+        content_hash, chunks = clean_pool.submit(process_page, resp.text, HTML_PARSER).result()
+    else:
+        content_hash, chunks = process_page(resp.text)
+
+    new_entry = {
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "content_hash": content_hash,
+        "chunks": entry.get("chunks", 0),
+    }
+    if entry.get("content_hash") == content_hash:
+        print(f"Unchanged: {url}")
+        manifest[key] = new_entry
+        return 0
+
+    prefix = f"{safe_filename(urlparse(url).netloc)}_{index}"
+    if store is None:
+        store = ShardStore(os.path.join(base_dir, language))
+        try:
+            count = write_chunks(chunks, store, prefix, url, entry.get("chunks", 0))
+        finally:
+            store.close()
+    else:
+        count = write_chunks(chunks, store, prefix, url, entry.get("chunks", 0))
+
+    new_entry["chunks"] = count
+    manifest[key] = new_entry
     print(f"Saved {count} chunks for {url}")
     return count
 
 
-def main():
-    total_chunks = 0
-    for language, urls in URLS.items():
-        print(f"\nProcessing language: {language.upper()}")
-        for i, url in enumerate(urls):
-            saved = scrape_and_save(url, language, i)
-            total_chunks += saved
-            time.sleep(2)  # polite delay
+def clean_pool_for(workers):
+    if workers <= 0:
+        return None
+    # spawn, not fork: the workers start from inside the fetch threads, and forking a
+    # threaded process can copy a held lock into the child
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def main(urls=URLS, max_workers=MAX_WORKERS, host_delay=HOST_DELAY, base_dir=BASE_DIR,
+         clean_workers=CLEAN_WORKERS):
+    """
+    Run the fetch -> clean -> chunk -> write pipeline. ``max_workers``
+    threads fetch and write; cleaning and chunking run in ``clean_workers``
+    processes. At most ``max_workers`` pages are in flight at once.
+    """
+    manifest = load_manifest(base_dir)
+    limiter = HostRateLimiter(host_delay)
+    clean_pool = clean_pool_for(clean_workers)
+    stores = {language: ShardStore(os.path.join(base_dir, language)) for language in urls}
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            # Repeated URLs are fetched once; the rest keep their position, so manifest keys stay stable
+            futures = [
+                pool.submit(scrape_and_save, url, language, i, manifest, limiter, base_dir, clean_pool,
+                            stores[language])
+                for language, language_urls in urls.items()
+                for i, url in unique_urls(language_urls)
+            ]
+            total_chunks = sum(future.result() for future in futures)
+    finally:
+        if clean_pool is not None:
+            clean_pool.shutdown()
+        for store in stores.values():
+            store.close()
+
+    save_manifest(manifest, base_dir)
     print(f"\nScraping complete! Total chunks saved: {total_chunks}")
+    return total_chunks
 
 
 if __name__ == "__main__":
@@ -0,0 +1,164 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Only what grading needs is kept per question; the text and options were
+# already sent to the client and are not needed again.
+QUESTION_FIELDS = ("id", "type", "correct_answer")
+
+
+def compact_questions(questions: list) -> list:
+    return [{k: q.get(k) for k in QUESTION_FIELDS} for q in questions]
+
+
+class SessionStore:
+    """
+    Interface for interview session storage. Records are plain JSON-able
+    dicts; every backend expires them ``ttl`` seconds after the last write.
+    """
+
+    def get(self, session_id: str):
+        raise NotImplementedError
+
+    def put(self, session_id: str, record: dict):
+        raise NotImplementedError
+
+    def delete(self, session_id: str):
+        raise NotImplementedError
+
+    def update(self, session_id: str, **fields) -> bool:
+        record = self.get(session_id)
+        if record is None:
+            return False
+        record.update(fields)
+        self.put(session_id, record)
+        return True
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+
+class InMemorySessionStore(SessionStore):
+    """Per-process store bounded by ``max_size`` (LRU) and ``ttl``."""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 6 * 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._records = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._records)
+
+    def _purge_expired(self, now: float):
+        while self._records:
+            session_id, (expires_at, _) = next(iter(self._records.items()))
+            if expires_at > now:
+                break
+            del self._records[session_id]
+
+    def get(self, session_id: str):
+        now = time.monotonic()
+        with self._lock:
+            item = self._records.get(session_id)
+            if item is None:
+                return None
+            expires_at, record = item
+            if expires_at <= now:
+                del self._records[session_id]
+                return None
+            return dict(record)
+
+    def put(self, session_id: str, record: dict):
+        now = time.monotonic()
+        with self._lock:
+            self._records[session_id] = (now + self.ttl, dict(record))
+            self._records.move_to_end(session_id)
+            # Insertion order is expiry order, so expired records sit at the front
+            self._purge_expired(now)
+            while len(self._records) > self.max_size:
+                self._records.popitem(last=False)
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._records.pop(session_id, None)
+
+
+class SqliteSessionStore(SessionStore):
+    """
+    File-backed store that several uvicorn worker processes can share. Uses
+    WAL mode so readers do not block the writer.
+    """
+
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str = "sessions.db", ttl: float = 6 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS sessions_expiry ON sessions (expires_at)")
+
+    def get(self, session_id: str):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM sessions WHERE id = ? AND expires_at > ?",
+                (session_id, time.time()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, session_id: str, record: dict):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions (id, data, expires_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(record, separators=(",", ":")), now + self.ttl),
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._db.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+
+    def update(self, session_id: str, **fields) -> bool:
+        # Read-modify-write inside one transaction so concurrent workers don't interleave
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT data FROM sessions WHERE id = ? AND expires_at > ?",
+                    (session_id, time.time()),
+                ).fetchone()
+                if row is None:
+                    return False
+                record = json.loads(row[0])
+                record.update(fields)
+                self._db.execute(
+                    "UPDATE sessions SET data = ?, expires_at = ? WHERE id = ?",
+                    (json.dumps(record, separators=(",", ":")), time.time() + self.ttl, session_id),
+                )
+                return True
+            finally:
+                self._db.execute("COMMIT")
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+
+def create_session_store() -> SessionStore:
+    """Build the store selected by SESSION_STORE ("memory" or "sqlite")."""
+    ttl = float(os.getenv("SESSION_TTL_SECONDS", 6 * 3600))
+    backend = os.getenv("SESSION_STORE", "memory").lower()
+    if backend == "sqlite":
+        return SqliteSessionStore(path=os.getenv("SESSION_DB_PATH", "sessions.db"), ttl=ttl)
+    if backend == "memory":
+        return InMemorySessionStore(max_size=int(os.getenv("SESSION_MAX", 10000)), ttl=ttl)
+    raise ValueError(f"Unknown SESSION_STORE backend: {backend}")
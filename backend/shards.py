@@ -0,0 +1,326 @@
+"""
+Packed, append-only storage for scraped chunks.
+
+Each language directory holds numbered shard files (``shard-00000.bin``, ...)
+of length-prefixed records and an ``index.jsonl`` that maps every chunk key
+to the shard and byte position of its latest record. A record is a header
+(payload length, crc32 of the payload, flags) followed by a JSON payload
+with the key, source URL, word offset in the page, sha256 of the text and
+the text itself, zlib-compressed unless SHARD_COMPRESSION=none.
+
+Rewriting or deleting a chunk appends a new record or a tombstone record
+(to the shard and the index); ``compact`` rewrites the live records into
+fresh shards. A torn tail (crash mid-write) is ignored on read and cut off
+before the next append, so ``rebuild_index`` can recover the index from the
+shards alone.
+
+    python shards.py pack docs/java --remove   # move docs/java/*.txt into shards
+    python shards.py stats docs/java
+    python shards.py compact docs/java
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import struct
+import threading
+import zlib
+
+SHARD_MAX_BYTES = int(os.getenv("SHARD_MAX_BYTES", 64 * 1024 * 1024))
+SHARD_COMPRESSION = os.getenv("SHARD_COMPRESSION", "zlib").lower()
+INDEX_NAME = "index.jsonl"
+_HEADER = struct.Struct("<IIB")
+_COMPRESSED = 1
+
+
+def shard_name(number: int) -> str:
+    return f"shard-{number:05d}.bin"
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def encode_record(record: dict, compress: bool) -> bytes:
+    payload = json.dumps(record, ensure_ascii=False).encode("utf-8")
+    flags = 0
+    if compress:
+        payload = zlib.compress(payload)
+        flags |= _COMPRESSED
+    return _HEADER.pack(len(payload), zlib.crc32(payload), flags) + payload
+
+
+def read_record(f):
+    """Read the record at the current position of ``f``; None at the end or at a torn record."""
+    header = f.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return None
+    size, crc, flags = _HEADER.unpack(header)
+    payload = f.read(size)
+    if len(payload) < size or zlib.crc32(payload) != crc:
+        return None
+    if flags & _COMPRESSED:
+        payload = zlib.decompress(payload)
+    return json.loads(payload)
+
+
+def valid_length(f) -> int:
+    """Byte length of the intact records at the start of ``f`` (checks the crc, skips decoding)."""
+    f.seek(0)
+    end = 0
+    while True:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return end
+        size, crc, _ = _HEADER.unpack(header)
+        payload = f.read(size)
+        if len(payload) < size or zlib.crc32(payload) != crc:
+            return end
+        end = f.tell()
+
+
+def has_shards(path: str) -> bool:
+    return os.path.exists(os.path.join(path, INDEX_NAME))
+
+
+class ShardStore:
+    """
+    Chunks of one language under ``path``. Safe to share between threads;
+    one process should write a directory at a time.
+    """
+
+    def __init__(self, path: str, compression: str = SHARD_COMPRESSION, max_shard_bytes: int = SHARD_MAX_BYTES):
+        self.path = path
+        self.compress = compression != "none"
+        self.max_shard_bytes = max_shard_bytes
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._shard = None
+        self._index = None
+        self._shard_number = 0
+        os.makedirs(path, exist_ok=True)
+        self._load_index()
+        existing = self._shard_numbers()
+        self._shard_number = existing[-1] if existing else 0
+
+    def _shard_numbers(self):
+        names = glob.glob(os.path.join(self.path, "shard-*.bin"))
+        return sorted(int(os.path.basename(name)[6:11]) for name in names)
+
+    def _load_index(self):
+        self._entries = {}
+        try:
+            with open(os.path.join(self.path, INDEX_NAME), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line
+                    if entry.get("deleted"):
+                        self._entries.pop(entry["key"], None)
+                    else:
+                        self._entries[entry["key"]] = entry
+        except FileNotFoundError:
+            pass
+
+    def _append_index(self, entry: dict):
+        if self._index is None:
+            self._index = open(os.path.join(self.path, INDEX_NAME), "a", encoding="utf-8")
+        self._index.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._index.flush()
+
+    def _open_shard(self):
+        path = os.path.join(self.path, shard_name(self._shard_number))
+        f = open(path, "ab")
+        with open(path, "rb") as existing:
+            end = valid_length(existing)
+        if end < f.tell():
+            # Torn tail from a crash: appending after it would hide every later record from rebuild_index
+            f.truncate(end)
+            f.seek(end)
+        return f
+
+    def _writer(self, size: int):
+        if self._shard is None:
+            self._shard = self._open_shard()
+        if self._shard.tell() and self._shard.tell() + size > self.max_shard_bytes:
+            self._shard.close()
+            self._shard_number += 1
+            self._shard = self._open_shard()
+        return self._shard
+
+    def put(self, key: str, text: str, url: str = None, offset: int = 0) -> bool:
+        """Store ``text`` under ``key``. Returns False if the stored chunk was already identical."""
+        digest = text_hash(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["hash"] == digest and entry.get("url") == url:
+                return False
+            data = encode_record({"key": key, "url": url, "offset": offset, "hash": digest, "text": text},
+                                 self.compress)
+            shard = self._writer(len(data))
+            pos = shard.tell()
+            shard.write(data)
+            shard.flush()
+            entry = {"key": key, "shard": self._shard_number, "pos": pos, "size": len(data), "url": url,
+                     "offset": offset, "hash": digest}
+            self._append_index(entry)
+            self._entries[key] = entry
+            return True
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            if self._entries.pop(key, None) is None:
+                return False
+            # The tombstone goes into the shard too, so rebuild_index does not bring the chunk back
+            data = encode_record({"key": key, "deleted": True}, self.compress)
+            shard = self._writer(len(data))
+            shard.write(data)
+            shard.flush()
+            self._append_index({"key": key, "deleted": True})
+            return True
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def keys(self):
+        return sorted(self._entries)
+
+    def entry(self, key: str) -> dict:
+        return self._entries[key]
+
+    def get(self, key: str) -> dict:
+        """The record stored under ``key`` (random access through the index)."""
+        entry = self._entries[key]
+        with open(os.path.join(self.path, shard_name(entry["shard"])), "rb") as f:
+            f.seek(entry["pos"])
+            return read_record(f)
+
+    def iter_records(self):
+        """Live records in storage order, read sequentially one shard at a time."""
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda e: (e["shard"], e["pos"]))
+        f = None
+        current = None
+        try:
+            for entry in entries:
+                if entry["shard"] != current:
+                    if f is not None:
+                        f.close()
+                    current = entry["shard"]
+                    f = open(os.path.join(self.path, shard_name(current)), "rb")
+                if f.tell() != entry["pos"]:
+                    f.seek(entry["pos"])
+                record = read_record(f)
+                if record is not None:
+                    yield record
+        finally:
+            if f is not None:
+                f.close()
+
+    def stats(self) -> dict:
+        shards = self._shard_numbers()
+        total = sum(os.path.getsize(os.path.join(self.path, shard_name(n))) for n in shards)
+        live = sum(entry["size"] for entry in self._entries.values())
+        return {"chunks": len(self._entries), "shards": len(shards), "bytes": total, "dead_bytes": total - live}
+
+    def close(self):
+        with self._lock:
+            for f in (self._shard, self._index):
+                if f is not None:
+                    f.close()
+            self._shard = self._index = None
+
+    def compact(self):
+        """Rewrite the live records into new shards and drop the old ones."""
+        records = list(self.iter_records())
+        with self._lock:
+            for f in (self._shard, self._index):
+                if f is not None:
+                    f.close()
+            self._shard = self._index = None
+            old = self._shard_numbers()
+            self._shard_number = (old[-1] + 1) if old else 0
+            index_path = os.path.join(self.path, INDEX_NAME)
+            self._index = open(index_path + ".tmp", "w", encoding="utf-8")
+            self._entries = {}
+        for record in records:
+            self.put(record["key"], record["text"], record.get("url"), record.get("offset", 0))
+        with self._lock:
+            self._index.close()
+            self._index = None
+            os.replace(index_path + ".tmp", index_path)
+            for number in old:
+                os.remove(os.path.join(self.path, shard_name(number)))
+
+    def rebuild_index(self):
+        """Recreate index.jsonl from the shards (the last record or tombstone of each key wins)."""
+        entries = {}
+        for number in self._shard_numbers():
+            with open(os.path.join(self.path, shard_name(number)), "rb") as f:
+                while True:
+                    pos = f.tell()
+                    record = read_record(f)
+                    if record is None:
+                        break
+                    if record.get("deleted"):
+                        entries.pop(record["key"], None)
+                        continue
+                    entries[record["key"]] = {
+                        "key": record["key"], "shard": number, "pos": pos, "size": f.tell() - pos,
+                        "url": record.get("url"), "offset": record.get("offset", 0), "hash": record["hash"],
+                    }
+        with self._lock:
+            if self._index is not None:
+                self._index.close()
+                self._index = None
+            index_path = os.path.join(self.path, INDEX_NAME)
+            with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+                for entry in entries.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(index_path + ".tmp", index_path)
+            self._entries = entries
+
+
+def pack_directory(path: str, remove: bool = False) -> int:
+    """Move the ``*.txt`` chunk files of the old layout in ``path`` into shards. Returns the count."""
+    store = ShardStore(path)
+    names = sorted(glob.glob(os.path.join(path, "*.txt")))
+    try:
+        for name in names:
+            with open(name, encoding="utf-8") as f:
+                store.put(os.path.basename(name)[:-len(".txt")], f.read())
+    finally:
+        store.close()
+    if remove:
+        for name in names:
+            os.remove(name)
+    return len(names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage packed chunk shards.")
+    parser.add_argument("command", choices=["pack", "stats", "compact", "rebuild-index"])
+    parser.add_argument("paths", nargs="+", help="language directories, e.g. docs/java")
+    parser.add_argument("--remove", action="store_true", help="pack: delete the .txt files afterwards")
+    args = parser.parse_args()
+
+    for path in args.paths:
+        if args.command == "pack":
+            print(f"{path}: packed {pack_directory(path, args.remove)} files")
+            continue
+        store = ShardStore(path)
+        if args.command == "compact":
+            store.compact()
+        elif args.command == "rebuild-index":
+            store.rebuild_index()
+        store.close()
+        print(f"{path}: {store.stats()}")
+
+
+if __name__ == "__main__":
+    main()
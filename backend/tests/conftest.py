@@ -0,0 +1,14 @@
+import sys
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def question_bank_path(tmp_path, monkeypatch):
+    """Give every test its own question bank file instead of backend/question_bank.db."""
+    monkeypatch.setenv("QUESTION_BANK_PATH", str(tmp_path / "question_bank.db"))
+    yield
+    # main's bank opens the file on first use; close it so the next test opens its own
+    main = sys.modules.get("main")
+    if main is not None:
+        main.question_bank.close()
@@ -0,0 +1,125 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import openai_clients
+from models import AnswerItem
+from qa_engine import QAGenerator
+from question_bank import QuestionBank
+
+QUESTIONS = [{"id": i + 1, "question": f"Question {i + 1}?", "type": "mcq", "correct_answer": "a",
+              "options": ["a", "b", "c", "d"]} for i in range(10)]
+
+
+class CountingCompletions:
+    def __init__(self):
+        self.levels = []
+
+    async def create(self, messages, **kwargs):
+        self.levels.append(next(lvl for lvl in ("easy", "medium", "hard") if lvl in messages[1]["content"]))
+        await asyncio.sleep(0.01)
+        message = SimpleNamespace(content=json.dumps(QUESTIONS))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)],
+                               usage=SimpleNamespace(prompt_tokens=100, completion_tokens=400, total_tokens=500))
+
+
+def use_fake_client(monkeypatch):
+    completions = CountingCompletions()
+    monkeypatch.setattr(openai_clients, "_async_client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    return completions
+
+
+def answers(questions, correct):
+    return [AnswerItem(id=q["id"], type="mcq", user_answer="a" if i < correct else "b")
+            for i, q in enumerate(questions)]
+
+
+def test_passing_easy_stops_early_and_banks_the_prefetched_level(monkeypatch, tmp_path):
+    completions = use_fake_client(monkeypatch)
+    qa = QAGenerator(bank=QuestionBank(path=str(tmp_path / "bank.db")))
+
+    async def interview():
+        started = await qa.start_interview("python")
+        await qa._prefetch[started["interview_id"]][2]  # let the speculative medium set finish
+        return await qa.submit_interview_level(started["interview_id"], answers(started["questions"], 8))
+
+    report = asyncio.run(interview())
+    assert completions.levels == ["easy", "medium"]
+    assert report["done"] and report["passed"] and report["final_result"] == "Passed"
+    assert report["easy_score"] == 80 and report["medium_score"] is None
+    savings = report["savings"]
+    assert savings["levels_skipped"] == ["medium", "hard"]
+    assert savings["speculative_banked"] == 1
+    assert savings["llm_calls"] == 2
+    assert savings["llm_calls_saved"] == 2
+    assert savings["tokens_saved"] == 1000
+    # The unused medium set went back to the bank instead of being thrown away
+    assert qa.bank.size("python", "medium") == 10
+
+
+def test_failing_levels_are_served_from_prefetch_until_the_last(monkeypatch):
+    completions = use_fake_client(monkeypatch)
+    qa = QAGenerator()
+
+    async def interview():
+        step = await qa.start_interview("java")
+        levels = [step["level"]]
+        while not step["done"]:
+            await asyncio.sleep(0.05)
+            calls_before = len(completions.levels)
+            step = await qa.submit_interview_level(step["interview_id"], answers(step["questions"], 3))
+            if not step["done"]:
+                levels.append(step["level"])
+                # The next level was generated while the previous one was being answered
+                assert len(completions.levels) == calls_before
+        return levels, step
+
+    levels, report = asyncio.run(interview())
+    assert levels == ["easy", "medium", "hard"]
+    assert completions.levels == ["easy", "medium", "hard"]
+    assert report["final_result"] == "Failed"
+    assert report["hard_score"] == 30
+    assert report["savings"]["llm_calls_saved"] == 0
+    assert report["savings"]["speculative_sets"] == 2
+
+
+def test_unused_prefetch_without_a_bank_counts_as_waste(monkeypatch):
+    use_fake_client(monkeypatch)
+    qa = QAGenerator()
+
+    async def interview():
+        started = await qa.start_interview("go")
+        await qa._prefetch[started["interview_id"]][2]
+        await qa.submit_interview_level(started["interview_id"], answers(started["questions"], 10))
+        return qa.interview_report(started["interview_id"])
+
+    savings = asyncio.run(interview())["savings"]
+    assert savings["speculative_banked"] == 0
+    assert savings["llm_calls_saved"] == 1
+    assert savings["tokens_saved"] == 500
+
+
+def test_interview_endpoints(monkeypatch):
+    import httpx
+
+    import main
+
+    use_fake_client(monkeypatch)
+    monkeypatch.setattr(main, "qa", QAGenerator())
+
+    async def flow():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            started = (await client.post("/interview/start", json={"domain": "rust"})).json()
+            payload = {"interview_id": started["interview_id"],
+                       "answers": [{"id": q["id"], "type": "mcq", "user_answer": "a"} for q in started["questions"]]}
+            finished = (await client.post("/interview/answer", json=payload)).json()
+            again = await client.post("/interview/answer", json=payload)
+            report = (await client.get(f"/interview/{started['interview_id']}")).json()
+            missing = await client.get("/interview/not-an-interview")
+            return finished, again.status_code, report, missing.status_code
+
+    finished, again, report, missing = asyncio.run(flow())
+    assert finished["final_result"] == "Passed" and finished["easy_score"] == 100
+    assert again == 400 and missing == 400
+    assert report["savings"]["levels_skipped"] == ["medium", "hard"]
@@ -0,0 +1,68 @@
+import asyncio
+
+from answer_cache import AnswerCache, normalize_question
+from llama_index_helper import IndexCache
+
+VECTORS = {
+    "what is polymorphism": [1.0, 0.0, 0.0],
+    "explain polymorphism": [0.98, 0.2, 0.0],
+    "what is a decorator": [0.0, 1.0, 0.0],
+}
+
+
+async def fake_embed(texts):
+    return [VECTORS[text] for text in texts]
+
+
+def test_exact_and_semantic_tiers():
+    cache = AnswerCache(embed=fake_embed, similarity_threshold=0.95)
+
+    async def scenario():
+        assert await cache.get("java", "What is polymorphism?") is None
+        await cache.put("java", "What is polymorphism?", "Many forms.")
+        assert await cache.get("java", "  what IS polymorphism ") == "Many forms."
+        assert await cache.get("java", "Explain polymorphism") == "Many forms."
+        assert await cache.get("java", "What is a decorator?") is None
+        assert await cache.get("python", "What is polymorphism?") is None
+
+    asyncio.run(scenario())
+    stats = cache.stats()
+    assert (stats["exact_hits"], stats["semantic_hits"], stats["misses"]) == (1, 1, 3)
+
+
+def test_entries_expire_and_are_bounded():
+    cache = AnswerCache(max_entries=1, ttl=60)
+
+    async def scenario():
+        await cache.put("java", "q1", "a1")
+        await cache.put("java", "q2", "a2")
+        assert await cache.get("java", "q1") is None
+        assert await cache.get("java", "q2") == "a2"
+        cache.ttl = -1
+        await cache.put("java", "q3", "a3")
+        assert await cache.get("java", "q3") is None
+
+    asyncio.run(scenario())
+
+
+def test_index_reload_invalidates_answers():
+    versions = {"java": 0}
+
+    class FakeIndex:
+        def as_query_engine(self):
+            return object()
+
+    index_cache = IndexCache(loader=lambda lang: FakeIndex(), signature=lambda lang: versions[lang],
+                             check_interval=0)
+    cache = AnswerCache()
+    index_cache.reload_listeners.append(cache.invalidate)
+
+    asyncio.run(cache.put("java", "q", "old answer"))
+    index_cache.get_query_engine("java")
+    versions["java"] = 1
+    index_cache.get_query_engine("java")
+    assert asyncio.run(cache.get("java", "q")) is None
+
+
+def test_normalize_question():
+    assert normalize_question("  What   is\tJava?? ") == "what is java"
@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+import openai_clients
+import utils
+from benchmarks.bench_load import run_against_app
+from benchmarks.fake_openai import FakeOpenAIServer
+from main import app
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    with FakeOpenAIServer(latency=0.05, jitter=0.0, embedding_latency=0.01) as fake:
+        monkeypatch.setenv("OPENAI_BASE_URL", fake.base_url)
+        # The fake server accepts any key, but the client refuses to start without one
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-fake")
+        monkeypatch.setattr(openai_clients, "_client", None)
+        monkeypatch.setattr(openai_clients, "_async_client", None)
+        monkeypatch.setattr(utils, "embedding_cache", utils.EmbeddingCache())
+        yield fake
+
+
+def test_interview_flows_against_fake_openai(fake_openai):
+    report = asyncio.run(run_against_app(app, flows=4, concurrency=2, domain="bench-test"))
+
+    endpoints = report["endpoints"]
+    assert endpoints["/start"]["requests"] == 12 and endpoints["/evaluate"]["requests"] == 12
+    assert endpoints["/final_result"]["requests"] == 4
+    assert all(s["errors"] == 0 for s in endpoints.values())
+    assert endpoints["/start"]["p50_ms"] >= 50
+    assert fake_openai.app.state.requests["chat"] == 12
+    assert fake_openai.app.state.requests["embeddings"] >= 1
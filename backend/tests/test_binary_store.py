@@ -0,0 +1,42 @@
+import json
+
+import numpy as np
+from llama_index import MockEmbedding, ServiceContext
+from llama_index.schema import QueryBundle
+
+from binary_store import BinaryIndex, BinaryVectorStore, convert_persist_dir
+
+
+def write_persist_dir(path, nodes):
+    path.mkdir()
+    docstore = {"docstore/data": {
+        node_id: {"__type__": "1", "__data__": {"id_": node_id, "text": text, "metadata": {"n": i}}}
+        for i, (node_id, text, _) in enumerate(nodes)
+    }}
+    vectors = {"embedding_dict": {node_id: vector for node_id, _, vector in nodes}}
+    (path / "docstore.json").write_text(json.dumps(docstore))
+    (path / "default__vector_store.json").write_text(json.dumps(vectors))
+
+
+def test_convert_and_load_round_trip(tmp_path):
+    nodes = [("a", "héllo wörld", [3.0, 0.0]), ("b", "", [0.0, 1.0]), ("c", "third", [1.0, 1.0])]
+    write_persist_dir(tmp_path / "java_index", nodes)
+
+    assert convert_persist_dir(str(tmp_path / "java_index"), str(tmp_path / "java_bin")) == 3
+    store = BinaryVectorStore(str(tmp_path / "java_bin"))
+    assert isinstance(store.embeddings, np.memmap)
+    assert [store.text(i) for i in range(len(store))] == ["héllo wörld", "", "third"]
+    assert np.allclose(np.linalg.norm(store.embeddings, axis=1), 1.0)
+    assert store.metadata[2] == {"n": 2}
+
+
+def test_retriever_returns_top_k_by_cosine(tmp_path):
+    nodes = [("a", "x axis", [1.0, 0.0]), ("b", "y axis", [0.0, 1.0]), ("c", "diagonal", [1.0, 1.0])]
+    write_persist_dir(tmp_path / "py_index", nodes)
+    convert_persist_dir(str(tmp_path / "py_index"), str(tmp_path / "py_bin"))
+
+    service_context = ServiceContext.from_defaults(llm=None, embed_model=MockEmbedding(embed_dim=2))
+    retriever = BinaryIndex(str(tmp_path / "py_bin"), service_context=service_context).as_retriever(2)
+    results = retriever.retrieve(QueryBundle("q", embedding=[0.9, 0.1]))
+    assert [r.node.node_id for r in results] == ["a", "c"]
+    assert results[0].node.text == "x axis"
@@ -0,0 +1,92 @@
+from llama_index import ServiceContext
+from llama_index import MockEmbedding
+
+import build_indexes
+import shards
+
+
+class CountingEmbedding(MockEmbedding):
+    calls: int = 0
+
+    def _get_text_embeddings(self, texts):
+        self.calls += len(texts)
+        return super()._get_text_embeddings(texts)
+
+
+def write_docs(root, files):
+    lang_dir = root / "docs" / "python"
+    lang_dir.mkdir(parents=True, exist_ok=True)
+    for path in lang_dir.iterdir():
+        path.unlink()
+    for name, text in files.items():
+        (lang_dir / name).write_text(text)
+
+
+def build(tmp_path, embed_model, **kwargs):
+    service_context = ServiceContext.from_defaults(llm=None, embed_model=embed_model)
+    return build_indexes.build_index_for_language(
+        "python", service_context=service_context,
+        docs_root=str(tmp_path / "docs"), index_root=str(tmp_path / "indexes"), **kwargs
+    )
+
+
+def test_incremental_build_only_embeds_changed_documents(tmp_path):
+    files = {f"page_{i}.txt": f"Python page number {i} about generators." for i in range(4)}
+    write_docs(tmp_path, files)
+    first = CountingEmbedding(embed_dim=8)
+    build(tmp_path, first)
+    assert first.calls == 4
+
+    files["page_1.txt"] = "Python page one was edited to talk about decorators."
+    del files["page_2.txt"]
+    files["page_9.txt"] = "A brand new page about asyncio."
+    write_docs(tmp_path, files)
+
+    dry = CountingEmbedding(embed_dim=8)
+    report = build(tmp_path, dry, incremental=True, dry_run=True)
+    assert dry.calls == 0
+    assert report["embeddings_saved"] == 2
+    assert report["embeddings_needed"] == 2
+    assert report["removed_documents"] == 2
+
+    second = CountingEmbedding(embed_dim=8)
+    build(tmp_path, second, incremental=True)
+    assert second.calls == 2
+
+    third = CountingEmbedding(embed_dim=8)
+    report = build(tmp_path, third, incremental=True)
+    assert third.calls == 0
+    assert report["embeddings_saved"] == 4
+
+
+def test_build_skips_duplicate_chunks(tmp_path):
+    text = "Python generators yield values lazily and keep their local state between calls to next."
+    write_docs(tmp_path, {"a_0_0.txt": text, "a_5_0.txt": text, "b_1_0.txt": "Decorators wrap functions."})
+    embed_model = CountingEmbedding(embed_dim=8)
+    report = build(tmp_path, embed_model)
+    assert embed_model.calls == 2
+    assert report["dedup"]["exact_duplicates"] == 1
+    assert report["dedup"]["embeddings_saved"] == 1
+
+    embed_model = CountingEmbedding(embed_dim=8)
+    build(tmp_path, embed_model, incremental=True, dedup_threshold=0)
+    assert embed_model.calls == 1
+
+
+def test_build_streams_from_shards_and_keeps_embeddings_after_packing(tmp_path):
+    files = {f"page_{i}.txt": f"Python page number {i} about iterators." for i in range(3)}
+    write_docs(tmp_path, files)
+    build(tmp_path, CountingEmbedding(embed_dim=8))
+
+    shards.pack_directory(str(tmp_path / "docs" / "python"), remove=True)
+    embed_model = CountingEmbedding(embed_dim=8)
+    report = build(tmp_path, embed_model, incremental=True)
+    assert embed_model.calls == 0
+    assert report["embeddings_saved"] == 3
+
+    store = shards.ShardStore(str(tmp_path / "docs" / "python"))
+    store.put("page_9", "A new page about context managers.")
+    store.close()
+    embed_model = CountingEmbedding(embed_dim=8)
+    build(tmp_path, embed_model, incremental=True)
+    assert embed_model.calls == 1
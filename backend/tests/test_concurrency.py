@@ -0,0 +1,45 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import httpx
+
+import openai_clients
+from main import app
+
+LATENCY = 0.3
+CONCURRENCY = 10
+
+
+class SlowCompletions:
+    """Stand-in for the async chat API that only waits, like a real LLM round trip."""
+
+    async def create(self, **kwargs):
+        await asyncio.sleep(LATENCY)
+        questions = [{"id": i, "question": f"What is closure {i}?", "type": "descriptive",
+                      "correct_answer": "A function with captured scope", "options": []} for i in range(10)]
+        message = SimpleNamespace(content=json.dumps(questions))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+async def run_concurrent_starts():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.post("/start", json={"domain": "javascript"}) for _ in range(CONCURRENCY)
+        ))
+        return time.perf_counter() - start, responses
+
+
+def test_start_requests_overlap_llm_latency(monkeypatch):
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=SlowCompletions()))
+    monkeypatch.setattr(openai_clients, "_async_client", fake)
+
+    elapsed, responses = asyncio.run(run_concurrent_starts())
+
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.json()["session_id"] for r in responses}) == CONCURRENCY
+    # A blocking client would serialize these: CONCURRENCY * LATENCY = 3s.
+    assert elapsed < CONCURRENCY * LATENCY / 3
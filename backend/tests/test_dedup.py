@@ -0,0 +1,52 @@
+from llama_index import Document
+
+import dedup
+import scrape_docs
+from benchmarks import bench_dedup
+
+TEXT = ("Generators produce values lazily with yield and keep their local state between calls, "
+        "which makes them a good fit for streaming large files line by line without loading them.")
+
+
+def test_canonical_url_collapses_spelling_variants():
+    variants = [
+        "https://www.learnjavaonline.org/",
+        "https://learnjavaonline.org",
+        "HTTPS://LearnJavaOnline.org:443/?utm_source=feed#intro",
+    ]
+    assert len({dedup.canonical_url(url) for url in variants}) == 1
+    assert dedup.canonical_url("https://a.org/x?b=2&a=1") == dedup.canonical_url("https://a.org/x/?a=1&b=2")
+    assert dedup.canonical_url("https://a.org/x") != dedup.canonical_url("https://a.org/y")
+
+    java = scrape_docs.URLS["java"]
+    kept = [url for _, url in dedup.unique_urls(java)]
+    assert kept.count("https://www.learnjavaonline.org/") == 1
+    assert len(kept) < len(java)
+
+
+def test_dedupe_documents_drops_exact_and_near_duplicates():
+    documents = [
+        Document(text=TEXT, metadata={"file_name": "a_0_0.txt"}),
+        Document(text="Closures capture variables from the scope where the function was created.",
+                 metadata={"file_name": "b_1_0.txt"}),
+        Document(text=TEXT.replace(" ", "  "), metadata={"file_name": "a_2_0.txt"}),
+        Document(text="Home Docs Sign in " + TEXT, metadata={"file_name": "c_3_0.txt"}),
+    ]
+    kept, report = dedup.dedupe_documents(documents)
+    assert [doc.metadata["file_name"] for doc in kept] == ["a_0_0.txt", "b_1_0.txt"]
+    assert report["exact_duplicates"] == 1
+    assert report["near_duplicates"] == 1
+    assert report["embeddings_saved"] == 2
+    assert report["bytes_saved"] == len(documents[2].text) + len(documents[3].text)
+
+    # The same copy survives whatever order the files are read in
+    kept_reversed, _ = dedup.dedupe_documents(documents[::-1])
+    assert sorted(doc.metadata["file_name"] for doc in kept_reversed) == ["a_0_0.txt", "b_1_0.txt"]
+
+
+def test_dedup_shrinks_fixture_corpus_without_losing_retrieval_quality():
+    result = bench_dedup.run(k=3)
+    assert result["passages_kept"] == result["passages"]
+    assert result["after"]["chunks"] < result["before"]["chunks"]
+    assert result["after"]["hit@3"] >= result["before"]["hit@3"]
+    assert result["after"]["mrr"] >= result["before"]["mrr"]
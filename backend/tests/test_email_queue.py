@@ -0,0 +1,153 @@
+import asyncio
+import socketserver
+import threading
+
+import pytest
+
+from email_queue import EmailQueue, SMTPConnectionPool
+
+
+class StandInSMTPServer(socketserver.ThreadingTCPServer):
+    """Minimal SMTP server: accepts EHLO/MAIL/RCPT/DATA, records messages, can refuse DATA."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SMTPHandler)
+        self.messages = []
+        self.connections = 0
+        self.data_replies = []  # replies used (and consumed) instead of 250 after DATA
+        self.lock = threading.Lock()
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply("220 stand-in ready")
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode().strip()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command in ("EHLO", "HELO"):
+                self.reply("250 stand-in")
+            elif command == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif command == "RCPT":
+                recipients.append(line.split(":", 1)[1].strip("<> "))
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                body = []
+                while True:
+                    data = self.rfile.readline().decode()
+                    if data.rstrip("\r\n") == ".":
+                        break
+                    body.append(data)
+                with server.lock:
+                    refusal = server.data_replies.pop(0) if server.data_replies else None
+                    if refusal is None:
+                        server.messages.append((recipients, "".join(body)))
+                self.reply(refusal or "250 queued")
+            elif command in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("502 not implemented")
+
+
+@pytest.fixture
+def smtp_server():
+    server = StandInSMTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_queue(server, **kwargs):
+    pool = SMTPConnectionPool("127.0.0.1", server.server_address[1], size=2, starttls=False)
+    return EmailQueue(pool, sender="noreply@example.com", **kwargs)
+
+
+def test_burst_reuses_pooled_connections(smtp_server):
+    queue = make_queue(smtp_server, batch_size=10)
+
+    async def scenario():
+        ids = [queue.submit(f"user{i}@example.com", f"Report {i}", f"<p>{i}</p>", cc=["hr@example.com"])
+               for i in range(25)]
+        await queue.join()
+        statuses = [queue.status(message_id) for message_id in ids]
+        await queue.stop()
+        return statuses
+
+    statuses = asyncio.run(scenario())
+    assert all(s["status"] == "sent" and s["attempts"] == 1 for s in statuses)
+    assert len(smtp_server.messages) == 25
+    assert ["user0@example.com", "hr@example.com"] in [recipients for recipients, _ in smtp_server.messages]
+    assert smtp_server.connections <= 2
+    assert queue.stats()["batches"] < 25
+
+
+def test_transient_failures_are_retried_and_permanent_ones_are_not(smtp_server):
+    smtp_server.data_replies = ["451 try again later", "550 mailbox unavailable"]
+    queue = make_queue(smtp_server, workers=1, batch_size=1, backoff=0.01)
+
+    async def scenario():
+        first = queue.submit("a@example.com", "A", "<p>a</p>")
+        second = queue.submit("b@example.com", "B", "<p>b</p>")
+        await queue.join()
+        result = queue.status(first), queue.status(second)
+        await queue.stop()
+        return result
+
+    first, second = asyncio.run(scenario())
+    # a: 451 then sent on retry; b: 550 is permanent
+    assert first["status"] == "sent" and first["attempts"] == 2
+    assert second["status"] == "failed" and second["attempts"] == 1
+    assert "550" in second["error"]
+    assert queue.stats()["retried"] == 1
+
+
+def test_stop_drains_pending_retries_and_bcc_stays_out_of_headers(smtp_server):
+    smtp_server.data_replies = ["451 try again later"]
+    queue = make_queue(smtp_server, workers=1, batch_size=1, backoff=60)
+
+    async def scenario():
+        message_id = queue.submit("a@example.com", "A", "<p>a</p>", bcc=["audit@example.com"])
+        while queue.status(message_id)["status"] != "retrying":
+            await asyncio.sleep(0.01)
+        await queue.stop()  # the 60 s backoff is not waited out
+        return queue.status(message_id)
+
+    status = asyncio.run(scenario())
+    assert status["status"] == "sent" and status["attempts"] == 2
+    recipients, body = smtp_server.messages[0]
+    assert recipients == ["a@example.com", "audit@example.com"]
+    assert "audit@example.com" not in body and "Bcc" not in body
+
+
+def test_stop_marks_undelivered_messages_failed():
+    pool = SMTPConnectionPool("127.0.0.1", 9, size=1, starttls=False, timeout=1)  # nothing listens here
+    queue = EmailQueue(pool, sender="noreply@example.com", workers=1, backoff=60, drain_timeout=0.2)
+
+    async def scenario():
+        message_id = queue.submit("a@example.com", "A", "<p>a</p>")
+        await queue.stop()
+        return queue.status(message_id)
+
+    status = asyncio.run(scenario())
+    assert status["status"] == "failed"
+    assert "shutdown" in status["error"]
+    assert queue.stats()["failed"] == 1
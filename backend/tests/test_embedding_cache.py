@@ -0,0 +1,108 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+
+import openai_clients
+import qa_engine
+import utils
+from models import AnswerItem, AnswerSubmission
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def create(self, input, model):
+        self.calls.append(list(input))
+        data = [
+            SimpleNamespace(index=i, embedding=[float(len(text)), 1.0, 0.5])
+            for i, text in enumerate(input)
+        ]
+        return SimpleNamespace(data=data)
+
+
+class AsyncFakeEmbeddings(FakeEmbeddings):
+    async def create(self, input, model):
+        return FakeEmbeddings.create(self, input, model)
+
+
+def use_fake_client(monkeypatch, cache=None):
+    fake = FakeEmbeddings()
+    monkeypatch.setattr(openai_clients, "_client", SimpleNamespace(embeddings=fake))
+    monkeypatch.setattr(utils, "embedding_cache", cache if cache is not None else utils.EmbeddingCache())
+    return fake
+
+
+def test_get_embeddings_batches_and_caches(monkeypatch):
+    fake = use_fake_client(monkeypatch)
+    first = utils.get_embeddings(["a", "bb", "a"])
+    assert fake.calls == [["a", "bb"]]
+    assert np.array_equal(first[0], first[2])
+
+    utils.get_embeddings(["bb", "ccc"])
+    assert fake.calls[1] == ["ccc"]
+
+
+def test_sqlite_store_survives_restart(monkeypatch, tmp_path):
+    path = str(tmp_path / "embeddings.db")
+    fake = use_fake_client(monkeypatch, utils.EmbeddingCache(path=path))
+    utils.get_embeddings(["persisted"])
+
+    restarted = utils.EmbeddingCache(path=path)
+    monkeypatch.setattr(utils, "embedding_cache", restarted)
+    vector = utils.get_embedding("persisted")
+    assert len(fake.calls) == 1
+    assert vector.dtype == np.float32
+
+
+def test_evaluation_uses_one_embedding_request(monkeypatch):
+    fake = AsyncFakeEmbeddings()
+    monkeypatch.setattr(openai_clients, "_async_client", SimpleNamespace(embeddings=fake))
+    monkeypatch.setattr(utils, "embedding_cache", utils.EmbeddingCache())
+    questions = [
+        {"id": i, "type": "descriptive", "correct_answer": f"reference answer {i}"}
+        for i in range(5)
+    ]
+    qa = qa_engine.QAGenerator()
+    qa.sessions.put("embedding-test", {"questions": questions, "score": None, "result": None})
+    answers = [AnswerItem(id=i, type="descriptive", user_answer=f"answer {i}") for i in range(5)]
+
+    asyncio.run(qa.evaluate_answers("embedding-test", answers))
+    assert len(fake.calls) == 1
+    assert len(fake.calls[0]) == 10
+
+    asyncio.run(qa.evaluate_answers("embedding-test", answers))
+    assert len(fake.calls) == 1
+
+
+def test_evaluate_many_matches_single_evaluation(monkeypatch):
+    fake = AsyncFakeEmbeddings()
+    monkeypatch.setattr(openai_clients, "_async_client", SimpleNamespace(embeddings=fake))
+    monkeypatch.setattr(utils, "embedding_cache", utils.EmbeddingCache())
+    questions = [
+        {"id": 1, "type": "mcq", "correct_answer": "B"},
+        {"id": 2, "type": "descriptive", "correct_answer": "shared reference"},
+        {"id": 3, "type": "descriptive", "correct_answer": "other reference text"},
+    ]
+    qa = qa_engine.QAGenerator()
+    submissions = []
+    for n in range(3):
+        session_id = f"batch-{n}"
+        qa.sessions.put(session_id, {"questions": questions, "score": None, "result": None})
+        submissions.append(AnswerSubmission(session_id=session_id, answers=[
+            AnswerItem(id=1, type="mcq", user_answer="b" if n else "c"),
+            AnswerItem(id=2, type="descriptive", user_answer="same answer"),
+            AnswerItem(id=3, type="descriptive", user_answer="x" * (n + 1)),
+        ]))
+    submissions.append(AnswerSubmission(session_id="missing", answers=[]))
+
+    results = asyncio.run(qa.evaluate_many(submissions))
+    # 2 references + "same answer" + 3 distinct answers, embedded once
+    assert len(fake.calls) == 1 and len(fake.calls[0]) == 6
+    assert results[-1] == {"session_id": "missing", "error": "Invalid session ID"}
+
+    for submission, result in zip(submissions[:3], results):
+        single = asyncio.run(qa.evaluate_answers(submission.session_id, submission.answers))
+        assert result == {"session_id": submission.session_id, **single}
+        assert qa.sessions.get(submission.session_id)["score"] == single["score"]
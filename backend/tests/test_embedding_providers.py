@@ -0,0 +1,33 @@
+import asyncio
+
+import numpy as np
+
+import utils
+from benchmarks.bench_embeddings import load_pairs, points
+from embedding_providers import HashingTfidfProvider
+
+
+def test_local_vectors_are_normalized_and_deterministic():
+    provider = HashingTfidfProvider(dim=512)
+    first = provider.embed(["Closures capture variables", ""])
+    second = asyncio.run(provider.aembed(["Closures capture variables", ""]))
+    assert np.isclose(np.linalg.norm(first[0]), 1.0)
+    assert not first[1].any()
+    assert np.array_equal(first[0], second[0])
+
+
+def test_local_provider_ranks_good_answers_above_bad_ones():
+    pairs = load_pairs()
+    provider = HashingTfidfProvider().fit([reference for reference, _ in pairs])
+    scores = points(provider, pairs)
+    assert (scores[0::2] > scores[1::2]).all()
+
+
+def test_cache_keys_include_the_provider(monkeypatch):
+    monkeypatch.setattr(utils, "embedding_cache", utils.EmbeddingCache())
+    monkeypatch.setattr(utils, "embedding_provider", HashingTfidfProvider(dim=64))
+    utils.get_embeddings(["same text"])
+    monkeypatch.setattr(utils, "embedding_provider", HashingTfidfProvider(dim=128))
+    vector = asyncio.run(utils.aget_embeddings(["same text"]))[0]
+    assert vector.shape == (128,)
+    assert len(utils.embedding_cache) == 2
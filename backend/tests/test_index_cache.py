@@ -0,0 +1,76 @@
+import pytest
+
+from llama_index_helper import IndexCache
+
+
+class FakeIndex:
+    def __init__(self, lang, version):
+        self.lang = lang
+        self.version = version
+
+    def as_query_engine(self):
+        return ("engine", self.lang, self.version)
+
+
+def make_cache(**kwargs):
+    versions = {}
+    loads = []
+
+    def loader(lang):
+        loads.append(lang)
+        return FakeIndex(lang, versions.get(lang, 0))
+
+    cache = IndexCache(loader=loader, signature=lambda lang: versions.get(lang, 0), **kwargs)
+    return cache, versions, loads
+
+
+def test_index_is_loaded_once():
+    cache, _, loads = make_cache()
+    assert cache.get_query_engine("java") == ("engine", "java", 0)
+    assert cache.get_query_engine("java") == ("engine", "java", 0)
+    assert loads == ["java"]
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_extra_languages_are_evicted_but_pinned_stay():
+    cache, _, loads = make_cache(pinned=("java",), max_extra=1)
+    cache.get_index("java")
+    cache.get_index("go")
+    cache.get_index("rust")
+    assert set(cache.stats()["indexes"]) == {"java", "rust"}
+    assert cache.stats()["evictions"] == 1
+    cache.get_index("go")
+    assert loads == ["java", "go", "rust", "go"]
+
+
+def test_changed_files_trigger_reload():
+    cache, versions, loads = make_cache(check_interval=0)
+    cache.get_index("python")
+    versions["python"] = 1
+    assert cache.get_index("python").version == 1
+    assert loads == ["python", "python"]
+    assert cache.stats()["reloads"] == 1
+
+
+def test_stats_endpoint():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    response = TestClient(app).get("/index_cache/stats")
+    assert response.status_code == 200
+    assert "hit_rate" in response.json()
+
+
+def test_warm_loads_the_rest_and_reports_failures():
+    def loader(lang):
+        if lang == "java":
+            raise FileNotFoundError("no java index")
+        return FakeIndex(lang, 0)
+
+    cache = IndexCache(pinned=("java", "python"), loader=loader, signature=lambda lang: 0)
+    with pytest.raises(RuntimeError, match="java"):
+        cache.warm()
+    assert cache.get_query_engine("python") == ("engine", "python", 0)
+    assert cache.stats()["misses"] == 2
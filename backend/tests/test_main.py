@@ -1,5 +1,10 @@
+import threading
+
 from fastapi.testclient import TestClient
+
+import main
 from main import app
+from warmup import Warmup
 
 client = TestClient(app)
 
@@ -35,3 +40,16 @@ def test_evaluate():
     if response.status_code not in [200, 400]:
         print("test_evaluate failed:", response.status_code, response.text)
     assert response.status_code in [200, 400]
+
+
+def test_healthz_answers_before_readyz(monkeypatch):
+    release = threading.Event()
+    warmup = Warmup()
+    warmup.add("indexes", release.wait)
+    monkeypatch.setattr(main, "warmup", warmup)
+
+    warmup.start()
+    assert (client.get("/healthz").status_code, client.get("/readyz").status_code) == (200, 503)
+    release.set()
+    warmup.wait(5)
+    assert (client.get("/healthz").status_code, client.get("/readyz").status_code) == (200, 200)
@@ -0,0 +1,61 @@
+import json
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+import metrics
+import openai_clients
+from main import app
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("test_seconds", "Test.", ("span",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, span="x")
+    lines = list(histogram.collect())
+    assert 'test_seconds_bucket{span="x",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{span="x",le="1"} 3' in lines
+    assert 'test_seconds_bucket{span="x",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{span="x"} 4' in lines
+
+
+class Completions:
+    async def create(self, **kwargs):
+        content = json.dumps([{"id": i, "question": f"Q{i}?", "type": "mcq", "correct_answer": "a",
+                               "options": ["a", "b", "c", "d"]} for i in range(1, 11)])
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=1000, completion_tokens=2000),
+        )
+
+
+def test_start_records_spans_tokens_and_cost_per_endpoint(monkeypatch):
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=Completions()))
+    monkeypatch.setattr(openai_clients, "_async_client", fake)
+    before = metrics.TOKENS.value(endpoint="/start", model="gpt-3.5-turbo", kind="completion")
+    spans = metrics.SPAN_SECONDS.count(span="llm_completion", endpoint="/start")
+
+    client = TestClient(app)
+    assert client.post("/start", json={"domain": "metrics-test"}).status_code == 200
+
+    assert metrics.TOKENS.value(endpoint="/start", model="gpt-3.5-turbo", kind="completion") == before + 2000
+    assert metrics.SPAN_SECONDS.count(span="llm_completion", endpoint="/start") == spans + 1
+    assert metrics.SPAN_SECONDS.count(span="json_extraction", endpoint="/start") >= 1
+
+    body = client.get("/metrics").text
+    assert 'interviewer_cost_usd_total{endpoint="/start",model="gpt-3.5-turbo"}' in body
+    assert 'interviewer_request_seconds_count{method="POST",route="/start",status="200"}' in body
+
+
+def test_parameterized_routes_share_one_series():
+    client = TestClient(app)
+    before = metrics.REQUEST_SECONDS.count(method="GET", route="/send-email/{message_id}", status=404)
+    for message_id in ("abc", "def", "ghi"):
+        client.get(f"/send-email/{message_id}")
+    client.get("/no-such-route")
+
+    assert metrics.REQUEST_SECONDS.count(method="GET", route="/send-email/{message_id}", status=404) == before + 3
+    body = client.get("/metrics").text
+    assert "/send-email/abc" not in body
+    assert 'route="unmatched",status="404"' in body
+    assert metrics.current_endpoint() == "background"
@@ -0,0 +1,85 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+
+import main
+from query_stream import stream_answer
+
+
+class FakeStreamingResponse:
+    def __init__(self, tokens):
+        self.closed = False
+        self.produced = 0
+        self.source_nodes = [
+            SimpleNamespace(node=SimpleNamespace(node_id="n1"), score=0.9),
+            SimpleNamespace(node=SimpleNamespace(node_id="n2"), score=0.5),
+        ]
+        self.response_gen = self._generate(tokens)
+
+    def _generate(self, tokens):
+        try:
+            for token in tokens:
+                self.produced += 1
+                yield token
+        finally:
+            self.closed = True
+
+
+class FakeEngine:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.responses = []
+
+    def query(self, question):
+        response = FakeStreamingResponse(self.tokens)
+        self.responses.append(response)
+        return response
+
+
+def test_query_stream_sends_sources_then_tokens_and_caches(monkeypatch):
+    engine = FakeEngine(["Poly", "morphism", "."])
+    monkeypatch.setattr(main.index_cache, "get_query_engine", lambda lang, streaming=False: engine)
+    monkeypatch.setattr(main, "answer_cache", main.AnswerCache())
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = await client.post("/query/stream", json={"lang": "java", "question": "What is it?"})
+            second = await client.post("/query/stream", json={"lang": "java", "question": "What is it?"})
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    events = [json.loads(line) for line in first.text.splitlines()]
+    assert events[0] == {"type": "sources", "node_ids": ["n1", "n2"], "scores": [0.9, 0.5]}
+    assert [e["text"] for e in events if e["type"] == "token"] == ["Poly", "morphism", "."]
+    assert events[-1] == {"type": "done"}
+
+    cached = [json.loads(line) for line in second.text.splitlines()]
+    assert cached[1] == {"type": "token", "text": "Polymorphism."}
+    assert len(engine.responses) == 1
+
+
+def test_disconnect_stops_upstream_generation():
+    response = FakeStreamingResponse([f"t{i}" for i in range(100)])
+    completed = []
+    received = []
+
+    async def is_disconnected():
+        return len(received) >= 3
+
+    async def on_complete(answer):
+        completed.append(answer)
+
+    async def scenario():
+        async for event in stream_answer(response, is_disconnected, on_complete=on_complete):
+            received.append(event)
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert received[0]["type"] == "sources"
+    assert len(received) == 3
+    assert response.closed
+    assert response.produced < 100
+    assert completed == []
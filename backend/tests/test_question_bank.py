@@ -0,0 +1,57 @@
+import asyncio
+
+from qa_engine import QAGenerator
+from question_bank import QuestionBank
+
+
+def make_questions(n, prefix="q"):
+    return [
+        {"id": i, "question": f"{prefix} {i}", "type": "mcq", "correct_answer": "a",
+         "options": {"a": "a", "b": "b", "c": "c", "d": "d"}}
+        for i in range(n)
+    ]
+
+
+def test_take_samples_and_removes_questions(tmp_path):
+    bank = QuestionBank(path=str(tmp_path / "bank.db"))
+    assert bank.take("Java", "easy", 10) is None
+
+    bank.add("java", "easy", make_questions(25))
+    questions = bank.take("Java ", "EASY", 10)
+    assert [q["id"] for q in questions] == list(range(1, 11))
+    assert bank.size("java", "easy") == 15
+
+
+def test_worker_refills_low_pools_in_demand(tmp_path):
+    bank = QuestionBank(path=str(tmp_path / "bank.db"), target_size=30, low_watermark=10, refill_after=2)
+    calls = []
+
+    async def generate(domain, level):
+        calls.append((domain, level))
+        return make_questions(10)
+
+    async def scenario():
+        bank.start(generate, warm_keys=[("Java", "easy")])
+        await asyncio.wait_for(bank._queue.join(), timeout=5)
+        # A one-off key is not refilled; a repeated one is
+        assert bank.take("python", "hard", 10) is None
+        assert bank.take("go", "easy", 10) is None
+        await asyncio.wait_for(bank._queue.join(), timeout=5)
+        assert bank.size("python", "hard") == 0
+        assert bank.take("python", "hard", 10) is None
+        await asyncio.wait_for(bank._queue.join(), timeout=5)
+        await bank.stop()
+
+    asyncio.run(scenario())
+    assert bank.size("python", "hard") == 30
+    assert bank.size("go", "easy") == 0
+    assert calls == [("java", "easy")] * 3 + [("python", "hard")] * 3
+
+
+def test_generate_questions_uses_bank_without_llm(tmp_path):
+    bank = QuestionBank(path=str(tmp_path / "bank.db"))
+    bank.add("react", "medium", make_questions(10, prefix="banked"))
+
+    output = asyncio.run(QAGenerator(bank=bank).generate_questions("react", "medium"))
+    assert len(output["questions"]) == 10
+    assert all(q["question"].startswith("banked") for q in output["questions"])
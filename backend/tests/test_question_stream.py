@@ -0,0 +1,174 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+import openai_clients
+from main import app
+from models import AnswerItem
+from qa_engine import QAGenerator
+from question_parser import IncrementalArrayParser, parse_questions, repair_json, validate_question
+
+QUESTIONS = [
+    {"id": 1, "question": "What does {} mean in a \"dict\"?", "type": "Descriptive",
+     "correct_answer": "An empty dict [literal]", "options": []},
+    {"id": 2, "question": "Pick one", "type": "MCQ", "correct_answer": "a",
+     "options": ["a", "b", "c", "d"]},
+]
+
+
+def test_parser_emits_objects_as_they_complete():
+    text = "Sure! ```json\n" + json.dumps(QUESTIONS) + "\n```"
+    parser = IncrementalArrayParser()
+    emitted = []
+    for i in range(0, len(text), 7):
+        emitted.append(parser.feed(text[i:i + 7]))
+
+    flat = [obj for batch in emitted for obj in batch]
+    assert flat == QUESTIONS
+    # The first question is available before the second one has been received
+    first_at = next(i for i, batch in enumerate(emitted) if batch)
+    assert first_at * 7 < text.index('"id": 2')
+    assert parser.done
+
+
+class StreamingCompletions:
+    async def create(self, stream=False, **kwargs):
+        text = json.dumps(QUESTIONS)
+
+        async def chunks():
+            for i in range(0, len(text), 10):
+                delta = SimpleNamespace(content=text[i:i + 10])
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+        return chunks()
+
+
+def test_start_stream_sends_questions_as_ndjson(monkeypatch):
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=StreamingCompletions()))
+    monkeypatch.setattr(openai_clients, "_async_client", fake)
+
+    response = TestClient(app).post("/start/stream", json={"domain": "python-stream-test"})
+    assert response.status_code == 200
+    events = [json.loads(line) for line in response.text.splitlines()]
+
+    assert events[0]["type"] == "session"
+    assert [e["question"]["type"] for e in events[1:-1]] == ["descriptive", "mcq"]
+    assert events[1]["question"]["question"] == QUESTIONS[0]["question"]
+    assert events[-1] == {"type": "done", "count": 2}
+
+
+def test_repair_fixes_fences_quotes_trailing_commas_and_truncation():
+    text = ("Here you go:\n```json\n[{'id': 1, 'question': 'What's a GIL?', 'type': 'descriptive', "
+            "'correct_answer': 'A lock',},\n {\"id\": 2, \"question\": \"Trunc")
+    assert json.loads(repair_json(text)) == [
+        {"id": 1, "question": "What's a GIL?", "type": "descriptive", "correct_answer": "A lock"},
+    ]
+    assert repair_json("no array here") == "[]"
+
+
+def test_truncated_last_question_is_dropped_not_clipped():
+    complete = {"id": 1, "question": "What is a closure?", "type": "descriptive",
+                "correct_answer": "A function that captures variables"}
+    clipped_mcq = '{"id": 2, "question": "Mutable?", "type": "mcq", "correct_answer": "list", "options": ["tuple", "li'
+    assert parse_questions(json.dumps([complete])[:-1] + ", " + clipped_mcq) == [dict(complete, options=[])]
+    assert parse_questions(json.dumps([complete])[:-30]) == []
+
+
+def test_parse_questions_salvages_and_validates():
+    text = json.dumps(QUESTIONS)[:-1] + ', {"id": 3, "question": broken}, ' + json.dumps(
+        {"id": 4, "question": "Dict options", "type": "MCQ", "correct_answer": 2, "options": {"a": 1, "b": 2}}
+    ) + ', {"id": 5, "question": "No answer", "type": "descriptive"}]'
+    questions = parse_questions(text)
+    assert [q["id"] for q in questions] == [1, 2, 4]
+    assert questions[2]["options"] == ["1", "2"] and questions[2]["type"] == "mcq"
+    assert validate_question({"id": 1, "question": "Q", "type": "mcq", "correct_answer": "a",
+                              "options": ["a"]}) is None
+    assert validate_question({"id": 1, "question": "Q", "type": "mcq", "correct_answer": "c",
+                              "options": ["a", "b"]}) is None
+    assert validate_question({"id": "q1", "question": "Q", "type": "mcq", "correct_answer": "B",
+                              "options": ["a", "b"]})["id"] == 0
+
+
+def test_mcq_answers_become_the_option_key_the_ui_submits():
+    options = ["tuple", "list", "str", "frozenset"]
+    question = {"id": 1, "question": "Which is mutable?", "type": "mcq", "options": options}
+    for answer in ("b", "B)", "Option B", "List"):
+        assert validate_question(dict(question, correct_answer=answer))["correct_answer"] == "b"
+    assert validate_question(dict(question, correct_answer="e")) is None
+
+    qa = QAGenerator()
+    q = qa._normalize_question(validate_question(dict(question, correct_answer="B")))
+    assert q["options"]["b"] == "list"
+    # QuestionCard submits the option key
+    answers = [AnswerItem(id=1, type="mcq", user_answer="b")]
+    assert qa._grade([q], answers) == (10, [])
+    assert qa._grade([q], [AnswerItem(id=1, type="mcq", user_answer="a")]) == (0, [])
+
+
+class CountingCompletions:
+    """First completion is cut off after 7 questions; records how many each request asked for."""
+
+    def __init__(self):
+        self.asked = []
+
+    async def create(self, messages, **kwargs):
+        count = int(messages[-1]["content"].split("Generate ")[1].split()[0])
+        self.asked.append(count)
+        offset = sum(self.asked[:-1]) * 100
+        questions = [{"id": i, "question": f"Question {offset + i}", "type": "descriptive",
+                      "correct_answer": "answer", "options": []} for i in range(1, count + 1)]
+        content = json.dumps(questions[:7] if len(self.asked) == 1 else questions)
+        if len(self.asked) == 1:
+            content += ', {"id": 8, "question": "cut'
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def test_request_questions_asks_only_for_the_missing_count(monkeypatch):
+    completions = CountingCompletions()
+    monkeypatch.setattr(openai_clients, "_async_client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+
+    questions = asyncio.run(QAGenerator().request_questions("python", "easy"))
+    assert completions.asked == [10, 3]
+    assert [q["id"] for q in questions] == list(range(1, 11))
+    assert len({q["question"] for q in questions}) == 10
+
+
+class RepeatingCompletions:
+    """Streams a question twice and stops early; the top-up repeats the streamed questions."""
+
+    def __init__(self):
+        self.asked = []
+
+    async def create(self, messages, stream=False, **kwargs):
+        streamed = [{"id": 1, "question": f"Streamed {i}", "type": "descriptive", "correct_answer": "x"}
+                    for i in (1, 1, 2)]
+        if stream:
+            text = json.dumps(streamed)
+
+            async def chunks():
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+            return chunks()
+        count = int(messages[-1]["content"].split("Generate ")[1].split()[0])
+        self.asked.append(count)
+        fresh = [{"id": i, "question": f"Fresh {len(self.asked)}-{i}", "type": "descriptive", "correct_answer": "x"}
+                 for i in range(max(count - 2, 1))]
+        content = json.dumps(streamed[1:] + fresh)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def test_stream_top_up_skips_questions_already_sent(monkeypatch):
+    completions = RepeatingCompletions()
+    monkeypatch.setattr(openai_clients, "_async_client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+
+    async def collect():
+        return [event async for event in QAGenerator().stream_questions("python", "easy")]
+
+    events = asyncio.run(collect())
+    texts = [e["question"]["question"] for e in events if e["type"] == "question"]
+    assert texts[:2] == ["Streamed 1", "Streamed 2"]
+    assert len(texts) == 10 and len(set(texts)) == 10
+    assert [e["question"]["id"] for e in events if e["type"] == "question"] == list(range(1, 11))
+    assert completions.asked == [8, 2, 1]
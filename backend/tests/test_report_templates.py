@@ -0,0 +1,57 @@
+from fastapi.testclient import TestClient
+
+from main import app
+from report_templates import ReportRenderer, render_report
+
+ANSWERS = [
+    {"type": "mcq", "user_answer": "B", "time_taken": 3.24, "answered_within_time": True},
+    {"type": "descriptive", "user_answer": "<script>alert('x')</script> & more", "time_taken": 41},
+]
+
+
+def test_report_escapes_answers_and_fills_fields():
+    report = render_report({"score": 72.46, "result": "Passed"}, ANSWERS, "java<", "2024-01-01 10:00")
+    assert "<script>" not in report
+    assert "&lt;script&gt;alert(&#x27;x&#x27;)&lt;/script&gt; &amp; more" in report
+    assert "<p>java&lt;</p>" in report
+    assert "72.5/100" in report and "status-passed" in report
+    assert "✅ Question 1 (MCQ)" in report and "⏰ Question 2 (DESCRIPTIVE)" in report
+    assert "Time Taken: 41.0s" in report
+
+
+def test_render_cache_is_keyed_by_session_and_inputs():
+    renderer = ReportRenderer(max_entries=1)
+    evaluation = {"score": 40, "result": "Failed"}
+    first = renderer.render(evaluation, ANSWERS, "java", "t", session_id="s1")
+    assert renderer.render(evaluation, ANSWERS, "java", "t", session_id="s1") is first
+    rescored = renderer.render({"score": 90, "result": "Passed"}, ANSWERS, "java", "t", session_id="s1")
+    assert "90.0/100" in rescored
+    renderer.render(evaluation, ANSWERS, "java", "t", session_id="s2")
+    assert renderer.stats() == {"hits": 1, "misses": 3, "entries": 1}
+
+
+def test_preview_endpoint_returns_html():
+    client = TestClient(app)
+    response = client.post("/report/preview", json={
+        "evaluation_result": {"score": 55, "result": "Passed"},
+        "user_answers": ANSWERS,
+        "domain": "python",
+        "timestamp": "2024-01-01",
+        "session_id": "preview-session",
+    })
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/html")
+    assert "55.0/100" in response.text
+
+
+def test_preview_accepts_list_and_dict_values():
+    answers = [{"type": "mcq", "user_answer": ["a", "b"], "time_taken": {"s": 3}, "answered_within_time": True}]
+    response = TestClient(app).post("/report/preview", json={
+        "evaluation_result": {"score": [55], "result": "Passed"},
+        "user_answers": answers,
+        "domain": "python",
+        "timestamp": "2024-01-01",
+        "session_id": "preview-lists",
+    })
+    assert response.status_code == 200
+    assert "[&#x27;a&#x27;, &#x27;b&#x27;]" in response.text
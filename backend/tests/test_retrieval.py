@@ -0,0 +1,54 @@
+import numpy as np
+from llama_index import Document, MockEmbedding, ServiceContext, VectorStoreIndex
+from llama_index.schema import QueryBundle
+
+from retrieval import ExactSearch, IVFSearch, MatrixIndex, normalize
+
+
+def clustered(n, dim=32, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    return normalize(centers[rng.integers(clusters, size=n)] + 0.3 * rng.normal(size=(n, dim)))
+
+
+def test_exact_search_matches_full_sort():
+    matrix = clustered(500)
+    query = matrix[7]
+    rows, scores = ExactSearch(matrix).search(query, 5)
+    expected = np.argsort(-(matrix @ query))[:5]
+    assert list(rows) == list(expected)
+    assert rows[0] == 7
+    assert np.all(np.diff(scores) <= 0)
+
+
+def test_ivf_search_has_high_recall():
+    matrix = clustered(4000)
+    queries = clustered(50, seed=1)
+    exact = ExactSearch(matrix)
+    ivf = IVFSearch(matrix, n_probe=8)
+
+    hits = 0
+    for query in queries:
+        truth = set(exact.search(query, 10)[0])
+        hits += len(truth & set(ivf.search(query, 10)[0]))
+    assert hits / (10 * len(queries)) >= 0.9
+
+
+class SeededEmbedding(MockEmbedding):
+    def _get_text_embedding(self, text):
+        return list(np.random.default_rng(len(text) * 7919 + ord(text[-1])).normal(size=self.embed_dim))
+
+    def _get_text_embeddings(self, texts):
+        return [self._get_text_embedding(text) for text in texts]
+
+
+def test_matrix_index_agrees_with_llama_retriever():
+    service_context = ServiceContext.from_defaults(llm=None, embed_model=SeededEmbedding(embed_dim=8))
+    docs = [Document(text=f"document number {i}" + "!" * i) for i in range(6)]
+    index = VectorStoreIndex.from_documents(docs, service_context=service_context)
+    query = list(np.random.default_rng(2).normal(size=8))
+
+    expected = index.as_retriever(similarity_top_k=3).retrieve(QueryBundle("q", embedding=query))
+    actual = MatrixIndex.from_vector_store_index(index).as_retriever(3).retrieve(QueryBundle("q", embedding=query))
+    assert [n.node.node_id for n in actual] == [n.node.node_id for n in expected]
+    assert actual[0].node.get_content() == expected[0].node.get_content()
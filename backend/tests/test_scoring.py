@@ -0,0 +1,24 @@
+import numpy as np
+
+from scoring import descriptive_points, pairwise_similarities, score_sessions
+
+
+def test_pairwise_similarities_match_cosine():
+    rng = np.random.default_rng(0)
+    a = rng.normal(size=(5, 16))
+    b = rng.normal(size=(5, 16))
+    expected = [x @ y / (np.linalg.norm(x) * np.linalg.norm(y)) for x, y in zip(a, b)]
+    assert np.allclose(pairwise_similarities(a, b), expected, atol=1e-5)
+
+
+def test_points_are_capped_and_zero_vectors_are_safe():
+    points = descriptive_points([[1.0, 0.0], [0.0, 0.0]], [[2.0, 0.0], [1.0, 1.0]])
+    assert np.allclose(points, [10.0, 0.0])
+
+
+def test_score_sessions_splits_per_session():
+    rng = np.random.default_rng(1)
+    blocks = [rng.normal(size=(n, 8)) for n in (3, 0, 2)]
+    results = score_sessions(blocks, blocks)
+    assert [len(r) for r in results] == [3, 0, 2]
+    assert np.allclose(np.concatenate(results), 10.0)
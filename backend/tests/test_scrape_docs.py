@@ -0,0 +1,96 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import scrape_docs
+from shards import ShardStore
+
+PAGES = {
+    "/intro": ("v1", "<html><body><nav>menu</nav><p>Python intro words</p></body></html>"),
+    "/no-etag": (None, "<html><body><p>Static page without validators</p></body></html>"),
+}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        etag, body = PAGES[self.path]
+        conditional = self.headers.get("If-None-Match")
+        self.requests_seen.append((self.path, conditional))
+        if etag and conditional == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Type", "text/html")
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fixture_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    FixtureHandler.requests_seen = []
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_second_run_skips_unchanged_pages(fixture_server, tmp_path):
+    # The trailing-slash variant is the same page, so it is not fetched again
+    urls = {"python": [fixture_server + "/intro", fixture_server + "/no-etag", fixture_server + "/intro/"]}
+
+    assert scrape_docs.main(urls, host_delay=0, base_dir=str(tmp_path)) == 2
+    store = ShardStore(str(tmp_path / "python"))
+    written = store.keys()
+    assert [key.rsplit("_", 2)[1:] for key in written] == [["0", "0"], ["1", "0"]]
+    assert "menu" not in store.get(written[0])["text"]
+    assert store.get(written[0])["url"] == fixture_server + "/intro"
+    assert not list((tmp_path / "python").glob("*.txt"))
+    store.close()
+
+    assert scrape_docs.main(urls, host_delay=0, base_dir=str(tmp_path)) == 0
+    assert ("/intro", "v1") in FixtureHandler.requests_seen
+
+    manifest = scrape_docs.load_manifest(str(tmp_path))
+    assert manifest[f"python/0/{fixture_server}/intro"]["etag"] == "v1"
+
+
+def test_rate_limiter_spaces_requests_per_host():
+    limiter = scrape_docs.HostRateLimiter(delay=0.2)
+    start = time.monotonic()
+    for host in ("a", "b", "a"):
+        limiter.wait(host)
+    assert 0.2 <= time.monotonic() - start < 0.4
+
+
+def test_process_page_cleans_hashes_and_chunks():
+    html = ("<html><head><style>p {}</style><script>var x = 1;</script></head><body><header>Site</header>"
+            "<p>  one   two\tthree </p>\n\n\n<div>four five</div><footer>(c)</footer></body></html>")
+    content_hash, chunks = scrape_docs.process_page(html, "html.parser", size=3)
+    assert scrape_docs.clean_text(html, "html.parser") == "one two\tthree\nfour five"
+    assert chunks == ["one two three", "four five"]
+    assert content_hash == scrape_docs.process_page(html.replace("Site", "Other"), "html.parser")[0]
+
+
+def test_clean_stage_in_process_pool_matches_inline(fixture_server, tmp_path):
+    urls = {"python": [fixture_server + "/intro", fixture_server + "/no-etag"]}
+    inline, pooled = tmp_path / "inline", tmp_path / "pooled"
+
+    assert scrape_docs.main(urls, host_delay=0, base_dir=str(inline), clean_workers=0) == 2
+    assert scrape_docs.main(urls, host_delay=0, base_dir=str(pooled), clean_workers=2) == 2
+    inline_store, pooled_store = ShardStore(str(inline / "python")), ShardStore(str(pooled / "python"))
+    # Fetch threads finish in any order, so compare by key rather than storage order
+    assert ({r["key"]: r for r in inline_store.iter_records()}
+            == {r["key"]: r for r in pooled_store.iter_records()})
+    assert (scrape_docs.load_manifest(str(inline))[f"python/1/{fixture_server}/no-etag"]["content_hash"]
+            == scrape_docs.load_manifest(str(pooled))[f"python/1/{fixture_server}/no-etag"]["content_hash"])
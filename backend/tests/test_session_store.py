@@ -0,0 +1,54 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from main import app, qa
+from session_store import InMemorySessionStore, SqliteSessionStore, compact_questions
+
+
+def test_memory_store_is_bounded():
+    store = InMemorySessionStore(max_size=2)
+    for i in range(3):
+        store.put(str(i), {"score": i})
+    assert "0" not in store
+    assert store.get("2") == {"score": 2}
+    assert len(store) == 2
+
+
+def test_memory_store_expires_records():
+    store = InMemorySessionStore(ttl=0.05)
+    store.put("a", {"score": 1})
+    time.sleep(0.1)
+    assert store.get("a") is None
+    assert len(store) == 0
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    worker_a = SqliteSessionStore(path=path)
+    worker_b = SqliteSessionStore(path=path)
+
+    worker_a.put("s1", {"questions": compact_questions([{"id": 1, "type": "mcq",
+                                                        "correct_answer": "a", "question": "?"}]),
+                        "score": None})
+    assert worker_b.update("s1", score=90)
+    assert worker_a.get("s1") == {"questions": [{"id": 1, "type": "mcq", "correct_answer": "a"}],
+                                  "score": 90}
+    assert not worker_b.update("missing", score=1)
+
+
+def test_final_result_reads_evaluated_sessions():
+    client = TestClient(app)
+    session_id = "final-result-test"
+    qa.sessions.put(session_id, {"questions": [{"id": i, "type": "mcq", "correct_answer": "Option A"}
+                                               for i in range(10)], "score": None, "result": None})
+    client.post("/evaluate", json={"session_id": session_id, "answers": [
+        {"id": i, "type": "mcq", "user_answer": "Option A"} for i in range(10)
+    ]})
+
+    response = client.get("/final_result", params={"easy_id": session_id})
+    assert response.status_code == 200
+    assert response.json()["easy_score"] == 100
+    assert response.json()["passed"]
+
+    assert client.get("/final_result", params={"easy_id": "unknown"}).status_code == 400
@@ -0,0 +1,86 @@
+import os
+
+import shards
+from shards import ShardStore
+
+
+def test_put_get_delete_and_reopen(tmp_path):
+    store = ShardStore(str(tmp_path))
+    assert store.put("a_0_0", "first chunk", url="https://a.org/", offset=0)
+    assert store.put("a_0_1", "second chunk", url="https://a.org/", offset=800)
+    assert not store.put("a_0_0", "first chunk", url="https://a.org/")  # unchanged, nothing appended
+    assert store.put("a_0_0", "first chunk, edited", url="https://a.org/")
+    assert store.delete("a_0_1")
+    store.close()
+
+    store = ShardStore(str(tmp_path))
+    assert store.keys() == ["a_0_0"]
+    record = store.get("a_0_0")
+    assert record["text"] == "first chunk, edited"
+    assert record["url"] == "https://a.org/"
+    assert record["hash"] == shards.text_hash("first chunk, edited")
+    assert store.stats()["dead_bytes"] > 0
+
+    store.compact()
+    assert store.stats()["dead_bytes"] == 0
+    assert [r["text"] for r in store.iter_records()] == ["first chunk, edited"]
+    store.close()
+    assert ShardStore(str(tmp_path)).get("a_0_0")["text"] == "first chunk, edited"
+
+
+def test_shards_roll_over_and_stream_in_order(tmp_path):
+    store = ShardStore(str(tmp_path), compression="none", max_shard_bytes=300)
+    for i in range(10):
+        store.put(f"k{i:02d}", f"chunk number {i} " * 5)
+    store.close()
+    assert store.stats()["shards"] > 1
+    assert [r["key"] for r in ShardStore(str(tmp_path)).iter_records()] == [f"k{i:02d}" for i in range(10)]
+
+
+def test_torn_tail_is_ignored_and_index_can_be_rebuilt(tmp_path):
+    store = ShardStore(str(tmp_path))
+    store.put("a", "alpha " * 50)
+    store.put("b", "beta " * 50)
+    store.close()
+    shard = tmp_path / shards.shard_name(0)
+    with open(shard, "ab") as f:
+        f.write(b"\x40\x00\x00\x00garbage")  # header of a record that never finished
+    os.remove(tmp_path / shards.INDEX_NAME)
+
+    store = ShardStore(str(tmp_path))
+    assert len(store) == 0
+    store.rebuild_index()
+    assert store.keys() == ["a", "b"]
+    assert store.get("b")["text"] == "beta " * 50
+
+
+def test_pack_directory_moves_txt_chunks(tmp_path):
+    (tmp_path / "site_0_0.txt").write_text("packed text")
+    assert shards.pack_directory(str(tmp_path), remove=True) == 1
+    assert not list(tmp_path.glob("*.txt"))
+    assert ShardStore(str(tmp_path)).get("site_0_0")["text"] == "packed text"
+
+
+def test_rebuild_index_keeps_deletes(tmp_path):
+    store = ShardStore(str(tmp_path))
+    store.put("a", "alpha")
+    store.put("b", "beta")
+    store.delete("b")
+    store.rebuild_index()
+    assert store.keys() == ["a"]
+    store.close()
+
+
+def test_append_after_torn_tail_survives_rebuild(tmp_path):
+    store = ShardStore(str(tmp_path))
+    store.put("a", "alpha " * 50)
+    store.close()
+    with open(tmp_path / shards.shard_name(0), "ab") as f:
+        f.write(b"\x40\x00\x00\x00garbage")
+
+    store = ShardStore(str(tmp_path))
+    store.put("c", "gamma " * 50)
+    store.rebuild_index()
+    assert store.keys() == ["a", "c"]
+    assert store.get("c")["text"] == "gamma " * 50
+    store.close()
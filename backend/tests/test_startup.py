@@ -0,0 +1,51 @@
+import threading
+import time
+
+from benchmarks import bench_import
+from warmup import Warmup
+
+
+def test_importing_main_defers_heavy_dependencies():
+    report = bench_import.measure("main", runs=1)
+    assert report["lazy_modules_loaded"] == []
+    assert report["slowest_imports"]
+
+
+def test_warmup_runs_steps_in_background():
+    release = threading.Event()
+    warmup = Warmup()
+    warmup.add("slow", release.wait)
+    warmup.add("broken", lambda: 1 / 0)
+
+    warmup.start()
+    assert not warmup.ready
+    assert warmup.report()["steps"]["broken"]["status"] == "pending"
+
+    release.set()
+    assert warmup.wait(5)
+    report = warmup.report()
+    assert report["steps"]["slow"]["status"] == "done"
+    assert report["steps"]["broken"]["status"] == "failed"
+    assert "division by zero" in report["steps"]["broken"]["error"]
+    assert not report["ready"]
+    warmup.stop()
+
+
+def test_warmup_retries_failed_steps_until_ready():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise OSError("index volume not mounted yet")
+
+    warmup = Warmup(retry_delay=0.01)
+    warmup.add("indexes", flaky)
+    warmup.start()
+    assert warmup.wait(5)
+    deadline = time.monotonic() + 5
+    while not warmup.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert warmup.ready
+    assert warmup.report()["steps"]["indexes"]["attempts"] == 3
+
@@ -1,15 +1,131 @@
-import openai
+import hashlib
 import os
-from dotenv import load_dotenv
-from openai import OpenAI
-load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from embedding_providers import EMBEDDING_MODEL, create_embedding_provider
+
+
+def embedding_key(text: str, model: str = EMBEDDING_MODEL) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Content-hashed embedding cache: an in-memory LRU in front of an optional
+    SQLite file so vectors survive restarts and can be shared between workers.
+    """
+
+    def __init__(self, max_items: int = 10000, path: str = None):
+        self.max_items = max_items
+        self.path = path
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._db.commit()
+
+    def __len__(self):
+        return len(self._items)
+
+    def _remember(self, key, vector):
+        self._items[key] = vector
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def get_many(self, keys) -> dict:
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._items.get(key)
+                if vector is not None:
+                    self._items.move_to_end(key)
+                    found[key] = vector
+            missing = [k for k in keys if k not in found]
+            if self._db is not None and missing:
+                placeholders = ",".join("?" * len(missing))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", missing
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    self._remember(key, vector)
+                    found[key] = vector
+        return found
+
+    def put_many(self, items: dict):
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+            if self._db is not None and items:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, vector.tobytes()) for key, vector in items.items()],
+                )
+                self._db.commit()
+
+
+embedding_cache = EmbeddingCache(
+    max_items=int(os.getenv("EMBEDDING_CACHE_SIZE", 10000)),
+    path=os.getenv("EMBEDDING_CACHE_PATH"),
+)
+
+
+embedding_provider = create_embedding_provider()
+
+
+def _lookup(texts):
+    """Split ``texts`` into cached vectors and unique texts still to be embedded."""
+    keys = [embedding_key(text, embedding_provider.name) for text in texts]
+    found = embedding_cache.get_many(set(keys))
+
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in found and key not in missing:
+            missing[key] = text
+    return keys, found, missing
+
+
+def _store(missing_keys, vectors) -> dict:
+    fetched = dict(zip(missing_keys, vectors))
+    embedding_cache.put_many(fetched)
+    return fetched
+
+
+def get_embeddings(texts):
+    """
+    Embed a list of texts with the configured provider, returning float32
+    vectors in the same order. Cached vectors are reused and all remaining
+    unique texts are embedded in one provider call.
+    """
+    keys, found, missing = _lookup(texts)
+
+    if missing:
+        found.update(_store(missing, embedding_provider.embed(list(missing.values()))))
+
+    return [found[key] for key in keys]
 
-client = OpenAI()
 
 def get_embedding(text: str):
-    response = client.embeddings.create(
-        input=[text],
-        model="text-embedding-ada-002"
-    )
-    return response.data[0].embedding
\ No newline at end of file
+    return get_embeddings([text])[0]
+
+
+async def aget_embeddings(texts):
+    """
+    Async variant of get_embeddings. The provider splits the missing texts
+    into batches of EMBEDDING_BATCH_SIZE and embeds them concurrently.
+    """
+    keys, found, missing = _lookup(texts)
+
+    if missing:
+        found.update(_store(missing, await embedding_provider.aembed(list(missing.values()))))
+
+    return [found[key] for key in keys]
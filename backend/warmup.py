@@ -0,0 +1,77 @@
+"""
+Start-up warm-up in the background, and the state behind /readyz.
+
+Heavy dependencies (llama_index, openai) are imported on first use, so the
+process starts serving right away. ``Warmup`` then runs named steps, such
+as building the OpenAI clients and loading the indexes, one after another
+in a background thread. /healthz answers as soon as the app is up; /readyz
+only once every step has finished. Failed steps (e.g. an index volume that
+was not mounted yet) are retried with exponential backoff, from
+``retry_delay`` up to ``max_retry_delay`` seconds, until they succeed.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    def __init__(self, retry_delay: float = 5.0, max_retry_delay: float = 300.0):
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._steps = []
+        self._status = {}
+        self._thread = None
+        self._done = threading.Event()
+        self._stop = threading.Event()
+
+    def add(self, name: str, fn):
+        self._steps.append((name, fn))
+        self._status[name] = {"status": "pending"}
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+            self._thread.start()
+
+    def _run_step(self, name, fn, attempt: int):
+        self._status[name] = {"status": "running", "attempts": attempt}
+        start = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            logger.exception("Warm-up step %s failed (attempt %d)", name, attempt)
+            self._status[name] = {"status": "failed", "error": str(e), "attempts": attempt}
+        else:
+            self._status[name] = {"status": "done", "attempts": attempt}
+        self._status[name]["seconds"] = round(time.perf_counter() - start, 3)
+
+    def _run(self):
+        for name, fn in self._steps:
+            self._run_step(name, fn, 1)
+        # wait() returns after the first pass; failed steps keep being retried
+        self._done.set()
+        delay = self.retry_delay
+        while True:
+            failed = [(name, fn) for name, fn in self._steps if self._status[name]["status"] == "failed"]
+            if not failed or self._stop.wait(delay):
+                return
+            for name, fn in failed:
+                self._run_step(name, fn, self._status[name]["attempts"] + 1)
+            delay = min(delay * 2, self.max_retry_delay)
+
+    def wait(self, timeout: float = None) -> bool:
+        """Wait for the first pass over the steps (not for retries)."""
+        return self._done.wait(timeout)
+
+    def stop(self):
+        """Stop retrying failed steps."""
+        self._stop.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set() and all(s["status"] == "done" for s in self._status.values())
+
+    def report(self) -> dict:
+        return {"ready": self.ready, "steps": {name: dict(status) for name, status in self._status.items()}}
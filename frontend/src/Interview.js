@@ -24,6 +24,9 @@ export default function Interview({ domain, onRestart }) {
   const [timerActive, setTimerActive] = useState(false);
   const [questionStartTime, setQuestionStartTime] = useState(null);
   const [emailSent, setEmailSent] = useState(false);
+  const [questionsDone, setQuestionsDone] = useState(false);
+  // Index of the question whose timer ran out; the advance waits for the next question (or the end of the stream)
+  const [timedOutAt, setTimedOutAt] = useState(null);
 
   const TIMER_DURATION = 30; // configurable timer duration in seconds
 
@@ -33,11 +36,13 @@ export default function Interview({ domain, onRestart }) {
     }
   }, [domain, level, questions.length, result]);
 
+  const hasQuestions = questions.length > 0;
+
   useEffect(() => {
-    if (questions.length > 0 && !result) {
+    if (hasQuestions && !result) {
       startTimer();
     }
-  }, [current, questions]);
+  }, [current, hasQuestions]);
 
   function startTimer() {
     setTimeLeft(TIMER_DURATION);
@@ -51,30 +56,67 @@ export default function Interview({ domain, onRestart }) {
     if (!answers[current]?.user_answer || answers[current]?.user_answer.trim() === "") {
       handleAnswerChange("UNANSWERED - Time ran out");
     }
-    // Auto proceed to next question
-    setTimeout(() => {
-      if (current + 1 < questions.length) {
-        setCurrent(current + 1);
-        setSelectedOption(null);
-      } else {
-        submitAnswers();
-      }
-    }, 1000);
+    // Auto proceed to next question (see the effect below)
+    const timedOut = current;
+    setTimeout(() => setTimedOutAt(timedOut), 1000);
   }
 
-  function fetchQuestions(levelType) {
+  // Runs with the latest questions, so a timeout on the last streamed question still advances
+  useEffect(() => {
+    if (timedOutAt === null) return;
+    if (timedOutAt !== current) {
+      // Already moved on by hand
+      setTimedOutAt(null);
+    } else if (current + 1 < questions.length) {
+      setTimedOutAt(null);
+      setCurrent(current + 1);
+      setSelectedOption(null);
+    } else if (questionsDone) {
+      setTimedOutAt(null);
+      submitAnswers();
+    }
+  }, [timedOutAt, current, questions.length, questionsDone]);
+
+  // Questions arrive as NDJSON lines, so the first one renders while the rest are generated
+  async function fetchQuestions(levelType) {
     setLoading(true);
-    axios
-      .post("https://ai-interviewer-67b9.onrender.com/start", { domain, level: levelType })
-      .then((res) => {
-        setSessionId(res.data.session_id);
-        setQuestions(res.data.questions || []);
-        setLoading(false);
-      })
-      .catch(() => {
-        alert("Failed to load questions.");
-        setLoading(false);
+    setQuestions([]);
+    setQuestionsDone(false);
+    setTimedOutAt(null);
+    try {
+      const res = await fetch("https://ai-interviewer-67b9.onrender.com/start/stream", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ domain, level: levelType }),
       });
+      if (!res.ok) throw new Error(`HTTP ${res.status}`);
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop();
+        for (const line of lines) {
+          if (!line.trim()) continue;
+          const event = JSON.parse(line);
+          if (event.type === "session") {
+            setSessionId(event.session_id);
+          } else if (event.type === "question") {
+            setQuestions((prev) => [...prev, event.question]);
+            setLoading(false);
+          }
+        }
+      }
+    } catch (err) {
+      console.error("Question stream error:", err);
+      alert("Failed to load questions.");
+    }
+    setQuestionsDone(true);
+    setLoading(false);
   }
 
   function handleAnswerChange(value) {
@@ -102,6 +144,11 @@ export default function Interview({ domain, onRestart }) {
       return;
     }
     
+    if (current + 1 >= questions.length && !questionsDone) {
+      alert("The next question is still being generated. Please wait a moment.");
+      return;
+    }
+
     setTimerActive(false);
     
     if (current + 1 < questions.length) {
@@ -302,7 +349,7 @@ export default function Interview({ domain, onRestart }) {
         onAnswerChange={handleAnswerChange}
         onOptionSelect={handleOptionSelect}
         onNext={nextQuestion}
-        isLastQuestion={current + 1 === questions.length}
+        isLastQuestion={questionsDone && current + 1 === questions.length}
         timerActive={timerActive}
       />
     </motion.div>